@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Linear-time benchmark for the Catalog and Manifest relationship-cycle check.
+
+Times scripts.manifest_v3._reject_relationship_cycles on synthetic
+Component Catalog graphs of growing size and shape:
+
+  chain       one generated_from chain through every component, the deepest
+              possible walk
+  fan-in      every component generated from the first one
+  lattice     each component generated from up to three earlier ones, and
+              every tenth retired into the one before it
+  cycle       the chain closed into one cycle, timing the rejection path
+              including the reported cycle
+
+and the Manifest variant (provenance and reintroduction edges) on the
+lattice. Prints the median time per component for each size and exits 1
+when the largest size costs more than --max-ratio times the smallest per
+component, i.e. when the check stops scaling linearly.
+
+    python scripts/benchmarks/relationship_graph.py [--sizes 1000,2500,5000,10000]
+        [--runs 5] [--max-ratio 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts import manifest_v3  # noqa: E402
+from scripts.bootstrap import ManifestValidationError  # noqa: E402
+
+
+def component_ids(size: int) -> List[str]:
+    return [f"cmp:graph-{index:06d}" for index in range(size)]
+
+
+def catalog_record(generated_from: List[str], successor: Optional[str] = None) -> dict:
+    return {"generated_from": generated_from, "successor_component_id": successor, "reintroduces_component_id": None}
+
+
+def manifest_record(record: dict) -> dict:
+    successor = record["successor_component_id"]
+    return {
+        "provenance": {"generated_from": record["generated_from"]},
+        "lifecycle": {
+            "reintroduces_component_id": record["reintroduces_component_id"],
+            "retirement": {"successor_component_id": successor} if successor is not None else None,
+        },
+    }
+
+
+def chain(size: int) -> Dict[str, dict]:
+    ids = component_ids(size)
+    return {component_id: catalog_record(ids[index + 1 : index + 2]) for index, component_id in enumerate(ids)}
+
+
+def fan_in(size: int) -> Dict[str, dict]:
+    ids = component_ids(size)
+    return {component_id: catalog_record(ids[:1] if index else []) for index, component_id in enumerate(ids)}
+
+
+def lattice(size: int) -> Dict[str, dict]:
+    ids = component_ids(size)
+    records = {}
+    for index, component_id in enumerate(ids):
+        parents = [ids[parent] for parent in (index // 2, index - 1, index - 7) if 0 <= parent < index]
+        successor = ids[index - 1] if index % 10 == 0 and index else None
+        records[component_id] = catalog_record(sorted(set(parents)), successor)
+    return records
+
+
+def cycle(size: int) -> Dict[str, dict]:
+    records = chain(size)
+    ids = component_ids(size)
+    records[ids[-1]] = catalog_record([ids[0]])
+    return records
+
+
+def check_catalog(records: Dict[str, dict]) -> None:
+    manifest_v3._reject_relationship_cycles(records, "catalog-cycle", catalog=True)
+
+
+def check_manifest(records: Dict[str, dict]) -> None:
+    manifest_v3._reject_relationship_cycles(
+        records, "manifest-reintroduction", catalog=False, provenance_category="manifest-provenance"
+    )
+
+
+def expect_cycle(records: Dict[str, dict]) -> None:
+    try:
+        check_catalog(records)
+    except ManifestValidationError:
+        return
+    raise AssertionError("closed chain was not rejected")
+
+
+def manifest_lattice(size: int) -> Dict[str, dict]:
+    return {component_id: manifest_record(record) for component_id, record in lattice(size).items()}
+
+
+SCENARIOS: Dict[str, Tuple[Callable[[int], Dict[str, dict]], Callable[[Dict[str, dict]], None]]] = {
+    "chain": (chain, check_catalog),
+    "fan-in": (fan_in, check_catalog),
+    "lattice": (lattice, check_catalog),
+    "cycle": (cycle, expect_cycle),
+    "manifest-lattice": (manifest_lattice, check_manifest),
+}
+
+
+def median_ms(check: Callable[[Dict[str, dict]], None], records: Dict[str, dict], runs: int) -> float:
+    samples: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        check(records)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,2500,5000,10000", help="Comma-separated component counts")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario and size (median is reported)")
+    parser.add_argument(
+        "--max-ratio", type=float, default=3.0, help="Allowed per-component slowdown of the largest size"
+    )
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    failures = []
+    for name, (build, check) in SCENARIOS.items():
+        per_component: List[float] = []
+        for size in sizes:
+            elapsed = median_ms(check, build(size), args.runs)
+            per_component.append(elapsed * 1000 / size)
+            print(f"{name} n={size}: {elapsed:.1f} ms median, {per_component[-1]:.2f} us/component")
+        ratio = per_component[-1] / per_component[0]
+        print(f"{name}: per-component cost x{ratio:.2f} from n={sizes[0]} to n={sizes[-1]}")
+        if ratio > args.max_ratio:
+            failures.append(name)
+
+    if failures:
+        print(f"FAIL: not linear within x{args.max_ratio:g}: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
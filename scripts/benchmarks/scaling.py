@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for scripts/bootstrap.py and scripts/manifest_reconciliation.py.
+
+Builds a synthetic template checkout per size (the tracked template files plus
+N generated files: four in five under .github/bench/, one in five under
+skills/bench-*/ so the derived .github/skills mirror grows too) and a
+Component Catalog of up to 10,000 components over those files. For every
+customisation ratio the adopter is reset to a fresh install, that share of
+its synthetic files is edited and committed, and these scenarios are timed:
+
+  fresh-install                 bootstrap.py into an empty git repository
+  noop-update                   --update with nothing to change
+  force-update                  --update --force, reverting the customisations
+  report-conversion-plan        --report-only over the schema-v2 Manifest
+  report-reconcile
+  v3-report-conversion-plan     --report-only over a v3 Manifest listing every
+  v3-report-reconcile           catalog component (10,000 at the maxItems limit)
+  v3-gate                       --update refusing the v3 Manifest (exit 1)
+
+each "cold" (the adopter's .ai-workflow-cache and the user cache directory
+removed first) and "warm" (repeated with those caches in place). The OS page
+cache is not dropped. Results are written as JSON; --baseline compares them
+with an earlier run and exits 1 when a scenario got slower than --tolerance.
+
+    python scripts/benchmarks/scaling.py [--sizes 1000,10000,100000]
+        [--customized 0,0.1,0.5] [--runs 1] [--output FILE] [--baseline FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.bootstrap import (  # noqa: E402
+    COMPONENT_CATALOG_PATH,
+    COMPONENT_CATALOG_RELEASE_ID,
+    COMPONENT_CATALOG_SCHEMA_VERSION,
+    COMPONENT_CATALOG_VERSION,
+    HASH_CACHE_DIRNAME,
+    MANIFEST_FILENAME,
+)
+
+BENCHMARK_FORMAT_VERSION = 1
+CATALOG_LIMIT = 10000
+BACKUP_DIRNAME = ".ai-workflow-backups"
+TIMESTAMP = "2026-01-01T00:00:00Z"
+GIT_IDENTITY = ["-c", "user.name=benchmark", "-c", "user.email=benchmark@example.invalid", "-c", "commit.gpgsign=false"]
+# Interactive prompts (dirty managed paths, old Git) are answered yes.
+PROMPT_ANSWERS = "y\n" * 8
+SCENARIO_EXIT_CODES = {"v3-gate": 1}
+
+
+def synthetic_path(index: int) -> str:
+    if index % 5 == 0:
+        skill = index // 500
+        return f"skills/bench-{skill:03d}/references/r{index:06d}.md"
+    return f".github/bench/d{index // 100:04d}/f{index:06d}.md"
+
+
+def synthetic_content(index: int) -> bytes:
+    # Mostly small Markdown with the occasional large asset, always the same bytes per index.
+    size = 256 * 1024 if index % 997 == 0 else 200 + (index * 7919) % 6000
+    line = f"synthetic template file {index}: lorem ipsum dolor sit amet\n".encode("ascii")
+    return (line * (size // len(line) + 1))[:size]
+
+
+def git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *GIT_IDENTITY, *args], cwd=cwd, check=True, capture_output=True)
+
+
+def build_template(root: Path, size: int) -> List[str]:
+    """Copy the tracked template into root, add size synthetic files and commit it."""
+    tracked = subprocess.run(
+        ["git", "ls-files", "-z"], cwd=REPO_ROOT, check=True, capture_output=True
+    ).stdout.decode("utf-8").split("\0")
+    for relative in tracked:
+        if not relative or relative.startswith("scripts/tests/"):
+            continue
+        destination = root / relative
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(REPO_ROOT / relative, destination)
+
+    paths = []
+    for index in range(size):
+        relative = synthetic_path(index)
+        destination = root / relative
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        destination.write_bytes(synthetic_content(index))
+        paths.append(relative)
+    for skill in range((size + 499) // 500):
+        (root / f"skills/bench-{skill:03d}/SKILL.md").write_text(
+            f"---\nname: bench-{skill:03d}\ndescription: Synthetic benchmark skill\n---\n", encoding="utf-8"
+        )
+
+    catalog = {
+        "catalog_schema_version": COMPONENT_CATALOG_SCHEMA_VERSION,
+        "catalog_version": COMPONENT_CATALOG_VERSION,
+        "source_release": {
+            "release_id": COMPONENT_CATALOG_RELEASE_ID,
+            "source_ref": COMPONENT_CATALOG_PATH.as_posix(),
+            "version": COMPONENT_CATALOG_VERSION,
+        },
+        "components": [component for component, _ in catalog_components(paths)],
+    }
+    (root / COMPONENT_CATALOG_PATH).write_text(json.dumps(catalog, indent=2) + "\n", encoding="utf-8")
+    subprocess.run(
+        [sys.executable, str(root / "scripts" / "bootstrap.py"), "--write-source-index"],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+    git(root, "init", "-q")
+    git(root, "add", "-A")
+    git(root, "commit", "-q", "-m", "Synthetic template")
+    return paths
+
+
+def catalog_components(paths: Sequence[str]) -> List[Tuple[Dict[str, Any], str]]:
+    """Return (catalog component, adopter path) pairs for at most CATALOG_LIMIT components.
+
+    Files under .github/bench/ are compatibility components; each synthetic
+    skill file is a canonical component plus the generated .github/skills
+    copy derived from it.
+    """
+
+    def component(component_id: str, path: str, role: str, parents: List[str]) -> Dict[str, Any]:
+        return {
+            "id": component_id,
+            "canonical_source_path": path,
+            "role": role,
+            "kind": "file",
+            "lifecycle_status": "active",
+            "previous_paths": [],
+            "generated_from": parents,
+            "successor_component_id": None,
+            "reintroduces_component_id": None,
+            "introduced_release": COMPONENT_CATALOG_RELEASE_ID,
+            "retired_release": None,
+        }
+
+    pairs: List[Tuple[Dict[str, Any], str]] = []
+    for index, path in enumerate(paths):
+        if path.startswith("skills/"):
+            if len(pairs) + 2 > CATALOG_LIMIT:
+                break
+            canonical_id = f"cmp:bench-c-{index:06d}"
+            pairs.append((component(canonical_id, path, "canonical", []), path))
+            derived = f".github/{path}"
+            pairs.append((component(f"cmp:bench-g-{index:06d}", derived, "generated", [canonical_id]), derived))
+        else:
+            if len(pairs) + 1 > CATALOG_LIMIT:
+                break
+            pairs.append((component(f"cmp:bench-l-{index:06d}", path, "compatibility", []), path))
+    return sorted(pairs, key=lambda pair: pair[0]["id"])
+
+
+def file_digest(path: Path) -> str:
+    return "sha256:" + hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def write_v3_manifest(template: Path, adopter: Path, paths: Sequence[str], customized: Sequence[str]) -> int:
+    """Replace the adopter's Manifest with a valid v3 one over the whole synthetic catalog."""
+    edited = set(customized)
+    components = []
+    for catalog_component, adopter_path in catalog_components(paths):
+        role = catalog_component["role"]
+        source_path = catalog_component["canonical_source_path"]
+        proposed = file_digest(template / (source_path[len(".github/"):] if role == "generated" else source_path))
+        observed = file_digest(adopter / adopter_path)
+        if adopter_path not in edited:
+            fork, outcome, baseline, result = "untouched", "installed", observed, proposed
+        elif role == "canonical":
+            fork, outcome, baseline, result = "customized", "preserved-customization", proposed, observed
+        else:
+            fork, outcome, baseline, result = "legacy", "preserved-existing", None, observed
+        basis, decision = {
+            "untouched": ("verified-managed-equality", "manage"),
+            "customized": ("hash-divergence", "preserve"),
+            "legacy": ("legacy-import", "report-only"),
+        }[fork]
+        source_kind = {"canonical": "template", "generated": "generated", "compatibility": "legacy"}[role]
+        components.append(
+            {
+                "identity": {
+                    "id": catalog_component["id"],
+                    "path": source_path,
+                    "path_key": source_path.lower(),
+                    "kind": "file",
+                    "role": role,
+                    "link": None,
+                },
+                "provenance": {
+                    "ownership": {
+                        "canonical": "template-managed",
+                        "generated": "derived-runtime",
+                        "compatibility": "legacy-compat",
+                    }[role],
+                    "source": {
+                        "kind": source_kind,
+                        "locator": f"{source_kind}:{source_path}",
+                        "release": COMPONENT_CATALOG_RELEASE_ID,
+                    },
+                    "generated_from": catalog_component["generated_from"],
+                    "fork": {"status": fork, "basis": basis, "decision": decision, "classified_at": TIMESTAMP},
+                },
+                "hashes": {
+                    "algorithm": "sha256",
+                    "content_basis": "exact-bytes",
+                    "baseline": baseline,
+                    "observed_before": observed,
+                    "proposed_source": proposed,
+                    "result_after": result,
+                },
+                "lifecycle": {
+                    "state": "active",
+                    "previous_paths": [],
+                    "retirement": None,
+                    "reintroduces_component_id": None,
+                },
+                "last_operation": {"transaction_id": "txn:bench-install", "outcome": outcome},
+                "installed_at": TIMESTAMP,
+                "updated_at": TIMESTAMP,
+            }
+        )
+    catalog_bytes = (template / COMPONENT_CATALOG_PATH).read_bytes()
+    manifest = {
+        "schema_version": 3,
+        "written_at": TIMESTAMP,
+        "source_release": {
+            "release_id": COMPONENT_CATALOG_RELEASE_ID,
+            "source_ref": COMPONENT_CATALOG_PATH.as_posix(),
+            "version": COMPONENT_CATALOG_VERSION,
+            "component_catalog": {
+                "path": COMPONENT_CATALOG_PATH.as_posix(),
+                "schema_version": COMPONENT_CATALOG_SCHEMA_VERSION,
+                "sha256": "sha256:" + hashlib.sha256(catalog_bytes).hexdigest(),
+            },
+        },
+        "last_transaction": {
+            "id": "txn:bench-install",
+            "mode": "update",
+            "writer": "python",
+            "started_at": TIMESTAMP,
+            "completed_at": TIMESTAMP,
+            "result": "committed",
+        },
+        "components": components,
+    }
+    (adopter / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return len(components)
+
+
+def customize(adopter: Path, paths: Sequence[str], ratio: float) -> List[str]:
+    """Edit every 1/ratio-th installed synthetic file and commit; returns the edited paths."""
+    if ratio <= 0:
+        return []
+    step = max(1, round(1 / ratio))
+    edited = [path for index, path in enumerate(paths) if index % step == 0]
+    for path in edited:
+        with open(adopter / path, "ab") as handle:
+            handle.write(b"local customisation\n")
+    git(adopter, "commit", "-q", "-a", "-m", f"Customise {ratio:.0%}")
+    return edited
+
+
+class Runner:
+    def __init__(self, template: Path, cache_home: Path, runs: int) -> None:
+        self.template = template
+        self.cache_home = cache_home
+        self.runs = runs
+        self.environment = dict(os.environ, AI_WORKFLOW_CACHE_HOME=str(cache_home))
+        self.results: List[Dict[str, Any]] = []
+
+    def bootstrap(self, *args: str) -> List[str]:
+        return [sys.executable, str(self.template / "scripts" / "bootstrap.py"), *args]
+
+    def report(self, adopter: Path, operation: str) -> List[str]:
+        return self.bootstrap(
+            "--report-only",
+            "--operation",
+            operation,
+            "--source-root",
+            str(self.template),
+            "--target-root",
+            str(adopter),
+        )
+
+    def clear_caches(self, adopter: Path) -> None:
+        shutil.rmtree(adopter / HASH_CACHE_DIRNAME, ignore_errors=True)
+        shutil.rmtree(self.cache_home, ignore_errors=True)
+
+    def _run_once(self, command: Sequence[str], cwd: Path) -> Tuple[float, Optional[float], int]:
+        cpu_before = _children_cpu()
+        started = time.perf_counter()
+        completed = subprocess.run(
+            list(command),
+            cwd=cwd,
+            env=self.environment,
+            input=PROMPT_ANSWERS,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            check=False,
+        )
+        wall = (time.perf_counter() - started) * 1000
+        cpu_after = _children_cpu()
+        cpu = (cpu_after - cpu_before) * 1000 if cpu_after is not None and cpu_before is not None else None
+        return wall, cpu, completed.returncode
+
+    def measure(
+        self,
+        scenario: str,
+        size: int,
+        ratio: float,
+        adopter: Path,
+        command: Sequence[str],
+        prepare: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Time command cold then warm; prepare runs untimed before every run."""
+        for cache in ("cold", "warm"):
+            walls: List[float] = []
+            cpus: List[float] = []
+            exit_codes = set()
+            for _ in range(self.runs):
+                if prepare is not None:
+                    prepare()
+                if cache == "cold":
+                    self.clear_caches(adopter)
+                wall, cpu, exit_code = self._run_once(command, adopter)
+                walls.append(wall)
+                if cpu is not None:
+                    cpus.append(cpu)
+                exit_codes.add(exit_code)
+            expected = SCENARIO_EXIT_CODES.get(scenario, 0)
+            result = {
+                "scenario": scenario,
+                "size": size,
+                "customized": ratio,
+                "cache": cache,
+                "wall_ms": round(statistics.median(walls), 1),
+                "cpu_ms": round(statistics.median(cpus), 1) if cpus else None,
+                "runs": self.runs,
+                "ok": exit_codes == {expected},
+            }
+            self.results.append(result)
+            flag = "" if result["ok"] else f"  UNEXPECTED EXIT {sorted(exit_codes)}"
+            print(f"  {result_key(result):<58} {result['wall_ms']:>10.1f} ms{flag}", flush=True)
+
+
+def _children_cpu() -> Optional[float]:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def reset_adopter(adopter: Path, ref: str) -> None:
+    git(adopter, "reset", "-q", "--hard", ref)
+    git(adopter, "clean", "-q", "-fdx", "-e", HASH_CACHE_DIRNAME)
+    shutil.rmtree(adopter / BACKUP_DIRNAME, ignore_errors=True)
+
+
+def bench_size(work: Path, size: int, ratios: Sequence[float], runs: int) -> List[Dict[str, Any]]:
+    print(f"size {size}: building synthetic template", flush=True)
+    template = work / f"template-{size}"
+    paths = build_template(template, size)
+    adopter = work / f"adopter-{size}"
+    runner = Runner(template, work / "user-cache", runs)
+
+    def fresh_adopter() -> None:
+        shutil.rmtree(adopter, ignore_errors=True)
+        adopter.mkdir()
+        git(adopter, "init", "-q")
+        with open(adopter / ".git" / "info" / "exclude", "a", encoding="utf-8") as handle:
+            handle.write(f"/{HASH_CACHE_DIRNAME}/\n/{BACKUP_DIRNAME}/\n")
+
+    runner.measure("fresh-install", size, 0.0, adopter, runner.bootstrap(), prepare=fresh_adopter)
+    git(adopter, "add", "-A")
+    git(adopter, "commit", "-q", "-m", "Fresh install")
+    installed = _head(adopter)
+
+    for ratio in ratios:
+        reset_adopter(adopter, installed)
+        edited = customize(adopter, paths, ratio)
+        customised = _head(adopter)
+
+        def restore() -> None:
+            reset_adopter(adopter, customised)
+
+        runner.measure("noop-update", size, ratio, adopter, runner.bootstrap("--update"), prepare=restore)
+        runner.measure("force-update", size, ratio, adopter, runner.bootstrap("--update", "--force"), prepare=restore)
+        restore()
+        for operation in ("conversion-plan", "reconcile"):
+            runner.measure(f"report-{operation}", size, ratio, adopter, runner.report(adopter, operation))
+        write_v3_manifest(template, adopter, paths, edited)
+        for operation in ("conversion-plan", "reconcile"):
+            runner.measure(f"v3-report-{operation}", size, ratio, adopter, runner.report(adopter, operation))
+        runner.measure("v3-gate", size, ratio, adopter, runner.bootstrap("--update"))
+    return runner.results
+
+
+def _head(repository: Path) -> str:
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repository, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def result_key(result: Dict[str, Any]) -> str:
+    return f"{result['scenario']} n={result['size']} customized={result['customized']:g} {result['cache']}"
+
+
+def compare(results: Sequence[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float, floor_ms: float) -> int:
+    """Print each result against the baseline; returns the number of regressions."""
+    previous = {result_key(result): result for result in baseline.get("results", [])}
+    regressions = 0
+    print()
+    print(f"{'scenario':<58} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in results:
+        key = result_key(result)
+        before = previous.get(key)
+        if before is None:
+            print(f"{key:<58} {'-':>10} {result['wall_ms']:>10.1f} {'new':>8}")
+            continue
+        change = (result["wall_ms"] - before["wall_ms"]) / before["wall_ms"] if before["wall_ms"] else 0.0
+        regressed = change > tolerance and result["wall_ms"] - before["wall_ms"] > floor_ms
+        regressions += regressed
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{key:<58} {before['wall_ms']:>10.1f} {result['wall_ms']:>10.1f} {change:>+8.0%}{marker}")
+    return regressions
+
+
+def _float_list(value: str) -> List[float]:
+    return [float(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Synthetic file counts (comma-separated)")
+    parser.add_argument("--customized", default="0,0.1,0.5", help="Customised share of adopter files (comma-separated)")
+    parser.add_argument("--runs", type=int, default=1, help="Runs per scenario and cache state (median is reported)")
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--floor-ms", type=float, default=50.0, help="Ignore slowdowns smaller than this many ms")
+    parser.add_argument("--workdir", help="Build the synthetic trees here and keep them (default: a temporary directory)")
+    args = parser.parse_args()
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+    sizes = [int(value) for value in _float_list(args.sizes)]
+    ratios = _float_list(args.customized)
+    if any(size < 1 for size in sizes) or any(not 0 <= ratio <= 1 for ratio in ratios):
+        parser.error("--sizes must be positive and --customized between 0 and 1")
+
+    with contextlib.ExitStack() as stack:
+        if args.workdir:
+            work = Path(args.workdir).resolve()
+            work.mkdir(parents=True, exist_ok=True)
+        else:
+            work = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="ai-workflow-scaling-")))
+        results: List[Dict[str, Any]] = []
+        for size in sizes:
+            results.extend(bench_size(work, size, ratios, args.runs))
+
+    document = {
+        "benchmark_format_version": BENCHMARK_FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "sizes": sizes,
+        "customized": ratios,
+        "results": results,
+    }
+    payload = json.dumps(document, indent=2) + "\n"
+    if args.output:
+        Path(args.output).write_text(payload, encoding="utf-8")
+    elif not args.baseline:
+        sys.stdout.write(payload)
+
+    failed = [result_key(result) for result in results if not result["ok"]]
+    if failed:
+        print(f"FAIL: unexpected exit status in: {', '.join(failed)}")
+    regressions = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"FAIL: {regressions} scenario(s) slower than the baseline by more than {args.tolerance:.0%}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Startup budget benchmark for scripts/bootstrap.py.
+
+Measures `python -X importtime -c "import scripts.bootstrap"` and the
+wall-clock time of short CLI invocations (--help, --report-only, a no-op
+--plan), and checks that the lazily loaded submodules stay off the import
+path. Exits 1 when the import exceeds --budget-ms or a lazy module was
+imported eagerly.
+
+    python scripts/benchmarks/startup.py [--budget-ms 120] [--runs 7]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+BOOTSTRAP = REPO_ROOT / "scripts" / "bootstrap.py"
+LAZY_MODULES = (
+    "scripts.manifest_v3",
+    "scripts.schema_compiler",
+    "scripts.portable_runtime",
+    "scripts.manifest_reconciliation",
+    "scripts.profiling",
+    "concurrent.futures",
+)
+
+
+def import_times() -> Dict[str, int]:
+    """Return cumulative -X importtime microseconds per module for scripts.bootstrap."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import scripts.bootstrap"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def wall_time_ms(command: Sequence[str], cwd: Path, runs: int) -> float:
+    samples: List[float] = []
+    environment = dict(os.environ, AI_WORKFLOW_CACHE_HOME=str(cwd / ".probe-cache"))
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            list(command), cwd=cwd, env=environment, input="y\n" * 4, capture_output=True, text=True, check=False
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=120.0, help="Import budget for scripts.bootstrap")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per CLI scenario (median is reported)")
+    args = parser.parse_args()
+
+    times = import_times()
+    bootstrap_ms = times["scripts.bootstrap"] / 1000
+    eager = [module for module in LAZY_MODULES if module in times]
+    print(f"import scripts.bootstrap: {bootstrap_ms:.1f} ms cumulative (budget {args.budget_ms:.0f} ms)")
+    for module in LAZY_MODULES:
+        print(f"  {module}: {'imported eagerly' if module in times else 'lazy'}")
+
+    python = sys.executable
+    with tempfile.TemporaryDirectory() as directory:
+        adopter = Path(directory)
+        subprocess.run(["git", "init", "-q"], cwd=adopter, check=False)
+        wall_time_ms([python, str(BOOTSTRAP)], adopter, 1)
+        scenarios = {
+            "interpreter only": [python, "-c", "pass"],
+            "--help": [python, str(BOOTSTRAP), "--help"],
+            "--report-only reconcile": [
+                python,
+                str(BOOTSTRAP),
+                "--report-only",
+                "--operation",
+                "reconcile",
+                "--source-root",
+                str(REPO_ROOT),
+                "--target-root",
+                str(adopter),
+            ],
+            "no-op --plan": [python, str(BOOTSTRAP), "--plan"],
+        }
+        for label, command in scenarios.items():
+            print(f"{label}: {wall_time_ms(command, adopter, args.runs):.1f} ms median")
+
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        return 1
+    if bootstrap_ms > args.budget_ms:
+        print("FAIL: scripts.bootstrap import is over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,20 +11,56 @@ not be available.
 from __future__ import annotations
 
 import argparse
+import contextlib
+import errno
 import hashlib
+import importlib
 import json
 import os
 import re
 import shutil
+import stat
 import subprocess
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from scripts.manifest_v3 import SourceEvidence
+    from scripts.profiling import Profiler
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 
 if __package__ in {None, ""}:
     sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+if __name__ in {"__main__", "__mp_main__"}:
+    # Submodules (and fleet worker processes) import scripts.bootstrap; let
+    # them share this module instead of executing a second copy of it.
+    sys.modules.setdefault("scripts.bootstrap", sys.modules[__name__])
 
 MIN_GIT = "2.0.0"
 MIN_PYTHON = "3.7.0"
@@ -55,12 +91,36 @@ PORTABLE_SKILL_LINKS = [
     Path(".agent/skills"),
 ]
 MANIFEST_FILENAME = ".ai-workflow-install.json"
+HASH_CACHE_DIRNAME = ".ai-workflow-cache"
+HASH_CACHE_FILENAME = "file-hashes.json"
+HASH_CACHE_VERSION = 1
+HASH_CACHE_RACY_WINDOW_NS = 2_000_000_000
+AGENT_RENDER_CACHE_FILENAME = "agent-renders.json"
+# Edits to the renderer modules already invalidate cached renders (see
+# agent_render_version); bump this for changes they would not show.
+AGENT_RENDER_VERSION = 1
+TOOL_PROBE_CACHE_FILENAME = "tool-probes.json"
+TOOL_PROBE_CACHE_VERSION = 1
+BACKUP_STORE_DIRNAME = ".ai-workflow-backups"
+BACKUP_INDEX_VERSION = 1
 SUPPORTED_MANIFEST_SCHEMA_VERSIONS = (1, 2, 3)
 PRODUCTION_MANIFEST_SCHEMA = Path("schemas/ai-workflow-install-manifest-v3.schema.json")
 COMPONENT_CATALOG_PATH = Path("manifest/component-catalog.json")
 COMPONENT_CATALOG_SCHEMA_VERSION = 1
 COMPONENT_CATALOG_RELEASE_ID = "ai-dev-workflow:component-catalog:1"
 COMPONENT_CATALOG_VERSION = "1"
+SOURCE_INDEX_PATH = Path("manifest/source-index.json")
+SOURCE_INDEX_VERSION = 1
+# Template inputs the installer reads, in addition to catalog source paths.
+SOURCE_INDEX_ROOTS = (
+    ".github",
+    "skills",
+    "agents",
+    "docs",
+    "changes/_template",
+    ".gitattributes",
+    ".editorconfig",
+)
 LIFECYCLE_TEMPLATE_FILES = (
     "00-intake.md",
     "01-brainstorm.md",
@@ -73,6 +133,46 @@ LIFECYCLE_TEMPLATE_FILES = (
     "99-archive.md",
 )
 
+# Heavy, rarely needed parts of the installer live in submodules that are
+# imported on first use; their public names stay reachable as bootstrap.<name>.
+_LAZY_ATTRIBUTES = {
+    **dict.fromkeys(
+        (
+            "SourceEvidence",
+            "_load_and_validate_component_catalog",
+            "_load_and_validate_production_schema",
+            "_reject_relationship_cycles",
+            "_validate_manifest_v3",
+            "_validate_relative_path",
+        ),
+        "scripts.manifest_v3",
+    ),
+    **dict.fromkeys(
+        (
+            "build_claude_agent_content",
+            "build_codex_agent_content",
+            "install_portable_runtime",
+            "parse_agent_definition",
+            "plan_agent_renders",
+            "plan_portable_runtime",
+            "plan_runtime_mirror",
+            "record_mirror_modes",
+            "render_agent_outputs",
+            "unquote_frontmatter_value",
+        ),
+        "scripts.portable_runtime",
+    ),
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
 
 @dataclass
 class CheckResult:
@@ -81,12 +181,77 @@ class CheckResult:
     meets_requirement: bool
 
 
+@dataclass
+class SyncRecord:
+    """One path's outcome: action is added/updated/skipped/conflicted, reason says why."""
+
+    path: str
+    action: str
+    suffix: str = ""
+    reason: str = ""
+
+    @property
+    def label(self) -> str:
+        return f"{self.path} {self.suffix}" if self.suffix else self.path
+
+
 @dataclass
 class SyncResult:
+    """Per-path records of a sync plus the string views printed in summaries."""
+
     files_added: List[str]
     files_updated: List[str]
     files_skipped: List[str]
     files_conflicted: List[str]
+    records: List[SyncRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_records(cls, records: Iterable[SyncRecord]) -> "SyncResult":
+        result = cls([], [], [], [])
+        for record in records:
+            result.add(record)
+        return result
+
+    def add(self, record: SyncRecord) -> None:
+        self.records.append(record)
+        view = {
+            "added": self.files_added,
+            "updated": self.files_updated,
+            "skipped": self.files_skipped,
+            "conflicted": self.files_conflicted,
+        }.get(record.action)
+        if view is not None:
+            view.append(record.label)
+
+
+@dataclass
+class SyncCandidate:
+    """Source content and target evidence gathered ahead of a sync decision.
+
+    desired_bytes is None when the desired content is a file hashed in place.
+    """
+
+    desired_bytes: Optional[bytes]
+    desired_hash: str
+    target_exists: bool
+    current_hash: Optional[str]
+
+
+@dataclass
+class SyncAction:
+    """One planned outcome; target is set only when applying it writes something."""
+
+    path: Path
+    status: str
+    suffix: str = ""
+    target: Optional[Path] = None
+    content: Optional[bytes] = None
+    source_file: Optional[Path] = None
+    digest: Optional[str] = None
+    preserve_metadata: bool = False
+    link_target: Optional[Path] = None
+    mirror: Optional[str] = None
+    reason: str = ""
 
 
 @dataclass
@@ -112,6 +277,7 @@ class ManifestLoadResult:
     manifest_path: Path
     diagnostic_category: Optional[str] = None
     catalog_validated: bool = False
+    source_ref: Optional[str] = None
 
 
 class ManifestValidationError(ValueError):
@@ -148,8 +314,123 @@ def run_command(command: Sequence[str]) -> Optional[str]:
         return None
 
 
-def check_tool(command: Sequence[str], regex: str, minimum: str) -> CheckResult:
-    output = run_command(command)
+def user_cache_dir() -> Path:
+    """Machine-level cache directory shared by every project on this host.
+
+    AI_WORKFLOW_CACHE_HOME overrides it; otherwise LOCALAPPDATA on Windows
+    and XDG_CACHE_HOME (default ~/.cache) elsewhere.
+    """
+    override = os.environ.get("AI_WORKFLOW_CACHE_HOME")
+    if override:
+        return Path(override)
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "ai-dev-workflow"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "ai-dev-workflow"
+
+
+def _ensure_ignored_dir(directory: Path) -> None:
+    """Create directory inside a project with a .gitignore that hides all of it from Git."""
+    directory.mkdir(parents=True, exist_ok=True)
+    ignore_file = directory / ".gitignore"
+    if not ignore_file.exists():
+        ignore_file.write_text("# Created by the AI workflow bootstrap.\n*\n", encoding="utf-8")
+
+
+def _write_cache_file(path: Path, payload: Any, indent: Optional[int] = None) -> None:
+    """Atomically replace path with payload as JSON; compact unless indent is given.
+
+    The temporary name carries the process id so concurrent writers never
+    share one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(payload, indent=indent, separators=None if indent is not None else (",", ":"))
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(text + "\n", encoding="utf-8")
+    os.replace(temporary, path)
+
+
+class ToolProbeCache:
+    """Persistent run_command output for tool version probes.
+
+    Keyed by the probe command line and fingerprinted by the resolved
+    executable's (path, size, mtime_ns); replacing or upgrading the binary,
+    or changing PATH so another one resolves, invalidates the entry.
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, dict]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, dict] = entries or {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "ToolProbeCache":
+        cache = cls(path or user_cache_dir() / TOOL_PROBE_CACHE_FILENAME)
+        try:
+            data = json.loads(cache.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeError, json.JSONDecodeError):
+            return cache
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != TOOL_PROBE_CACHE_VERSION
+            or not isinstance(data.get("entries"), dict)
+        ):
+            return cache
+        cache.entries = {
+            key: entry
+            for key, entry in data["entries"].items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get("fingerprint"), list)
+            and (entry.get("output") is None or isinstance(entry.get("output"), str))
+        }
+        return cache
+
+    @staticmethod
+    def _fingerprint(executable: str) -> Optional[List[Any]]:
+        resolved = shutil.which(executable)
+        if resolved is None:
+            return None
+        try:
+            info = os.stat(resolved)
+        except OSError:
+            return None
+        return [os.path.realpath(resolved), info.st_size, info.st_mtime_ns]
+
+    def run(self, command: Sequence[str]) -> Optional[str]:
+        """run_command(command), reusing the cached output for the same binary."""
+        fingerprint = self._fingerprint(command[0])
+        if fingerprint is None:
+            return run_command(command)
+        key = subprocess.list2cmdline(list(command))
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                self.hits += 1
+                return entry["output"]
+            self.misses += 1
+        output = run_command(command)
+        with self._lock:
+            self.entries[key] = {"fingerprint": fingerprint, "output": output}
+        return output
+
+    def save(self) -> None:
+        payload = {
+            "version": TOOL_PROBE_CACHE_VERSION,
+            "entries": {key: self.entries[key] for key in sorted(self.entries)},
+        }
+        _write_cache_file(self.path, payload, indent=2)
+
+
+def _probe(command: Sequence[str], cache: Optional[ToolProbeCache]) -> Optional[str]:
+    return run_command(command) if cache is None else cache.run(command)
+
+
+def check_tool(
+    command: Sequence[str], regex: str, minimum: str, cache: Optional[ToolProbeCache] = None
+) -> CheckResult:
+    output = _probe(command, cache)
     if not output:
         return CheckResult(False, None, False)
     version = extract_version(output, regex)
@@ -159,8 +440,8 @@ def check_tool(command: Sequence[str], regex: str, minimum: str) -> CheckResult:
     return CheckResult(True, version, meets)
 
 
-def check_git_installed() -> CheckResult:
-    return check_tool(["git", "--version"], r"git version (\d+\.\d+\.\d+)", MIN_GIT)
+def check_git_installed(cache: Optional[ToolProbeCache] = None) -> CheckResult:
+    return check_tool(["git", "--version"], r"git version (\d+\.\d+\.\d+)", MIN_GIT, cache)
 
 
 def check_python_version() -> CheckResult:
@@ -169,11 +450,11 @@ def check_python_version() -> CheckResult:
     return CheckResult(True, version, meets)
 
 
-def check_powershell_version() -> CheckResult:
-    output = run_command(["pwsh", "--version"])
+def check_powershell_version(cache: Optional[ToolProbeCache] = None) -> CheckResult:
+    output = _probe(["pwsh", "--version"], cache)
     if not output:
-        output = run_command(
-            ["powershell", "-NoLogo", "-Command", "$PSVersionTable.PSVersion.ToString()"]
+        output = _probe(
+            ["powershell", "-NoLogo", "-Command", "$PSVersionTable.PSVersion.ToString()"], cache
         )
     if not output:
         return CheckResult(False, None, False)
@@ -184,12 +465,12 @@ def check_powershell_version() -> CheckResult:
     return CheckResult(True, version, meets)
 
 
-def check_node_installed() -> CheckResult:
-    return check_tool(["node", "--version"], r"v?(\d+\.\d+\.\d+)", MIN_NODE)
+def check_node_installed(cache: Optional[ToolProbeCache] = None) -> CheckResult:
+    return check_tool(["node", "--version"], r"v?(\d+\.\d+\.\d+)", MIN_NODE, cache)
 
 
-def check_github_cli_installed() -> CheckResult:
-    output = run_command(["gh", "--version"])
+def check_github_cli_installed(cache: Optional[ToolProbeCache] = None) -> CheckResult:
+    output = _probe(["gh", "--version"], cache)
     if not output:
         return CheckResult(False, None, False)
     first_line = output.splitlines()[0]
@@ -200,6 +481,23 @@ def check_github_cli_installed() -> CheckResult:
     return CheckResult(True, version, meets)
 
 
+def probe_environment(cache: Optional[ToolProbeCache] = None) -> Dict[str, CheckResult]:
+    """Run the Git, PowerShell, Node.js and GitHub CLI probes concurrently."""
+    checks: Dict[str, Callable[[Optional[ToolProbeCache]], CheckResult]] = {
+        "git": check_git_installed,
+        "powershell": check_powershell_version,
+        "node": check_node_installed,
+        "gh": check_github_cli_installed,
+    }
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = {name: executor.submit(check, cache) for name, check in checks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+    results["python"] = check_python_version()
+    return results
+
+
 def write_check(
     name: str,
     result: CheckResult,
@@ -222,12 +520,14 @@ def write_check(
 
 
 def merge_sync_results(*results: SyncResult) -> SyncResult:
+    """Concatenate results; accumulate into one SyncPlan or SyncResult.add in loops."""
     merged = SyncResult([], [], [], [])
     for result in results:
         merged.files_added.extend(result.files_added)
         merged.files_updated.extend(result.files_updated)
         merged.files_skipped.extend(result.files_skipped)
         merged.files_conflicted.extend(result.files_conflicted)
+        merged.records.extend(result.records)
     return merged
 
 
@@ -243,870 +543,688 @@ def normalize_relative_path(path: Union[Path, str]) -> str:
     return normalized
 
 
-def should_exclude_relative(relative: Path, excludes: Sequence[str]) -> bool:
-    normalized = normalize_relative_path(relative).lower()
-    parts = normalized.split("/")
-    for pattern in excludes:
-        candidate = normalize_relative_path(pattern).lower().strip("/")
-        if "/" in candidate:
-            if normalized.startswith(candidate):
-                return True
-        elif candidate in {"codeowners", "dependabot.yml"}:
-            if parts[-1] == candidate:
+class ExcludeMatcher:
+    """Exclude patterns compiled once per sync call.
+
+    Patterns containing "/" are lower-cased path prefixes, CODEOWNERS and
+    dependabot.yml only ever match a file's basename, and any other pattern
+    matches a whole path segment. Matching costs O(path depth) set lookups
+    instead of re-normalising every pattern for every path.
+    """
+
+    BASENAME_ONLY = frozenset({"codeowners", "dependabot.yml"})
+
+    def __init__(self, excludes: Iterable[str] = ()) -> None:
+        prefixes: Set[str] = set()
+        basenames: Set[str] = set()
+        segments: Set[str] = set()
+        for pattern in excludes:
+            candidate = normalize_relative_path(pattern).lower().strip("/")
+            if "/" in candidate:
+                prefixes.add(candidate)
+            elif candidate in self.BASENAME_ONLY:
+                basenames.add(candidate)
+            else:
+                segments.add(candidate)
+        self.prefixes = frozenset(prefixes)
+        self.basenames = frozenset(basenames)
+        self.segments = frozenset(segments)
+        self._prefix_lengths = tuple(sorted({len(prefix) for prefix in prefixes}))
+
+    @classmethod
+    def compile(cls, excludes: Union["ExcludeMatcher", Iterable[str], None]) -> "ExcludeMatcher":
+        if isinstance(excludes, cls):
+            return excludes
+        return cls(excludes or ())
+
+    def __bool__(self) -> bool:
+        return bool(self.prefixes or self.basenames or self.segments)
+
+    def _has_prefix(self, normalized: str) -> bool:
+        for length in self._prefix_lengths:
+            if length > len(normalized):
+                break
+            if normalized[:length] in self.prefixes:
                 return True
-        elif candidate in parts:
+        return False
+
+    def matches(self, relative: Union[Path, str]) -> bool:
+        """Return True when the file at relative is excluded."""
+        normalized = normalize_relative_path(relative).lower()
+        if self.prefixes and self._has_prefix(normalized):
             return True
-    return False
+        parts = normalized.split("/")
+        if parts[-1] in self.basenames:
+            return True
+        if self.segments:
+            for part in parts:
+                if part in self.segments:
+                    return True
+        return False
 
+    def matches_directory(self, relative: Union[Path, str]) -> bool:
+        """Return True when every path below the directory matches an exclude."""
+        normalized = normalize_relative_path(relative).lower().strip("/")
+        if self.prefixes and self._has_prefix(f"{normalized}/"):
+            return True
+        return normalized.rsplit("/", 1)[-1] in self.segments
 
-def hash_bytes(content: bytes) -> str:
-    return f"sha256:{hashlib.sha256(content).hexdigest()}"
 
+def should_exclude_relative(relative: Path, excludes: Union[ExcludeMatcher, Sequence[str]]) -> bool:
+    return ExcludeMatcher.compile(excludes).matches(relative)
 
-def normalize_text_content(content: str) -> str:
-    return content if content.endswith("\n") else f"{content}\n"
 
+def directory_excluded(relative: str, excludes: Union[ExcludeMatcher, Sequence[str]]) -> bool:
+    """Return True when every path below the directory matches an exclude."""
+    return ExcludeMatcher.compile(excludes).matches_directory(relative)
 
-def get_path_hash(path: Path) -> Optional[str]:
-    if not path.exists() or path.is_dir():
-        return None
-    return f"sha256:{calculate_file_hash(path)}"
+
+@dataclass
+class TreeEntry:
+    """One walk_tree result; relative is a normalised POSIX path below the root."""
+
+    relative: str
+    path: Path
+    is_dir: bool
+    is_symlink: bool
+    excluded: bool = False
+    dir_entry: Optional[os.DirEntry] = None
+
+    def lstat(self) -> os.stat_result:
+        if self.dir_entry is not None:
+            return self.dir_entry.stat(follow_symlinks=False)
+        return self.path.lstat()
+
+
+def walk_tree(
+    root: Path,
+    excludes: Union[ExcludeMatcher, Sequence[str]] = (),
+    *,
+    include_directories: bool = False,
+) -> Iterator[TreeEntry]:
+    """Walk root depth-first in name order with os.scandir.
+
+    Like Path.rglob, symlinked directories are yielded but never descended
+    into, and is_dir follows symlinks. A directory whose whole subtree is
+    excluded is yielded once (is_dir and excluded) and not scanned.
+    """
+
+    def scan(directory: Path) -> Iterator[os.DirEntry]:
+        try:
+            with os.scandir(directory) as iterator:
+                return iter(sorted(iterator, key=lambda entry: entry.name))
+        except (FileNotFoundError, NotADirectoryError):
+            return iter(())
+
+    matcher = ExcludeMatcher.compile(excludes)
+    stack = [("", root, scan(root))]
+    while stack:
+        prefix, directory, entries = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        relative = prefix + entry.name
+        path = directory / entry.name
+        is_symlink = entry.is_symlink()
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir and not is_symlink:
+            if matcher and matcher.matches_directory(relative):
+                yield TreeEntry(relative, path, True, False, True, entry)
+                continue
+            if include_directories:
+                yield TreeEntry(relative, path, True, False, False, entry)
+            stack.append((f"{relative}/", path, scan(path)))
+            continue
+        excluded = bool(matcher) and matcher.matches(relative)
+        yield TreeEntry(relative, path, is_dir, is_symlink, excluded, entry)
 
 
-_COMPONENT_ID_PATTERN = re.compile(r"^cmp:[a-z0-9][a-z0-9._-]{2,127}$")
-_TRANSACTION_ID_PATTERN = re.compile(r"^txn:[a-z0-9][a-z0-9._-]{2,127}$")
 _HASH_PATTERN = re.compile(r"^sha256:[0-9a-f]{64}$")
-_TIMESTAMP_PATTERN = re.compile(
-    r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?Z$"
-)
-_RELATIVE_PATH_PATTERN = re.compile(r"^[A-Za-z0-9@+_.-]+(?:/[A-Za-z0-9@+_.-]+)*$")
-_WINDOWS_RESERVED_NAMES = {
-    "con", "prn", "aux", "nul",
-    *(f"com{index}" for index in range(1, 10)),
-    *(f"lpt{index}" for index in range(1, 10)),
-}
-_FORK_MAPPING = {
-    "untouched": ("verified-managed-equality", "manage"),
-    "customized": ("hash-divergence", "preserve"),
-    "project-owned": ("explicit-project-ownership", "preserve"),
-    "legacy": ("legacy-import", "report-only"),
-    "unknown": ("missing-lineage", "report-only"),
-    "derived-customized": ("derived-hash-divergence", "preserve"),
-    "conflicted": ("conflicting-evidence", "block"),
-    "not-applicable": ("hash-not-applicable", "report-only"),
-}
-_ROLE_OWNERSHIP = {
-    "canonical": "template-managed",
-    "generated": "derived-runtime",
-    "project-owned": "project-owned",
-    "compatibility": "legacy-compat",
-}
+_SOURCE_REF_PATTERN = re.compile(r"^[0-9a-f]{4,64}$")
+# Installers before this marker recorded a dirty checkout's HEAD as a plain
+# ref, so only a manifest carrying it has a source_ref SourceDelta may trust.
+SOURCE_REF_VERSION = 1
 
 
-def _validation_error(category: str, detail: str) -> None:
-    raise ManifestValidationError(category, detail)
+# Files read by calculate_file_hash in this process; --profile reports the
+# count per phase.
+FILES_HASHED = 0
+_FILES_HASHED_LOCK = threading.Lock()
 
 
-def _exact_object(
-    value: Any, expected_keys: Set[str], category: str, label: str
-) -> Dict[str, Any]:
-    if not isinstance(value, dict):
-        _validation_error(category, f"{label} must be an object.")
-    observed = set(value)
-    if observed != expected_keys:
-        missing = sorted(expected_keys - observed)
-        unknown = sorted(observed - expected_keys)
-        _validation_error(
-            category,
-            f"{label} has invalid properties; missing={missing}, unknown={unknown}.",
-        )
-    return value
+def profile_phase(profiler: Optional[Profiler], name: str) -> ContextManager[None]:
+    """Time a --profile phase; a no-op context when no profiler is active.
 
+    The profiler is a scripts.profiling.Profiler, only imported for --profile.
+    """
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.phase(name)
 
-def _validate_component_id(value: Any, category: str, label: str) -> str:
-    if not isinstance(value, str) or not _COMPONENT_ID_PATTERN.fullmatch(value):
-        _validation_error(category, f"{label} is not a valid component ID.")
-    return value
 
+def hash_bytes(content: bytes) -> str:
+    return f"sha256:{hashlib.sha256(content).hexdigest()}"
 
-def _validate_optional_component_id(value: Any, category: str, label: str) -> Optional[str]:
-    if value is None:
-        return None
-    return _validate_component_id(value, category, label)
-
-
-def _validate_relative_path(value: Any, category: str, label: str) -> str:
-    if not isinstance(value, str) or not value or len(value) > 512:
-        _validation_error(category, f"{label} must be a non-empty relative path.")
-    if (
-        not _RELATIVE_PATH_PATTERN.fullmatch(value)
-        or value.startswith("/")
-        or "\\" in value
-        or ":" in value
-        or "//" in value
-    ):
-        _validation_error(category, f"{label} contains unsafe path syntax.")
-    for segment in value.split("/"):
-        if segment in {".", ".."} or segment.endswith((".", " ")):
-            _validation_error(category, f"{label} contains an unsafe path segment.")
-        base_name = segment.split(".", 1)[0].lower()
-        if base_name in _WINDOWS_RESERVED_NAMES:
-            _validation_error(category, f"{label} contains a Windows reserved name.")
-    return value
 
+def normalize_text_content(content: str) -> str:
+    return content if content.endswith("\n") else f"{content}\n"
 
-def _validate_hash(value: Any, category: str, label: str) -> Optional[str]:
-    if value is None:
-        return None
-    if not isinstance(value, str) or not _HASH_PATTERN.fullmatch(value):
-        _validation_error(category, f"{label} must be null or a lowercase SHA-256 digest.")
-    return value
 
+def get_path_hash(path: Path, hash_cache: Optional["HashCache"] = None) -> Optional[str]:
+    if hash_cache is not None:
+        return hash_cache.file_hash(path)
+    if not path.exists() or path.is_dir():
+        return None
+    return f"sha256:{calculate_file_hash(path)}"
 
-def _timestamp_key(value: Any, category: str, label: str) -> Tuple[int, ...]:
-    if not isinstance(value, str):
-        _validation_error(category, f"{label} must be a UTC timestamp.")
-    match = _TIMESTAMP_PATTERN.fullmatch(value)
-    if not match:
-        _validation_error(category, f"{label} must use canonical UTC Z syntax.")
-    parts = [int(part) for part in match.groups()[:6]]
-    fraction = (match.group(7) or "").ljust(9, "0")
-    try:
-        datetime(*parts)
-    except ValueError:
-        _validation_error(category, f"{label} is not a real calendar timestamp.")
-    return tuple(parts + [int(fraction or "0")])
 
+class HashCache:
+    """Persistent sha256 cache for adopter files, keyed by stat fingerprint.
 
-def _validate_sorted_unique_strings(
-    value: Any,
-    category: str,
-    label: str,
-    *,
-    component_ids: bool = False,
-    paths: bool = False,
-    max_items: int = 64,
-) -> List[str]:
-    if not isinstance(value, list) or len(value) > max_items:
-        _validation_error(category, f"{label} must be an array with at most {max_items} items.")
-    if any(not isinstance(item, str) for item in value):
-        _validation_error(category, f"{label} must contain only strings.")
-    if value != sorted(value) or len(set(value)) != len(value):
-        _validation_error(category, f"{label} must be sorted and duplicate-free.")
-    for item in value:
-        if component_ids:
-            _validate_component_id(item, category, label)
-        if paths:
-            _validate_relative_path(item, category, label)
-    return value
+    An entry is reused only when (size, mtime_ns, inode, ctime_ns) match the
+    file exactly and the file was already settled when it was hashed. Files
+    modified within HASH_CACHE_RACY_WINDOW_NS of hashing, or on filesystems
+    that report no inode or timestamp, are always hashed in full.
+    """
 
+    def __init__(self, root: Path, entries: Optional[Dict[str, dict]] = None) -> None:
+        self.root = root
+        self.entries: Dict[str, dict] = entries or {}
+        self.hits = 0
+        self.misses = 0
+        # Root-relative path -> "hit" or "miss" for the files looked up this run.
+        self.outcomes: Dict[str, str] = {}
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self.root / HASH_CACHE_DIRNAME / HASH_CACHE_FILENAME
+
+    @classmethod
+    def load(cls, root: Path) -> "HashCache":
+        cache = cls(root)
+        try:
+            data = json.loads(cache.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeError, json.JSONDecodeError):
+            return cache
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != HASH_CACHE_VERSION
+            or not isinstance(data.get("entries"), dict)
+        ):
+            return cache
+        cache.entries = {
+            key: entry
+            for key, entry in data["entries"].items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get("fingerprint"), list)
+            and type(entry.get("checked_at_ns")) is int
+            and isinstance(entry.get("sha256"), str)
+            and _HASH_PATTERN.fullmatch(entry["sha256"])
+        }
+        return cache
+
+    def _key(self, path: Path) -> Optional[str]:
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _fingerprint(stat_result: os.stat_result) -> Optional[List[int]]:
+        if not stat_result.st_ino or not stat_result.st_mtime_ns or not stat_result.st_ctime_ns:
+            return None
+        return [
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            stat_result.st_ino,
+            stat_result.st_ctime_ns,
+        ]
 
-def _reject_relationship_cycles(
-    records: Dict[str, Dict[str, Any]], category: str, *, catalog: bool
-) -> None:
-    graph: Dict[str, List[str]] = {}
-    for component_id, record in records.items():
-        if catalog:
-            edges = list(record["generated_from"])
-            edges.extend(
-                candidate
-                for candidate in (
-                    record["successor_component_id"],
-                    record["reintroduces_component_id"],
-                )
-                if candidate is not None
-            )
-        else:
-            edges = list(record["provenance"]["generated_from"])
-            lifecycle = record["lifecycle"]
-            if lifecycle["reintroduces_component_id"] is not None:
-                edges.append(lifecycle["reintroduces_component_id"])
-            retirement = lifecycle["retirement"]
-            if retirement is not None and retirement["successor_component_id"] is not None:
-                edges.append(retirement["successor_component_id"])
-        graph[component_id] = edges
-
-    visiting: Set[str] = set()
-    visited: Set[str] = set()
-
-    def visit(node: str) -> None:
-        if node in visiting:
-            _validation_error(category, "Component relationship graph contains a cycle.")
-        if node in visited:
+    def file_hash(self, path: Path) -> Optional[str]:
+        try:
+            before = path.stat()
+        except OSError:
+            return None
+        if stat.S_ISDIR(before.st_mode):
+            return None
+        key = self._key(path)
+        fingerprint = self._fingerprint(before)
+        with self._lock:
+            entry = None
+            if key is not None:
+                self._seen.add(key)
+                entry = self.entries.get(key)
+            if (
+                entry is not None
+                and fingerprint is not None
+                and entry["fingerprint"] == fingerprint
+                and max(before.st_mtime_ns, before.st_ctime_ns) + HASH_CACHE_RACY_WINDOW_NS
+                < entry["checked_at_ns"]
+            ):
+                self.hits += 1
+                if key is not None:
+                    self.outcomes[key] = "hit"
+                return entry["sha256"]
+            self.misses += 1
+            if key is not None:
+                self.outcomes[key] = "miss"
+        digest = f"sha256:{calculate_file_hash(path)}"
+        if key is not None:
+            self._store(key, path, fingerprint, digest)
+        return digest
+
+    def record(self, path: Path, digest: str) -> None:
+        """Remember the digest of bytes the installer just wrote to path."""
+        key = self._key(path)
+        if key is None:
             return
-        visiting.add(node)
-        for child in graph.get(node, []):
-            visit(child)
-        visiting.remove(node)
-        visited.add(node)
+        try:
+            fingerprint = self._fingerprint(path.stat())
+        except OSError:
+            with self._lock:
+                self.entries.pop(key, None)
+            return
+        with self._lock:
+            self._seen.add(key)
+        self._store(key, path, fingerprint, digest)
+
+    def _store(self, key: str, path: Path, fingerprint: Optional[List[int]], digest: str) -> None:
+        checked_at_ns = time.time_ns()
+        try:
+            after = self._fingerprint(path.stat())
+        except OSError:
+            after = None
+        with self._lock:
+            if fingerprint is None or after != fingerprint:
+                # The file changed while it was hashed, or the filesystem cannot
+                # fingerprint it; never cache an uncertain digest.
+                self.entries.pop(key, None)
+                return
+            self.entries[key] = {
+                "fingerprint": fingerprint,
+                "checked_at_ns": checked_at_ns,
+                "sha256": digest,
+            }
+
+    def save(self) -> None:
+        retained = {
+            key: entry
+            for key, entry in self.entries.items()
+            if key in self._seen or (self.root / key).is_file()
+        }
+        _ensure_ignored_dir(self.path.parent)
+        payload = {
+            "version": HASH_CACHE_VERSION,
+            "entries": {key: retained[key] for key in sorted(retained)},
+        }
+        _write_cache_file(self.path, payload)
+
+
+_AGENT_RENDERER_DIGEST: Optional[str] = None
+
+
+def _agent_renderer_files() -> List[Path]:
+    # portable_runtime.py renders the agents; this module holds normalize_text_content.
+    return [Path(__file__).with_name("portable_runtime.py"), Path(__file__)]
+
+
+def agent_render_version() -> str:
+    """AGENT_RENDER_VERSION plus the digest of the modules whose code decides rendered agents."""
+    global _AGENT_RENDERER_DIGEST
+    if _AGENT_RENDERER_DIGEST is None:
+        digest = hashlib.sha256()
+        for path in _agent_renderer_files():
+            try:
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+            except OSError:
+                digest.update(b"missing")
+        _AGENT_RENDERER_DIGEST = digest.hexdigest()
+    return f"{AGENT_RENDER_VERSION}:{_AGENT_RENDERER_DIGEST}"
 
-    for component_id in sorted(graph):
-        visit(component_id)
 
+class AgentRenderCache:
+    """Rendered .claude/.codex agent digests keyed by source agent sha256.
 
-def _load_and_validate_component_catalog(
-    source_root: Path,
-) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]:
-    catalog_path = source_root / COMPONENT_CATALOG_PATH
-    try:
-        catalog_bytes = catalog_path.read_bytes()
-    except OSError:
-        _validation_error("catalog-missing", f"Component Catalog is unavailable: {catalog_path}")
-    try:
-        catalog = json.loads(catalog_bytes.decode("utf-8"))
-    except (UnicodeDecodeError, json.JSONDecodeError):
-        _validation_error("catalog-json", "Component Catalog is not valid UTF-8 JSON.")
-
-    catalog = _exact_object(
-        catalog,
-        {"catalog_schema_version", "catalog_version", "source_release", "components"},
-        "catalog-schema",
-        "Component Catalog",
-    )
-    if (
-        type(catalog["catalog_schema_version"]) is not int
-        or catalog["catalog_schema_version"] != COMPONENT_CATALOG_SCHEMA_VERSION
-    ):
-        _validation_error("catalog-schema", "Unsupported Component Catalog schema version.")
-    if catalog["catalog_version"] != COMPONENT_CATALOG_VERSION:
-        _validation_error("catalog-release", "Unexpected Component Catalog version.")
-    source_release = _exact_object(
-        catalog["source_release"],
-        {"release_id", "source_ref", "version"},
-        "catalog-schema",
-        "Component Catalog source_release",
-    )
-    if source_release != {
-        "release_id": COMPONENT_CATALOG_RELEASE_ID,
-        "source_ref": COMPONENT_CATALOG_PATH.as_posix(),
-        "version": COMPONENT_CATALOG_VERSION,
-    }:
-        _validation_error("catalog-release", "Unexpected Component Catalog release identity.")
-    if not isinstance(catalog["components"], list) or len(catalog["components"]) > 10000:
-        _validation_error("catalog-schema", "Component Catalog components must be an array.")
-
-    records: Dict[str, Dict[str, Any]] = {}
-    active_path_keys: Set[str] = set()
-    component_order: List[str] = []
-    required = {
-        "id", "canonical_source_path", "role", "kind", "lifecycle_status",
-        "previous_paths", "generated_from", "successor_component_id",
-        "reintroduces_component_id", "introduced_release", "retired_release",
-    }
-    for index, raw_component in enumerate(catalog["components"]):
-        component = _exact_object(
-            raw_component, required, "catalog-schema", f"Catalog component {index}"
-        )
-        component_id = _validate_component_id(component["id"], "catalog-schema", "Catalog component ID")
-        if component_id in records:
-            _validation_error("catalog-duplicate-id", f"Duplicate Catalog ID: {component_id}")
-        component_order.append(component_id)
-        path = _validate_relative_path(
-            component["canonical_source_path"], "catalog-schema", "Catalog canonical_source_path"
-        )
-        if component["role"] not in _ROLE_OWNERSHIP:
-            _validation_error("catalog-schema", "Catalog component role is invalid.")
-        if component["kind"] not in {"file", "directory", "mount", "link"}:
-            _validation_error("catalog-schema", "Catalog component kind is invalid.")
-        if component["lifecycle_status"] not in {"active", "retired", "tombstoned"}:
-            _validation_error("catalog-lifecycle", "Catalog lifecycle_status is invalid.")
-        _validate_sorted_unique_strings(
-            component["previous_paths"], "catalog-schema", "Catalog previous_paths", paths=True
-        )
-        _validate_sorted_unique_strings(
-            component["generated_from"], "catalog-schema", "Catalog generated_from",
-            component_ids=True, max_items=10000,
-        )
-        _validate_optional_component_id(
-            component["successor_component_id"], "catalog-reference", "Catalog successor_component_id"
-        )
-        _validate_optional_component_id(
-            component["reintroduces_component_id"], "catalog-reference", "Catalog reintroduces_component_id"
-        )
-        if component["introduced_release"] != COMPONENT_CATALOG_RELEASE_ID:
-            _validation_error("catalog-release", "Catalog introduced_release is invalid.")
-        if component["lifecycle_status"] == "active":
-            if component["retired_release"] is not None:
-                _validation_error("catalog-lifecycle", "Active Catalog identity cannot be retired.")
-            if component["successor_component_id"] is not None:
-                _validation_error("catalog-lifecycle", "Active Catalog identity cannot declare a successor.")
-            path_key = path.lower()
-            if path_key in active_path_keys:
-                _validation_error("catalog-duplicate-active-path", f"Duplicate active Catalog path: {path}")
-            active_path_keys.add(path_key)
-        elif not isinstance(component["retired_release"], str) or not component["retired_release"]:
-            _validation_error("catalog-lifecycle", "Retired Catalog identity needs retired_release.")
-        if component["lifecycle_status"] != "active" and component["reintroduces_component_id"] is not None:
-            _validation_error("catalog-lifecycle", "Terminal Catalog identity cannot reintroduce another ID.")
-        if component["role"] == "generated":
-            if not component["generated_from"]:
-                _validation_error("catalog-reference", "Generated Catalog identity needs a parent.")
-        elif component["generated_from"]:
-            _validation_error("catalog-reference", "Non-generated Catalog identity cannot have parents.")
-        if component["kind"] in {"mount", "link"} and component["role"] != "generated":
-            _validation_error(
-                "catalog-role-kind",
-                "Catalog mount/link identities must be generated and parent-bound.",
-            )
-        records[component_id] = component
-
-    if component_order != sorted(component_order):
-        _validation_error("catalog-schema", "Component Catalog records must be sorted by ID.")
-    for component_id, component in records.items():
-        references = list(component["generated_from"])
-        references.extend(
-            value
-            for value in (
-                component["successor_component_id"], component["reintroduces_component_id"]
-            )
-            if value is not None
-        )
-        for reference in references:
-            if reference == component_id:
-                _validation_error("catalog-self-reference", f"Catalog ID self-references: {component_id}")
-            if reference not in records:
-                _validation_error("catalog-reference", f"Unknown Catalog reference: {reference}")
-        reintroduced = component["reintroduces_component_id"]
-        if reintroduced is not None:
-            if component["lifecycle_status"] != "active" or records[reintroduced]["lifecycle_status"] != "tombstoned":
-                _validation_error("catalog-lifecycle", "Catalog reintroduction must target a tombstone.")
-    _reject_relationship_cycles(records, "catalog-cycle", catalog=True)
-    return catalog, records, catalog_bytes
-
-
-def _validate_v3_source_release(value: Any) -> Dict[str, Any]:
-    source_release = _exact_object(
-        value,
-        {"release_id", "source_ref", "version", "component_catalog"},
-        "manifest-schema",
-        "Manifest source_release",
-    )
-    for key, maximum in (("release_id", 128), ("source_ref", 256), ("version", 64)):
-        observed = source_release[key]
-        if not isinstance(observed, str) or not observed or len(observed) > maximum:
-            _validation_error("manifest-schema", f"Manifest source_release.{key} is invalid.")
-    binding = _exact_object(
-        source_release["component_catalog"],
-        {"path", "schema_version", "sha256"},
-        "manifest-schema",
-        "Manifest component_catalog binding",
-    )
-    if binding["path"] != COMPONENT_CATALOG_PATH.as_posix():
-        _validation_error("catalog-release", "Manifest binds an unexpected Component Catalog path.")
-    if (
-        type(binding["schema_version"]) is not int
-        or binding["schema_version"] != COMPONENT_CATALOG_SCHEMA_VERSION
-    ):
-        _validation_error("catalog-release", "Manifest binds an unsupported Component Catalog schema.")
-    _validate_hash(binding["sha256"], "catalog-digest", "Manifest Component Catalog digest")
-    return source_release
+    Stored next to the hash cache. An entry is only reused while both its
+    source digest and agent_render_version() match, so editing the renderer
+    invalidates every cached render.
+    """
 
+    def __init__(self, root: Path, entries: Optional[Dict[str, dict]] = None) -> None:
+        self.root = root
+        self.entries: Dict[str, dict] = entries or {}
+        self.hits = 0
+        self.misses = 0
+        self._seen: Set[str] = set()
 
-def _validate_v3_transaction(value: Any) -> Dict[str, Any]:
-    transaction = _exact_object(
-        value,
-        {"id", "mode", "writer", "started_at", "completed_at", "result"},
-        "manifest-schema",
-        "Manifest last_transaction",
-    )
-    transaction_id = transaction["id"]
-    if not isinstance(transaction_id, str) or not _TRANSACTION_ID_PATTERN.fullmatch(transaction_id):
-        _validation_error("manifest-schema", "Manifest transaction ID is invalid.")
-    if transaction["mode"] not in {"install", "update", "migration"}:
-        _validation_error("manifest-schema", "Manifest transaction mode is invalid.")
-    if transaction["writer"] not in {"python", "powershell"}:
-        _validation_error("manifest-schema", "Manifest transaction writer is invalid.")
-    if transaction["result"] != "committed":
-        _validation_error("manifest-schema", "Manifest transaction must be committed.")
-    started = _timestamp_key(transaction["started_at"], "manifest-timestamp", "Transaction started_at")
-    completed = _timestamp_key(transaction["completed_at"], "manifest-timestamp", "Transaction completed_at")
-    if started > completed:
-        _validation_error("manifest-timestamp", "Transaction completed_at precedes started_at.")
-    return transaction
-
-
-def _validate_v3_link(value: Any, kind: str) -> Optional[Dict[str, Any]]:
-    if kind not in {"mount", "link"}:
-        if value is not None:
-            _validation_error("manifest-link", "Only mount/link identities may contain link metadata.")
-        return None
-    link = _exact_object(
-        value,
-        {"target_path", "target_path_key", "mode"},
-        "manifest-link",
-        "Manifest identity.link",
-    )
-    target_path = _validate_relative_path(
-        link["target_path"], "manifest-link", "Manifest link target_path"
-    )
-    if link["target_path_key"] != target_path.lower():
-        _validation_error("manifest-link", "Manifest link target_path_key does not match target_path.")
-    if link["mode"] not in {"symlink", "junction", "copy-fallback"}:
-        _validation_error("manifest-link", "Manifest link mode is invalid.")
-    if kind == "link" and link["mode"] != "symlink":
-        _validation_error("manifest-link", "A link identity must use symlink mode.")
-    return link
-
-
-def _validate_v3_fork(value: Any) -> Dict[str, Any]:
-    fork = _exact_object(
-        value,
-        {"status", "basis", "decision", "classified_at"},
-        "manifest-schema",
-        "Manifest provenance.fork",
-    )
-    expected = _FORK_MAPPING.get(fork["status"])
-    if expected is None or (fork["basis"], fork["decision"]) != expected:
-        _validation_error("manifest-fork", "Manifest fork status/basis/decision mapping is invalid.")
-    _timestamp_key(fork["classified_at"], "manifest-timestamp", "Fork classified_at")
-    return fork
-
-
-def _validate_v3_provenance(value: Any, role: str, kind: str) -> Dict[str, Any]:
-    provenance = _exact_object(
-        value,
-        {"ownership", "source", "generated_from", "fork"},
-        "manifest-schema",
-        "Manifest provenance",
-    )
-    if provenance["ownership"] != _ROLE_OWNERSHIP[role]:
-        _validation_error("manifest-provenance", "Manifest role and ownership disagree.")
-    source = _exact_object(
-        provenance["source"],
-        {"kind", "locator", "release"},
-        "manifest-schema",
-        "Manifest provenance.source",
-    )
-    source_kind = source["kind"]
-    expected_source_kind = {
-        "canonical": "template",
-        "generated": "generated",
-        "project-owned": "project",
-        "compatibility": "legacy",
-    }[role]
-    if source_kind != expected_source_kind:
-        _validation_error("manifest-provenance", "Manifest role and source kind disagree.")
-    locator = source["locator"]
-    if (
-        not isinstance(locator, str)
-        or len(locator) < 3
-        or len(locator) > 512
-        or not re.fullmatch(r"(?:template|project|generated|legacy|unknown):[A-Za-z0-9@+_.:/#-]+", locator)
-        or not locator.startswith(f"{source_kind}:")
-        or "\\" in locator
-        or locator.split(":", 1)[1].startswith("/")
-        or re.match(r"^[A-Za-z]:/", locator.split(":", 1)[1])
-        or "://" in locator.split(":", 1)[1]
-        or any(part in {".", ".."} for part in locator.split(":", 1)[1].split("/"))
-    ):
-        _validation_error("manifest-provenance", "Manifest source locator is unsafe or inconsistent.")
-    if source["release"] is not None and (
-        not isinstance(source["release"], str) or not source["release"] or len(source["release"]) > 128
-    ):
-        _validation_error("manifest-schema", "Manifest source release is invalid.")
-    generated_from = _validate_sorted_unique_strings(
-        provenance["generated_from"],
-        "manifest-provenance",
-        "Manifest generated_from",
-        component_ids=True,
-    )
-    if role == "generated" and not generated_from:
-        _validation_error("manifest-provenance", "Generated Manifest component needs a parent.")
-    if role != "generated" and generated_from:
-        _validation_error("manifest-provenance", "Non-generated Manifest component cannot have parents.")
-    fork = _validate_v3_fork(provenance["fork"])
-    if fork["status"] == "project-owned" and role != "project-owned":
-        _validation_error("manifest-fork", "Project-owned fork status requires project-owned role.")
-    if fork["status"] == "legacy" and role != "compatibility":
-        _validation_error("manifest-fork", "Legacy fork status requires compatibility role.")
-    if fork["status"] == "derived-customized" and role != "generated":
-        _validation_error("manifest-fork", "Derived customization requires generated role.")
-    if fork["status"] == "customized" and role != "canonical":
-        _validation_error("manifest-fork", "Canonical customization requires canonical role.")
-    if fork["status"] == "not-applicable" and kind == "file":
-        _validation_error("manifest-fork", "A regular file cannot use not-applicable hash status.")
-    return provenance
-
-
-def _validate_v3_hashes(value: Any, fork: Dict[str, Any], kind: str) -> Dict[str, Any]:
-    hashes = _exact_object(
-        value,
-        {"algorithm", "content_basis", "baseline", "observed_before", "proposed_source", "result_after"},
-        "manifest-schema",
-        "Manifest hashes",
-    )
-    if hashes["algorithm"] != "sha256" or hashes["content_basis"] != "exact-bytes":
-        _validation_error("manifest-hash", "Manifest hash algorithm/content basis is invalid.")
-    for key in ("baseline", "observed_before", "proposed_source", "result_after"):
-        _validate_hash(hashes[key], "manifest-hash", f"Manifest hashes.{key}")
-    status = fork["status"]
-    if status == "untouched":
-        if hashes["baseline"] is None or hashes["baseline"] != hashes["observed_before"]:
-            _validation_error("manifest-fork", "Untouched classification needs equal known baseline and observation.")
-    if status in {"customized", "derived-customized"}:
+    @property
+    def path(self) -> Path:
+        return self.root / HASH_CACHE_DIRNAME / AGENT_RENDER_CACHE_FILENAME
+
+    @classmethod
+    def load(cls, root: Path) -> "AgentRenderCache":
+        cache = cls(root)
+        try:
+            data = json.loads(cache.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeError, json.JSONDecodeError):
+            return cache
         if (
-            hashes["baseline"] is None
-            or hashes["observed_before"] is None
-            or hashes["baseline"] == hashes["observed_before"]
+            not isinstance(data, dict)
+            or data.get("version") != agent_render_version()
+            or not isinstance(data.get("entries"), dict)
         ):
-            _validation_error("manifest-fork", "Customization classification needs known divergent hashes.")
-    if kind in {"mount", "directory", "link"} and status == "not-applicable":
-        if any(hashes[key] is not None for key in hashes if key not in {"algorithm", "content_basis"}):
-            _validation_error("manifest-hash", "Non-hashable component cannot claim content hashes.")
-    return hashes
-
-
-def _validate_v3_retirement(value: Any) -> Dict[str, Any]:
-    retirement = _exact_object(
-        value,
-        {"reason", "detected_at", "source_evidence", "successor_component_id", "pruned_at"},
-        "manifest-schema",
-        "Manifest retirement",
-    )
-    if retirement["reason"] not in {"renamed", "deleted", "source-retired", "superseded"}:
-        _validation_error("manifest-lifecycle", "Manifest retirement reason is invalid.")
-    _timestamp_key(retirement["detected_at"], "manifest-timestamp", "Retirement detected_at")
-    evidence = _exact_object(
-        retirement["source_evidence"],
-        {"type", "locator"},
-        "manifest-schema",
-        "Manifest retirement source_evidence",
-    )
-    if evidence["type"] not in {"rename-map", "component-absent-in-source", "release-retirement-record"}:
-        _validation_error("manifest-lifecycle", "Manifest retirement evidence type is invalid.")
-    if not isinstance(evidence["locator"], str) or not re.fullmatch(
-        r"(?:template|release):[A-Za-z0-9@+_.:/#-]+", evidence["locator"]
-    ):
-        _validation_error("manifest-lifecycle", "Manifest retirement evidence locator is invalid.")
-    _validate_optional_component_id(
-        retirement["successor_component_id"], "manifest-lifecycle", "Retirement successor_component_id"
-    )
-    if retirement["pruned_at"] is not None:
-        _timestamp_key(retirement["pruned_at"], "manifest-timestamp", "Retirement pruned_at")
-    return retirement
+            return cache
+        cache.entries = {
+            key: entry
+            for key, entry in data["entries"].items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get("source_sha256"), str)
+            and isinstance(entry.get("outputs"), list)
+            and all(
+                isinstance(output, list)
+                and len(output) == 2
+                and all(isinstance(item, str) for item in output)
+                for output in entry["outputs"]
+            )
+        }
+        return cache
+
+    def lookup(self, key: str, source_hash: Optional[str]) -> Optional[List[Tuple[str, str]]]:
+        """Return the cached (relative path, sha256) outputs for this source digest."""
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if source_hash is None or entry is None or entry["source_sha256"] != source_hash:
+            return None
+        return [(relative, digest) for relative, digest in entry["outputs"]]
+
+    def store(self, key: str, source_hash: str, outputs: List[Tuple[str, str]]) -> None:
+        self._seen.add(key)
+        self.entries[key] = {
+            "source_sha256": source_hash,
+            "outputs": [[relative, digest] for relative, digest in outputs],
+        }
+
+    def save(self) -> None:
+        _ensure_ignored_dir(self.path.parent)
+        payload = {
+            "version": agent_render_version(),
+            "entries": {key: self.entries[key] for key in sorted(self.entries) if key in self._seen},
+        }
+        _write_cache_file(self.path, payload)
+
+
+class SourceIndex:
+    """Shipped path -> (sha256, size, role) index of the template source tree.
+
+    Generated with --write-source-index next to the Component Catalog so
+    installs and reconciliation reports need not rehash immutable template
+    files. The index is checked against its own files_digest on load. A
+    loaded entry is only trusted when Git shows its file unchanged since
+    the commit that last wrote the index and the file still has the indexed
+    size; everything else is hashed. apply_sync_plan re-verifies every
+    source file it actually copies. A built index (verified=True) was
+    hashed in this run and is trusted as is.
+    """
+
+    def __init__(self, root: Path, files: Dict[str, dict], verified: bool = False) -> None:
+        self.root = root
+        self.files = files
+        self.hits = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._proven: Optional[Set[str]] = set(files) if verified else None
+
+    @staticmethod
+    def _files_digest(files: Dict[str, dict]) -> str:
+        return hash_bytes(json.dumps(files, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def build(cls, root: Path) -> "SourceIndex":
+        roles: Dict[str, str] = {}
+        try:
+            catalog = json.loads((root / COMPONENT_CATALOG_PATH).read_text(encoding="utf-8"))
+            for component in catalog.get("components", []):
+                roles[component["canonical_source_path"]] = component["role"]
+        except (OSError, UnicodeError, json.JSONDecodeError, AttributeError, KeyError, TypeError):
+            roles = {}
+
+        paths = set(path for path in roles if (root / path).is_file())
+        for relative in SOURCE_INDEX_ROOTS:
+            top = root / relative
+            if top.is_file():
+                paths.add(relative)
+            elif top.is_dir():
+                paths.update(
+                    f"{relative}/{entry.relative}"
+                    for entry in walk_tree(top, ("__pycache__",))
+                    if not entry.excluded and entry.dir_entry.is_file()
+                )
+        files = {}
+        for relative in sorted(paths):
+            path = root / relative
+            files[relative] = {
+                "sha256": f"sha256:{calculate_file_hash(path)}",
+                "size": path.stat().st_size,
+                "role": roles.get(relative, "source"),
+            }
+        return cls(root, files, verified=True)
+
+    @classmethod
+    def load(cls, root: Path) -> Optional["SourceIndex"]:
+        try:
+            data = json.loads((root / SOURCE_INDEX_PATH).read_text(encoding="utf-8"))
+        except (OSError, UnicodeError, json.JSONDecodeError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("source_index_version") != SOURCE_INDEX_VERSION
+            or not isinstance(data.get("files"), dict)
+            or data.get("files_digest") != cls._files_digest(data["files"])
+        ):
+            return None
+        files = {
+            key: entry
+            for key, entry in data["files"].items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get("sha256"), str)
+            and _HASH_PATTERN.fullmatch(entry["sha256"])
+            and type(entry.get("size")) is int
+        }
+        return cls(root, files)
+
+    def payload(self) -> Dict[str, Any]:
+        return {
+            "source_index_version": SOURCE_INDEX_VERSION,
+            "files_digest": self._files_digest(self.files),
+            "files": self.files,
+        }
+
+    def write(self) -> Path:
+        path = self.root / SOURCE_INDEX_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes((json.dumps(self.payload(), ensure_ascii=False, indent=2) + "\n").encode("utf-8"))
+        return path
+
+    def _proven_paths(self) -> Set[str]:
+        with self._lock:
+            if self._proven is None:
+                self._proven = paths_unchanged_since_index(self.root, self.files)
+            return self._proven
+
+    def fresh_files(self) -> Dict[str, dict]:
+        """Entries re-hashed where Git cannot prove them current; vanished files are dropped."""
+        proven = self._proven_paths()
+        files = {}
+        for key, entry in self.files.items():
+            path = self.root / key
+            if key in proven:
+                files[key] = entry
+            elif path.is_file():
+                files[key] = dict(
+                    entry, sha256=f"sha256:{calculate_file_hash(path)}", size=path.stat().st_size
+                )
+        return files
 
+    def file_hash(self, path: Path) -> Optional[str]:
+        """Return the indexed digest of path, or None when it must be hashed."""
+        try:
+            key = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+        entry = self.files.get(key)
+        if entry is None:
+            return None
+        proven = key in self._proven_paths()
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        with self._lock:
+            if not proven or size != entry["size"]:
+                self.stale += 1
+                return None
+            self.hits += 1
+        return entry["sha256"]
+
+
+def paths_unchanged_since_index(root: Path, paths: Iterable[str]) -> Set[str]:
+    """Return the paths Git proves unchanged since the commit that last wrote the source index.
+
+    Paths changed since that commit, committed or not, and untracked or
+    ignored paths are left out. The result is empty outside a Git
+    checkout, when the index itself has changed since its commit, and
+    when Git fails.
+    """
 
-def _validate_v3_lifecycle(value: Any, hashes: Dict[str, Any], outcome: str) -> Dict[str, Any]:
-    lifecycle = _exact_object(
-        value,
-        {"state", "previous_paths", "retirement", "reintroduces_component_id"},
-        "manifest-schema",
-        "Manifest lifecycle",
-    )
-    state = lifecycle["state"]
-    if state not in {"active", "retired", "tombstoned"}:
-        _validation_error("manifest-lifecycle", "Manifest lifecycle state is invalid.")
-    _validate_sorted_unique_strings(
-        lifecycle["previous_paths"], "manifest-path", "Manifest previous_paths", paths=True
-    )
-    reintroduces = _validate_optional_component_id(
-        lifecycle["reintroduces_component_id"],
-        "manifest-reintroduction",
-        "Manifest reintroduces_component_id",
-    )
-    if state == "active":
-        if lifecycle["retirement"] is not None:
-            _validation_error("manifest-lifecycle", "Active Manifest component cannot have retirement data.")
-    else:
-        if not isinstance(lifecycle["retirement"], dict):
-            _validation_error("manifest-lifecycle", "Terminal Manifest component needs retirement data.")
-        retirement = _validate_v3_retirement(lifecycle["retirement"])
-        if reintroduces is not None:
-            _validation_error("manifest-reintroduction", "Terminal Manifest component cannot reintroduce an ID.")
-        if hashes["proposed_source"] is not None:
-            _validation_error("manifest-lifecycle", "Terminal Manifest component cannot have proposed source bytes.")
-        if state == "retired":
-            if retirement["pruned_at"] is not None or outcome != "retired":
-                _validation_error("manifest-lifecycle", "Retired Manifest component has invalid terminal evidence.")
-        elif retirement["pruned_at"] is None or hashes["result_after"] is not None or outcome != "tombstoned":
-            _validation_error("manifest-lifecycle", "Tombstoned Manifest component has invalid terminal evidence.")
-    return lifecycle
-
-
-def _validate_v3_component(value: Any, index: int) -> Dict[str, Any]:
-    component = _exact_object(
-        value,
-        {"identity", "provenance", "hashes", "lifecycle", "last_operation", "installed_at", "updated_at"},
-        "manifest-schema",
-        f"Manifest component {index}",
-    )
-    identity = _exact_object(
-        component["identity"],
-        {"id", "path", "path_key", "kind", "role", "link"},
-        "manifest-schema",
-        "Manifest identity",
-    )
-    _validate_component_id(identity["id"], "manifest-schema", "Manifest component ID")
-    path = _validate_relative_path(identity["path"], "manifest-path", "Manifest identity.path")
-    if identity["path_key"] != path.lower():
-        _validation_error("manifest-path", "Manifest identity.path_key does not match identity.path.")
-    if identity["kind"] not in {"file", "directory", "mount", "link"}:
-        _validation_error("manifest-schema", "Manifest identity kind is invalid.")
-    if identity["role"] not in _ROLE_OWNERSHIP:
-        _validation_error("manifest-schema", "Manifest identity role is invalid.")
-    if identity["kind"] in {"mount", "link"} and identity["role"] != "generated":
-        _validation_error(
-            "manifest-role-kind",
-            "Manifest mount/link identities must be generated and parent-bound.",
-        )
-    _validate_v3_link(identity["link"], identity["kind"])
-    provenance = _validate_v3_provenance(component["provenance"], identity["role"], identity["kind"])
-    hashes = _validate_v3_hashes(component["hashes"], provenance["fork"], identity["kind"])
-    operation = _exact_object(
-        component["last_operation"],
-        {"transaction_id", "outcome"},
-        "manifest-schema",
-        "Manifest last_operation",
-    )
-    if not isinstance(operation["transaction_id"], str) or not _TRANSACTION_ID_PATTERN.fullmatch(operation["transaction_id"]):
-        _validation_error("manifest-schema", "Manifest component transaction ID is invalid.")
-    if operation["outcome"] not in {
-        "installed", "updated", "preserved-existing", "preserved-customization",
-        "conflicted", "reported", "retired", "tombstoned",
-    }:
-        _validation_error("manifest-schema", "Manifest component outcome is invalid.")
-    lifecycle = _validate_v3_lifecycle(component["lifecycle"], hashes, operation["outcome"])
-    outcome = operation["outcome"]
-    fork_status = provenance["fork"]["status"]
-    if outcome in {"installed", "updated"}:
-        if hashes["proposed_source"] is None or hashes["result_after"] != hashes["proposed_source"]:
-            _validation_error("manifest-hash", "Installed/updated result must equal proposed source bytes.")
-    elif outcome == "preserved-customization":
-        if fork_status not in {"customized", "derived-customized"} or hashes["result_after"] != hashes["observed_before"]:
-            _validation_error("manifest-fork", "Preserved customization evidence is inconsistent.")
-    elif outcome == "preserved-existing":
-        if hashes["result_after"] != hashes["observed_before"]:
-            _validation_error("manifest-hash", "Preserved existing result must equal observed bytes.")
-    elif outcome == "conflicted" and fork_status != "conflicted":
-        _validation_error("manifest-fork", "Conflicted outcome requires conflicted fork evidence.")
-    elif outcome == "retired" and hashes["result_after"] != hashes["observed_before"]:
-        _validation_error("manifest-hash", "Retired result must preserve observed bytes.")
-    installed = None
-    if component["installed_at"] is not None:
-        installed = _timestamp_key(component["installed_at"], "manifest-timestamp", "Component installed_at")
-    updated = _timestamp_key(component["updated_at"], "manifest-timestamp", "Component updated_at")
-    if installed is not None and installed > updated:
-        _validation_error("manifest-timestamp", "Component updated_at precedes installed_at.")
-    if _timestamp_key(provenance["fork"]["classified_at"], "manifest-timestamp", "Fork classified_at") > updated:
-        _validation_error("manifest-timestamp", "Fork classification postdates component update.")
-    if lifecycle["retirement"] is not None:
-        retirement = lifecycle["retirement"]
-        if _timestamp_key(retirement["detected_at"], "manifest-timestamp", "Retirement detected_at") > updated:
-            _validation_error("manifest-timestamp", "Retirement detection postdates component update.")
-        if retirement["pruned_at"] is not None and _timestamp_key(
-            retirement["pruned_at"], "manifest-timestamp", "Retirement pruned_at"
-        ) > updated:
-            _validation_error("manifest-timestamp", "Prune timestamp postdates component update.")
-    return component
-
-
-def _load_and_validate_production_schema(source_root: Path) -> Dict[str, Any]:
-    schema_path = source_root / PRODUCTION_MANIFEST_SCHEMA
+    def git(*args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(["git", *args], cwd=root, capture_output=True, check=False)
+        except OSError:
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.decode("utf-8", "surrogateescape")
+
+    index_path = SOURCE_INDEX_PATH.as_posix()
+    commit = (git("log", "-1", "--format=%H", "--", index_path) or "").strip()
+    if not commit:
+        return set()
+    changed = git("diff", "--name-only", "-z", "--relative", commit, "--")
+    untracked = git("ls-files", "-z", "--others")
+    if changed is None or untracked is None:
+        return set()
+    moved = set(changed.split("\0")) | set(untracked.split("\0"))
+    if index_path in moved:
+        return set()
+    return {path for path in paths if path not in moved}
+
+
+def template_source_ref(source_root: Path) -> Optional[str]:
+    """Return the template HEAD recorded as an install's source_ref.
+
+    A checkout with uncommitted or untracked changes gets a "-dirty" suffix,
+    as with git describe --dirty, because its files are not what the commit
+    holds; SourceDelta never trusts such a ref.
+    """
     try:
-        schema_bytes = schema_path.read_bytes()
+        head = subprocess.run(
+            ["git", "-C", str(source_root), "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if head.returncode != 0 or not head.stdout.strip():
+            return None
+        status = subprocess.run(
+            ["git", "-C", str(source_root), "status", "--porcelain"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
     except OSError:
-        _validation_error("schema-missing", f"Production Schema is unavailable: {schema_path}")
-    try:
-        schema = json.loads(schema_bytes.decode("utf-8"))
-    except (UnicodeDecodeError, json.JSONDecodeError):
-        _validation_error("schema-json", "Production Schema is not valid UTF-8 JSON.")
-
-    def contains_proposal_marker(value: Any) -> bool:
-        if isinstance(value, dict):
-            return "proposal_status" in value or any(
-                contains_proposal_marker(item) for item in value.values()
+        return None
+    if status.returncode != 0 or status.stdout.strip():
+        return f"{head.stdout.strip()}-dirty"
+    return head.stdout.strip()
+
+
+class SourceDelta:
+    """Template paths that changed since the source_ref of the last install.
+
+    Loaded from `git diff <source_ref>` against the template's working tree
+    plus every untracked or ignored file, so it covers commits, uncommitted
+    edits and stray files alike. SyncPlan.prepare trusts a template file
+    outside this set when its target still holds exactly what the last
+    install wrote there, instead of hashing the source again. There is no
+    delta, and every path is compared in full, when the ref is unknown or
+    dirty, git cannot resolve it, or the installer modules themselves changed.
+    load_install_manifest only reports a source_ref from manifests stamped
+    with SOURCE_REF_VERSION, whose writer marked dirty checkouts.
+    """
+
+    def __init__(self, root: Path, source_ref: str, changed: Iterable[str]) -> None:
+        self.root = root
+        self.source_ref = source_ref
+        self.changed = frozenset(changed)
+        # Collapsed entries such as a nested repository ("vendor/") cover a whole tree.
+        self._changed_directories = tuple(path for path in self.changed if path.endswith("/"))
+
+    @classmethod
+    def load(cls, root: Path, source_ref: Optional[str]) -> Optional["SourceDelta"]:
+        if not source_ref or not _SOURCE_REF_PATTERN.fullmatch(source_ref):
+            return None
+        git = ["git", "-C", str(root)]
+        try:
+            diff = subprocess.run(
+                git + ["diff", "--name-only", "--relative", "--no-renames", "-z", source_ref, "--"],
+                capture_output=True,
+                check=False,
             )
-        if isinstance(value, list):
-            return any(contains_proposal_marker(item) for item in value)
-        return value == "proposal_status"
-
-    if contains_proposal_marker(schema):
-        _validation_error(
-            "schema-proposal-marker",
-            "Production Schema must not contain proposal_status markers.",
-        )
-    schema = _exact_object(
-        schema,
-        {
-            "$schema", "$id", "title", "description", "type",
-            "additionalProperties", "required", "properties", "$defs",
-        },
-        "schema-structure",
-        "Production Schema",
-    )
-    if (
-        schema["$schema"] != "https://json-schema.org/draft/2020-12/schema"
-        or schema["$id"] != "urn:ai-dev-workflow:manifest-schema:v3"
-    ):
-        _validation_error("schema-identity", "Production Schema identity is invalid.")
-    required = [
-        "schema_version", "written_at", "source_release", "last_transaction", "components"
-    ]
-    if (
-        schema["type"] != "object"
-        or schema["additionalProperties"] is not False
-        or schema["required"] != required
-        or not isinstance(schema["properties"], dict)
-        or set(schema["properties"]) != set(required)
-        or not isinstance(schema["$defs"], dict)
-    ):
-        _validation_error("schema-structure", "Production Schema root structure is invalid.")
-    properties = schema["properties"]
-    if (
-        not isinstance(properties["schema_version"], dict)
-        or type(properties["schema_version"].get("const")) is not int
-        or properties["schema_version"].get("const") != 3
-        or not isinstance(properties["components"], dict)
-        or type(properties["components"].get("maxItems")) is not int
-        or properties["components"].get("maxItems") != 10000
-    ):
-        _validation_error("schema-structure", "Production Schema constraints are invalid.")
-    required_defs = {
-        "timestamp", "hash", "componentId", "relativePath", "pathKey", "sourceRelease",
-        "componentCatalogBinding", "transaction", "identity", "link", "source", "fork",
-        "provenance", "hashes", "retirement", "lifecycle", "operation", "component",
-    }
-    if set(schema["$defs"]) != required_defs or any(
-        not isinstance(definition, dict) for definition in schema["$defs"].values()
-    ):
-        _validation_error("schema-structure", "Production Schema definitions are invalid.")
-    return schema
-
-
-def _validate_manifest_v3(
-    data: Dict[str, Any], source_root: Optional[Path]
-) -> Tuple[Dict[str, dict], bool, Optional[str]]:
-    manifest = _exact_object(
-        data,
-        {"schema_version", "written_at", "source_release", "last_transaction", "components"},
-        "manifest-schema",
-        "Manifest",
-    )
-    if manifest["schema_version"] != 3:
-        _validation_error("manifest-schema", "Manifest schema version is not 3.")
-    written_at = _timestamp_key(manifest["written_at"], "manifest-timestamp", "Manifest written_at")
-    source_release = _validate_v3_source_release(manifest["source_release"])
-    transaction = _validate_v3_transaction(manifest["last_transaction"])
-    if _timestamp_key(transaction["completed_at"], "manifest-timestamp", "Transaction completed_at") > written_at:
-        _validation_error("manifest-timestamp", "Manifest was written before its transaction completed.")
-    if not isinstance(manifest["components"], list) or len(manifest["components"]) > 10000:
-        _validation_error("manifest-schema", "Manifest components must be an array.")
-
-    records: Dict[str, Dict[str, Any]] = {}
-    ordered_ids: List[str] = []
-    for index, raw_component in enumerate(manifest["components"]):
-        component = _validate_v3_component(raw_component, index)
-        component_id = component["identity"]["id"]
-        if component_id in records:
-            _validation_error("manifest-schema", f"Manifest contains duplicate component ID: {component_id}")
-        if _timestamp_key(component["updated_at"], "manifest-timestamp", "Component updated_at") > written_at:
-            _validation_error("manifest-timestamp", "Component update postdates Manifest write.")
-        ordered_ids.append(component_id)
-        records[component_id] = component
-    if ordered_ids != sorted(ordered_ids):
-        _validation_error("manifest-schema", "Manifest components must be sorted by component ID.")
-
-    active_paths: Dict[str, str] = {}
-    terminal_paths: Dict[str, List[str]] = {}
-    for component_id, component in records.items():
-        identity = component["identity"]
-        lifecycle = component["lifecycle"]
-        path_key = identity["path_key"]
-        references = list(component["provenance"]["generated_from"])
-        if lifecycle["reintroduces_component_id"] is not None:
-            references.append(lifecycle["reintroduces_component_id"])
-        if lifecycle["retirement"] is not None and lifecycle["retirement"]["successor_component_id"] is not None:
-            references.append(lifecycle["retirement"]["successor_component_id"])
-        for reference in references:
-            if reference == component_id:
-                category = "manifest-reintroduction" if lifecycle["reintroduces_component_id"] == reference else "manifest-provenance"
-                _validation_error(category, f"Manifest component self-references: {component_id}")
-            if reference not in records:
-                category = "manifest-reintroduction" if lifecycle["reintroduces_component_id"] == reference else "manifest-provenance"
-                _validation_error(category, f"Manifest reference does not resolve: {reference}")
-        reintroduced = lifecycle["reintroduces_component_id"]
-        if reintroduced is not None and records[reintroduced]["lifecycle"]["state"] != "tombstoned":
-            _validation_error("manifest-reintroduction", "Manifest reintroduction must target a tombstone.")
-        if lifecycle["state"] == "active":
-            if path_key in active_paths:
-                _validation_error("manifest-path-collision", f"Duplicate active Manifest path: {identity['path']}")
-            active_paths[path_key] = component_id
-        else:
-            terminal_paths.setdefault(path_key, []).append(component_id)
-    for path_key, active_id in active_paths.items():
-        for terminal_id in terminal_paths.get(path_key, []):
-            active = records[active_id]
-            terminal = records[terminal_id]
-            if (
-                terminal["lifecycle"]["state"] != "tombstoned"
-                or active["lifecycle"]["reintroduces_component_id"] != terminal_id
-                or terminal["hashes"]["result_after"] is not None
-            ):
-                _validation_error("manifest-path-collision", "Manifest path collision lacks valid reintroduction evidence.")
-    provenance_only: Dict[str, Dict[str, Any]] = {}
-    for component_id, component in records.items():
-        projected = dict(component)
-        projected_lifecycle = dict(component["lifecycle"])
-        projected_lifecycle["reintroduces_component_id"] = None
-        if projected_lifecycle["retirement"] is not None:
-            projected_retirement = dict(projected_lifecycle["retirement"])
-            projected_retirement["successor_component_id"] = None
-            projected_lifecycle["retirement"] = projected_retirement
-        projected["lifecycle"] = projected_lifecycle
-        provenance_only[component_id] = projected
-    _reject_relationship_cycles(provenance_only, "manifest-provenance", catalog=False)
-    _reject_relationship_cycles(records, "manifest-reintroduction", catalog=False)
-
-    catalog_validated = False
-    detail: Optional[str] = None
-    if source_root is None:
-        inferred = Path(__file__).resolve().parent.parent
-        if (
-            (inferred / COMPONENT_CATALOG_PATH).is_file()
-            and (inferred / PRODUCTION_MANIFEST_SCHEMA).is_file()
+            if diff.returncode != 0:
+                return None
+            others = subprocess.run(git + ["ls-files", "--others", "-z"], capture_output=True, check=False)
+        except OSError:
+            return None
+        if others.returncode != 0:
+            return None
+        output = (diff.stdout + others.stdout).decode("utf-8", "surrogateescape")
+        changed = [path for path in output.split("\0") if path]
+        if any(
+            path.startswith("scripts/") and path.endswith(".py") and "/" not in path[len("scripts/"):]
+            for path in changed
         ):
-            source_root = inferred
-        else:
-            detail = "Production Schema and Component Catalog validation are unavailable."
-    if source_root is not None:
-        _load_and_validate_production_schema(source_root)
-        catalog, catalog_records, catalog_bytes = _load_and_validate_component_catalog(source_root)
-        binding = source_release["component_catalog"]
-        observed_digest = hash_bytes(catalog_bytes)
-        if binding["sha256"] != observed_digest:
-            _validation_error("catalog-digest", "Manifest Component Catalog digest does not match exact Catalog bytes.")
-        if any(source_release[key] != catalog["source_release"][key] for key in ("release_id", "source_ref", "version")):
-            _validation_error("catalog-release", "Manifest source release does not match Component Catalog.")
-        for component_id, component in records.items():
-            catalog_component = catalog_records.get(component_id)
-            if catalog_component is None:
-                _validation_error("catalog-agreement", f"Manifest component is absent from Catalog: {component_id}")
-            identity = component["identity"]
-            lifecycle = component["lifecycle"]
-            if (
-                identity["path"] != catalog_component["canonical_source_path"]
-                or identity["role"] != catalog_component["role"]
-                or identity["kind"] != catalog_component["kind"]
-                or lifecycle["state"] != catalog_component["lifecycle_status"]
-                or lifecycle["previous_paths"] != catalog_component["previous_paths"]
-                or component["provenance"]["generated_from"] != catalog_component["generated_from"]
-                or lifecycle["reintroduces_component_id"] != catalog_component["reintroduces_component_id"]
-                or (
-                    lifecycle["retirement"] is not None
-                    and lifecycle["retirement"]["successor_component_id"] != catalog_component["successor_component_id"]
-                )
-                or (lifecycle["retirement"] is None and catalog_component["successor_component_id"] is not None)
-            ):
-                _validation_error("catalog-agreement", f"Manifest component disagrees with Catalog: {component_id}")
-            if component["provenance"]["source"]["release"] not in {None, source_release["release_id"]}:
-                _validation_error("catalog-agreement", f"Manifest component release disagrees with source release: {component_id}")
-        catalog_validated = True
-    return records, catalog_validated, detail
+            return None
+        return cls(root, source_ref, changed)
+
+    def unchanged(self, path: Path) -> bool:
+        """Return True when path is a template file git reports as untouched since source_ref."""
+        try:
+            key = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return False
+        return key not in self.changed and not key.startswith(self._changed_directories)
 
 
 def load_install_manifest(
-    target_root: Path, source_root: Optional[Path] = None
+    target_root: Path,
+    source_root: Optional[Path] = None,
+    record_validation: bool = True,
+    source_evidence: Optional["SourceEvidence"] = None,
 ) -> ManifestLoadResult:
+    """Read and classify target_root's install manifest.
+
+    A v3 Manifest's verdict comes from the manifest_v3 ValidationCache when
+    its bytes, the Schema and the Catalog are unchanged; record_validation
+    stores new verdicts there (report-only runs pass False to stay no-write).
+    A caller that already holds the source's SourceEvidence passes it so the
+    Schema and Catalog are not read and validated again.
+    """
     manifest_path = target_root / MANIFEST_FILENAME
     if not manifest_path.exists():
         return ManifestLoadResult(
@@ -1114,7 +1232,8 @@ def load_install_manifest(
         )
 
     try:
-        data = json.loads(manifest_path.read_text(encoding="utf-8"))
+        manifest_bytes = manifest_path.read_bytes()
+        data = json.loads(manifest_bytes.decode("utf-8"))
     except OSError:
         return ManifestLoadResult(
             "corrupt",
@@ -1162,7 +1281,23 @@ def load_install_manifest(
 
     if schema_version == 3:
         try:
-            entries, catalog_validated, detail = _validate_manifest_v3(data, source_root)
+            from scripts.manifest_v3 import validate_manifest_v3_cached
+        except ImportError:
+            # A standalone copy of this script ships without the validators,
+            # and equally without the Catalog and Schema they check against.
+            return ManifestLoadResult(
+                "v3-validation-blocked",
+                {},
+                schema_version,
+                "Manifest v3 validators, Production Schema and Component Catalog are unavailable.",
+                manifest_path,
+                "catalog-unavailable",
+                False,
+            )
+        try:
+            entries, catalog_validated, detail = validate_manifest_v3_cached(
+                data, manifest_bytes, source_root, record_validation, source_evidence
+            )
         except ManifestValidationError as error:
             return ManifestLoadResult(
                 "corrupt",
@@ -1236,6 +1371,11 @@ def load_install_manifest(
         None,
         manifest_path,
         f"manifest-valid-v{schema_version}",
+        source_ref=(
+            data.get("source_ref")
+            if isinstance(data.get("source_ref"), str) and data.get("source_ref_version") == SOURCE_REF_VERSION
+            else None
+        ),
     )
 
 
@@ -1275,15 +1415,16 @@ def write_install_manifest(
     target_root: Path,
     source_root: Path,
     manifest_entries: Dict[str, dict],
+    source_ref: Optional[str] = None,
 ) -> None:
-    source_ref = run_command(
-        ["git", "-C", str(source_root), "rev-parse", "--short", "HEAD"]
-    )
+    if source_ref is None:
+        source_ref = template_source_ref(source_root)
     ordered_components = [manifest_entries[name] for name in sorted(manifest_entries)]
     manifest = {
         "schema_version": 2,
         "installed_at": datetime.now().astimezone().isoformat(),
         "source_ref": source_ref or "unknown",
+        "source_ref_version": SOURCE_REF_VERSION,
         "components": ordered_components,
     }
     (target_root / MANIFEST_FILENAME).write_text(
@@ -1302,6 +1443,7 @@ def update_manifest_entry(
     managed_hash: Optional[str],
     observed_hash: Optional[str],
     status: str,
+    mirror: Optional[str] = None,
 ) -> None:
     name = normalize_relative_path(relative_path)
     previous = dict(manifest_entries.get(name, {}))
@@ -1318,44 +1460,382 @@ def update_manifest_entry(
         "source": source_label,
         "status": status,
     }
+    if mirror is not None:
+        manifest_entries[name]["mirror"] = mirror
 
 
-def sync_managed_bytes(
-    target_file: Path,
-    relative_path: Path,
-    desired_bytes: bytes,
-    result: SyncResult,
-    manifest_entries: Dict[str, dict],
-    *,
-    ownership: str,
-    source_label: str,
-    force: bool = False,
-    always_overwrite: bool = False,
-    preserve_untracked: bool = True,
-) -> None:
-    previous = manifest_entries.get(normalize_relative_path(relative_path), {})
-    previous_managed_hash = previous.get("managed_hash") or previous.get("source_hash")
-    current_hash = get_path_hash(target_file) if target_file.exists() else None
-    desired_hash = hash_bytes(desired_bytes)
+class EventLog:
+    """JSON-lines stream of per-path sync decisions for --events.
 
-    if not target_file.exists():
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-        target_file.write_bytes(desired_bytes)
-        record_managed_path(result, relative_path, "added")
-        update_manifest_entry(
-            manifest_entries,
-            relative_path,
-            ownership=ownership,
-            source_label=source_label,
+    Every plan action becomes one object with its path, action, reason,
+    ownership, bytes written, the target's hash-cache outcome and the
+    milliseconds since the log was opened. Lines go through one buffered
+    stream that is flushed at most every EVENT_FLUSH_INTERVAL_S, so a large
+    install does not pay a flush per line while `tail -f` still sees progress.
+    """
+
+    def __init__(self, stream: TextIO, context: Optional[Dict[str, Any]] = None) -> None:
+        self.stream = stream
+        self.context = context or {}
+        # Final entries of the run, used to report each path's ownership.
+        self.manifest_entries: Dict[str, dict] = {}
+        self.started = time.perf_counter()
+        self._last_flush = self.started
+
+    @classmethod
+    def open(cls, destination: str) -> "EventLog":
+        """Open a file, or standard output for "-", for buffered writing."""
+        if destination == "-":
+            sys.stdout.flush()
+            stream = open(
+                sys.stdout.fileno(), "w", encoding="utf-8", buffering=EVENT_BUFFER_SIZE, closefd=False
+            )
+        else:
+            stream = open(destination, "w", encoding="utf-8", buffering=EVENT_BUFFER_SIZE)
+        return cls(stream)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        now = time.perf_counter()
+        record = {"event": event, **self.context, **fields, "elapsed_ms": round((now - self.started) * 1000, 3)}
+        self.write_lines(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def write_lines(self, text: str) -> None:
+        """Write already-serialised event lines, e.g. those a fleet worker returned."""
+        self.stream.write(text)
+        now = time.perf_counter()
+        if now - self._last_flush >= EVENT_FLUSH_INTERVAL_S:
+            self.stream.flush()
+            self._last_flush = now
+
+    def action(self, action: SyncAction, hash_cache: Optional[HashCache] = None, applied: bool = True) -> None:
+        path = action.path.as_posix()
+        if action.target is None or action.link_target is not None or action.mirror in {"hardlink", "symlink"}:
+            written = 0
+        elif action.content is not None:
+            written = len(action.content)
+        else:
+            try:
+                written = action.source_file.stat().st_size
+            except OSError:
+                written = None
+        self.emit(
+            "path",
+            path=path,
+            action=action.status,
+            reason=action.reason or None,
+            suffix=action.suffix or None,
+            ownership=self.manifest_entries.get(path, {}).get("ownership"),
+            bytes=written,
+            hash_cache=hash_cache.outcomes.get(path) if hash_cache is not None else None,
+            applied=applied,
+        )
+
+    def summary(self, result: SyncResult, hash_cache: Optional[HashCache] = None, **fields: Any) -> None:
+        self.emit(
+            "summary",
+            added=len(result.files_added),
+            updated=len(result.files_updated),
+            skipped=len(result.files_skipped),
+            conflicted=len(result.files_conflicted),
+            hash_cache_hits=hash_cache.hits if hash_cache is not None else None,
+            hash_cache_misses=hash_cache.misses if hash_cache is not None else None,
+            **fields,
+        )
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class SyncPlan:
+    """Ordered, write-free record of every decision an install would make.
+
+    Planning functions append SyncActions and update the in-memory manifest
+    entries only. Later planning stages observe earlier planned writes
+    through the plan (exists, observe, read_bytes, list_files), so a whole
+    install is decided before apply_sync_plan touches the filesystem.
+    """
+
+    def __init__(
+        self,
+        hash_cache: Optional[HashCache] = None,
+        jobs: int = 1,
+        source_index: Optional[SourceIndex] = None,
+        render_cache: Optional[AgentRenderCache] = None,
+    ) -> None:
+        self.hash_cache = hash_cache
+        self.jobs = jobs
+        self.source_index = source_index
+        self.render_cache = render_cache
+        self.source_delta: Optional[SourceDelta] = None
+        self.delta_hits = 0
+        self.events: Optional[EventLog] = None
+        self.actions: List[SyncAction] = []
+        self.directories: List[Path] = []
+        self._planned: Dict[str, SyncAction] = {}
+        self._installed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, action: SyncAction) -> SyncAction:
+        self.actions.append(action)
+        if action.target is not None and action.link_target is None:
+            self._planned[os.fspath(action.target)] = action
+        return action
+
+    def record(self, path: Path, status: str, suffix: str = "", reason: str = "") -> SyncAction:
+        return self.add(SyncAction(path, status, suffix, reason=reason))
+
+    def discard(self, path: Path, status: str) -> None:
+        """Drop report-only actions recorded for path without a suffix."""
+        self.actions = [
+            action
+            for action in self.actions
+            if action.target is not None
+            or action.suffix
+            or action.status != status
+            or action.path != path
+        ]
+
+    def ensure_directory(self, directory: Path) -> None:
+        self.directories.append(directory)
+
+    def use_source_delta(
+        self, delta: SourceDelta, target_root: Path, manifest_entries: Dict[str, dict]
+    ) -> None:
+        """Trust template files outside delta whose targets match the last install.
+
+        Only manifest entries the last run left in sync (managed_hash equal to
+        observed_hash) qualify; call this before planning mutates the entries.
+        """
+        self.source_delta = delta
+        self._installed = {
+            os.fspath(target_root / name): entry["managed_hash"]
+            for name, entry in manifest_entries.items()
+            if entry.get("kind") == "file"
+            and entry.get("status") in {"managed", "in-sync"}
+            and entry.get("managed_hash")
+            and entry.get("managed_hash") == entry.get("observed_hash")
+        }
+
+    def planned(self, path: Path) -> Optional[SyncAction]:
+        return self._planned.get(os.fspath(path))
+
+    def exists(self, path: Path) -> bool:
+        if os.fspath(path) in self._planned or path.exists():
+            return True
+        prefix = os.fspath(path) + os.sep
+        return any(key.startswith(prefix) for key in self._planned)
+
+    def observe(self, target_file: Path) -> Tuple[bool, Optional[str]]:
+        """Return (exists, sha256) for target_file as it will be after earlier actions."""
+        action = self.planned(target_file)
+        if action is not None:
+            if action.digest is None:
+                action.digest = (
+                    hash_bytes(action.content)
+                    if action.content is not None
+                    else self.observe(action.source_file)[1]
+                )
+            return True, action.digest
+        if self.source_index is not None:
+            digest = self.source_index.file_hash(target_file)
+            if digest is not None:
+                return True, digest
+        if not target_file.exists():
+            return False, None
+        return True, get_path_hash(target_file, self.hash_cache)
+
+    def same_content(self, first: Path, second: Path) -> bool:
+        """Compare two files as they will be after earlier actions.
+
+        Files on disk go through compare_files, so nothing is hashed; a side
+        that is still only planned is compared by digest.
+        """
+        if self.planned(first) is None and self.planned(second) is None:
+            return compare_files(first, second)
+        return self.observe(first)[1] == self.observe(second)[1]
+
+    def read_bytes(self, path: Path) -> bytes:
+        action = self.planned(path)
+        if action is None:
+            return path.read_bytes()
+        if action.content is not None:
+            return action.content
+        return self.read_bytes(action.source_file)
+
+    def read_text(self, path: Path) -> str:
+        raw = self.read_bytes(path).decode("utf-8")
+        return raw.replace("\r\n", "\n").replace("\r", "\n")
+
+    def list_files(
+        self,
+        directory: Path,
+        excludes: Union[ExcludeMatcher, Sequence[str]] = (),
+    ) -> List[TreeEntry]:
+        """Return the files under directory after earlier actions.
+
+        Excluded directories on disk come back as single pruned entries.
+        """
+        matcher = ExcludeMatcher.compile(excludes)
+        entries = [entry for entry in walk_tree(directory, matcher) if not entry.is_dir or entry.excluded]
+        present = {os.fspath(entry.path) for entry in entries}
+        pruned = tuple(f"{entry.relative}/" for entry in entries if entry.is_dir)
+        prefix = os.fspath(directory) + os.sep
+        planned = sorted(
+            Path(key).relative_to(directory).as_posix()
+            for key in self._planned
+            if key.startswith(prefix) and key not in present
+        )
+        entries.extend(
+            TreeEntry(
+                relative,
+                directory / relative,
+                False,
+                False,
+                bool(matcher) and matcher.matches(relative),
+            )
+            for relative in planned
+            if not relative.startswith(pruned)
+        )
+        return entries
+
+    def prepare(self, desired: Union[bytes, Path], target_file: Path) -> SyncCandidate:
+        """Hash the desired content and observe the target without writing.
+
+        A desired file is hashed in place rather than read into memory; apply
+        copies it through the kernel transfer layer.
+        """
+        target_exists, current_hash = self.observe(target_file)
+        if isinstance(desired, Path):
+            if (
+                self.source_delta is not None
+                and current_hash is not None
+                and self._installed.get(os.fspath(target_file)) == current_hash
+                and self.source_delta.unchanged(desired)
+            ):
+                # Unchanged since the last install on both sides: skip the source.
+                with self._lock:
+                    self.delta_hits += 1
+                return SyncCandidate(None, current_hash, target_exists, current_hash)
+            desired_exists, desired_hash = self.observe(desired)
+            if not desired_exists or desired_hash is None:
+                raise FileNotFoundError(f"Source path not found: {desired}")
+            desired_bytes = None
+        else:
+            desired_bytes = desired
+            desired_hash = hash_bytes(desired)
+        return SyncCandidate(desired_bytes, desired_hash, target_exists, current_hash)
+
+    @property
+    def has_changes(self) -> bool:
+        return any(action.status in {"added", "updated"} for action in self.actions)
+
+    def result(self) -> SyncResult:
+        return SyncResult.from_records(
+            SyncRecord(action.path.as_posix(), action.status, action.suffix, action.reason)
+            for action in self.actions
+        )
+
+
+def apply_sync_plan(plan: SyncPlan) -> SyncResult:
+    """Execute a SyncPlan and return its SyncResult.
+
+    Every directory the plan needs is created in one batch up front; writes
+    then run in plan order so derived outputs read already-applied sources.
+    Bytes copied from a source file are checked against the planned digest;
+    mirror links need no check because they always show the source's bytes.
+    """
+    directories = set(plan.directories)
+    directories.update(action.target.parent for action in plan.actions if action.target is not None)
+    for directory in sorted(directories, key=lambda item: (len(item.parts), os.fspath(item))):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    for action in plan.actions:
+        if action.target is not None:
+            _apply_sync_action(plan, action)
+        if plan.events is not None:
+            plan.events.action(action, plan.hash_cache)
+    return plan.result()
+
+
+def _apply_sync_action(plan: SyncPlan, action: SyncAction) -> None:
+    if action.link_target is not None:
+        action.suffix = _create_skill_link(
+            action.target, action.link_target, replace=action.status == "updated"
+        )
+        return
+    if action.mirror is not None:
+        action.mirror = _create_mirror_file(action.source_file, action.target, action.mirror)
+        action.suffix = f"[{action.mirror}]"
+    elif action.content is not None:
+        action.target.write_bytes(action.content)
+    else:
+        # Copying onto a mirror link would truncate the source itself.
+        if mirror_link_mode(action.source_file, action.target) is not None:
+            action.target.unlink()
+        if action.digest is not None and get_path_hash(action.source_file) != action.digest:
+            raise RuntimeError(
+                f"Source changed after planning (or {SOURCE_INDEX_PATH.as_posix()} is stale): "
+                f"{action.source_file}"
+            )
+        if action.preserve_metadata:
+            copy_file_with_metadata(action.source_file, action.target)
+        else:
+            copy_file_contents(action.source_file, action.target)
+    if plan.hash_cache is not None and action.digest is not None:
+        plan.hash_cache.record(action.target, action.digest)
+
+
+def plan_managed_bytes(
+    plan: SyncPlan,
+    target_file: Path,
+    relative_path: Path,
+    desired: Union[bytes, Path],
+    manifest_entries: Dict[str, dict],
+    *,
+    ownership: str,
+    source_label: str,
+    force: bool = False,
+    always_overwrite: bool = False,
+    preserve_untracked: bool = True,
+    candidate: Optional[SyncCandidate] = None,
+) -> SyncAction:
+    """Decide one managed file; desired is the exact bytes or the file holding them."""
+    previous = manifest_entries.get(normalize_relative_path(relative_path), {})
+    previous_managed_hash = previous.get("managed_hash") or previous.get("source_hash")
+    if candidate is None:
+        candidate = plan.prepare(desired, target_file)
+    current_hash = candidate.current_hash
+    desired_hash = candidate.desired_hash
+
+    def write(status: str, reason: str) -> SyncAction:
+        return plan.add(
+            SyncAction(
+                relative_path,
+                status,
+                target=target_file,
+                content=None if isinstance(desired, Path) else desired,
+                source_file=desired if isinstance(desired, Path) else None,
+                digest=desired_hash,
+                reason=reason,
+            )
+        )
+
+    if not candidate.target_exists:
+        action = write("added", "target-missing")
+        update_manifest_entry(
+            manifest_entries,
+            relative_path,
+            ownership=ownership,
+            source_label=source_label,
             kind="file",
             managed_hash=desired_hash,
             observed_hash=desired_hash,
             status="managed",
         )
-        return
+        return action
 
     if current_hash == desired_hash:
-        record_managed_path(result, relative_path, "skipped")
+        action = plan.record(relative_path, "skipped", reason="in-sync")
         update_manifest_entry(
             manifest_entries,
             relative_path,
@@ -1366,14 +1846,15 @@ def sync_managed_bytes(
             observed_hash=desired_hash,
             status="in-sync",
         )
-        return
+        return action
 
     if always_overwrite or force or (
         previous_managed_hash is not None and current_hash == previous_managed_hash
     ):
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-        target_file.write_bytes(desired_bytes)
-        record_managed_path(result, relative_path, "updated")
+        action = write(
+            "updated",
+            "always-overwrite" if always_overwrite else "forced" if force else "unmodified-since-install",
+        )
         update_manifest_entry(
             manifest_entries,
             relative_path,
@@ -1384,14 +1865,14 @@ def sync_managed_bytes(
             observed_hash=desired_hash,
             status="managed",
         )
-        return
+        return action
 
     if preserve_untracked:
         suffix = "[preserved customization]" if previous_managed_hash else "[preserved existing]"
         manifest_status = (
             "preserved-customization" if previous_managed_hash else "preserved-existing"
         )
-        record_managed_path(result, relative_path, "skipped", suffix)
+        action = plan.record(relative_path, "skipped", suffix, reason=manifest_status)
         update_manifest_entry(
             manifest_entries,
             relative_path,
@@ -1402,9 +1883,9 @@ def sync_managed_bytes(
             observed_hash=current_hash,
             status=manifest_status,
         )
-        return
+        return action
 
-    record_managed_path(result, relative_path, "conflicted")
+    action = plan.record(relative_path, "conflicted", reason="target-differs")
     update_manifest_entry(
         manifest_entries,
         relative_path,
@@ -1415,25 +1896,88 @@ def sync_managed_bytes(
         observed_hash=current_hash,
         status="conflicted",
     )
+    return action
 
 
-def install_adopter_constitution(
+def sync_managed_bytes(
+    target_file: Path,
+    relative_path: Path,
+    desired: Union[bytes, Path],
+    result: SyncResult,
+    manifest_entries: Dict[str, dict],
+    *,
+    ownership: str,
+    source_label: str,
+    force: bool = False,
+    always_overwrite: bool = False,
+    preserve_untracked: bool = True,
+    hash_cache: Optional[HashCache] = None,
+    candidate: Optional[SyncCandidate] = None,
+) -> None:
+    """Sync one managed file; desired is the exact bytes or the file holding them.
+
+    A file is hashed in chunks and only copied, streaming, when it must be
+    written, so large assets are never held in memory.
+    """
+    plan = SyncPlan(hash_cache)
+    action = plan_managed_bytes(
+        plan,
+        target_file,
+        relative_path,
+        desired,
+        manifest_entries,
+        ownership=ownership,
+        source_label=source_label,
+        force=force,
+        always_overwrite=always_overwrite,
+        preserve_untracked=preserve_untracked,
+        candidate=candidate,
+    )
+    apply_sync_plan(plan)
+    record_managed_path(result, action.path, action.status, action.suffix, action.reason)
+
+
+_Item = TypeVar("_Item")
+_Prepared = TypeVar("_Prepared")
+
+
+def map_ordered(
+    function: Callable[[_Item], _Prepared], items: Iterable[_Item], jobs: int = 1
+) -> Iterator[_Prepared]:
+    """Yield function(item) in input order, computing up to 4 * jobs ahead."""
+    if jobs <= 1:
+        for item in items:
+            yield function(item)
+        return
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= jobs * 4:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def plan_adopter_constitution(
+    plan: SyncPlan,
     source_root: Path,
     target_root: Path,
     manifest_entries: Dict[str, dict],
-) -> SyncResult:
+) -> None:
     relative_path = Path(".github/copilot-instructions.md")
     source_relative = Path("docs/copilot-instructions.template.md")
     source_path = source_root / source_relative
     target_path = target_root / relative_path
-    result = SyncResult([], [], [], [])
 
     if not source_path.is_file():
         raise FileNotFoundError(f"Source path not found: {source_path}")
 
     safe_print(f"ℹ️  Constitution source: {normalize_relative_path(source_relative)}")
 
-    if target_path.exists():
+    if plan.exists(target_path):
         # Phase 0A cannot prove manifest trust state, so every existing
         # constitution requires an explicit adoption decision.
         previous = manifest_entries.get(normalize_relative_path(relative_path), {})
@@ -1443,7 +1987,7 @@ def install_adopter_constitution(
             else None
         )
         previous_source = previous.get("source") if isinstance(previous, dict) else None
-        current_hash = get_path_hash(target_path)
+        _, current_hash = plan.observe(target_path)
 
         if not previous_managed_hash or not previous_source or previous_source == "unknown":
             preservation_class = "legacy/unknown"
@@ -1452,56 +1996,65 @@ def install_adopter_constitution(
         else:
             preservation_class = "existing-unproven"
 
-        record_managed_path(
-            result,
+        plan.record(
             relative_path,
             "skipped",
             f"[preserved {preservation_class}; manual decision required]",
+            reason="manual-decision-required",
         )
         safe_print("⚠️  Constitution outcome: preserved; manual decision required")
-        return result
+        return
 
-    sync_managed_bytes(
+    plan_managed_bytes(
+        plan,
         target_path,
         relative_path,
-        source_path.read_bytes(),
-        result,
+        source_path,
         manifest_entries,
         ownership="template-managed",
         source_label="template:docs/copilot-instructions.template.md",
     )
     safe_print("✅ Constitution outcome: installed")
-    return result
 
 
-def install_lifecycle_asset(
+def install_adopter_constitution(
+    source_root: Path,
+    target_root: Path,
+    manifest_entries: Dict[str, dict],
+    hash_cache: Optional[HashCache] = None,
+) -> SyncResult:
+    plan = SyncPlan(hash_cache)
+    plan_adopter_constitution(plan, source_root, target_root, manifest_entries)
+    return apply_sync_plan(plan)
+
+
+def plan_lifecycle_asset(
+    plan: SyncPlan,
     source_file: Path,
     target_root: Path,
     relative_path: Path,
     source_label: str,
     manifest_entries: Dict[str, dict],
-) -> SyncResult:
-    """Install one lifecycle asset without inferring or overriding ownership."""
+) -> None:
+    """Plan one lifecycle asset without inferring or overriding ownership."""
     if not source_file.is_file():
         raise FileNotFoundError(f"Source path not found: {source_file}")
 
-    result = SyncResult([], [], [], [])
     normalized = normalize_relative_path(relative_path)
     target_file = target_root / relative_path
-    desired_bytes = source_file.read_bytes()
     previous = manifest_entries.get(normalized)
 
-    if not target_file.is_file():
-        sync_managed_bytes(
+    if plan.planned(target_file) is None and not target_file.is_file():
+        plan_managed_bytes(
+            plan,
             target_file,
             relative_path,
-            desired_bytes,
-            result,
+            source_file,
             manifest_entries,
             ownership="template-managed",
             source_label=source_label,
         )
-        return result
+        return
 
     valid_previous = (
         isinstance(previous, dict)
@@ -1514,22 +2067,22 @@ def install_lifecycle_asset(
         if valid_previous
         else None
     )
-    current_hash = get_path_hash(target_file)
+    _, current_hash = plan.observe(target_file)
 
     if valid_previous and current_hash == previous_managed_hash:
-        sync_managed_bytes(
+        plan_managed_bytes(
+            plan,
             target_file,
             relative_path,
-            desired_bytes,
-            result,
+            source_file,
             manifest_entries,
             ownership="template-managed",
             source_label=source_label,
         )
-        return result
+        return
 
     if valid_previous:
-        record_managed_path(result, relative_path, "skipped", "[preserved customization]")
+        plan.record(relative_path, "skipped", "[preserved customization]", reason="preserved-customization")
         update_manifest_entry(
             manifest_entries,
             relative_path,
@@ -1540,23 +2093,38 @@ def install_lifecycle_asset(
             observed_hash=current_hash,
             status="preserved-customization",
         )
-        return result
+        return
 
-    record_managed_path(
-        result,
+    plan.record(
         relative_path,
         "skipped",
         "[preserved existing; manual decision required]",
+        reason="manual-decision-required",
     )
-    return result
 
 
-def install_lifecycle_assets(
-    source_root: Path,
+def install_lifecycle_asset(
+    source_file: Path,
     target_root: Path,
+    relative_path: Path,
+    source_label: str,
     manifest_entries: Dict[str, dict],
+    hash_cache: Optional[HashCache] = None,
 ) -> SyncResult:
-    result = install_lifecycle_asset(
+    """Install one lifecycle asset without inferring or overriding ownership."""
+    plan = SyncPlan(hash_cache)
+    plan_lifecycle_asset(plan, source_file, target_root, relative_path, source_label, manifest_entries)
+    return apply_sync_plan(plan)
+
+
+def plan_lifecycle_assets(
+    plan: SyncPlan,
+    source_root: Path,
+    target_root: Path,
+    manifest_entries: Dict[str, dict],
+) -> None:
+    plan_lifecycle_asset(
+        plan,
         source_root / "docs" / "WORKFLOW.template.md",
         target_root,
         Path("WORKFLOW.md"),
@@ -1565,20 +2133,29 @@ def install_lifecycle_assets(
     )
     for name in LIFECYCLE_TEMPLATE_FILES:
         relative_path = Path("changes/_template") / name
-        result = merge_sync_results(
-            result,
-            install_lifecycle_asset(
-                source_root / relative_path,
-                target_root,
-                relative_path,
-                f"template:{normalize_relative_path(relative_path)}",
-                manifest_entries,
-            ),
+        plan_lifecycle_asset(
+            plan,
+            source_root / relative_path,
+            target_root,
+            relative_path,
+            f"template:{normalize_relative_path(relative_path)}",
+            manifest_entries,
         )
-    return result
 
 
-def sync_tree_with_policy(
+def install_lifecycle_assets(
+    source_root: Path,
+    target_root: Path,
+    manifest_entries: Dict[str, dict],
+    hash_cache: Optional[HashCache] = None,
+) -> SyncResult:
+    plan = SyncPlan(hash_cache)
+    plan_lifecycle_assets(plan, source_root, target_root, manifest_entries)
+    return apply_sync_plan(plan)
+
+
+def plan_tree_with_policy(
+    plan: SyncPlan,
     source: Path,
     target_root: Path,
     base_relative: Path,
@@ -1590,85 +2167,158 @@ def sync_tree_with_policy(
     always_overwrite: bool = False,
     preserve_untracked: bool = True,
     excludes: Optional[Sequence[str]] = None,
-) -> SyncResult:
-    if not source.exists():
+) -> None:
+    """Plan a source tree into target_root / base_relative.
+
+    With plan.jobs > 1, source reads and source/target hashing run on a
+    thread pool while decisions are still made one path at a time in walk
+    order, so actions and manifest entries match the serial run.
+    """
+    if not plan.exists(source):
         raise FileNotFoundError(f"Source path not found: {source}")
 
-    excludes = excludes or ()
-    result = SyncResult([], [], [], [])
-    for item in source.rglob("*"):
-        if item.is_dir():
-            continue
-        relative = item.relative_to(source)
-        record_path = base_relative / relative
-        if should_exclude_relative(relative, excludes):
-            record_managed_path(result, record_path, "skipped")
+    entries = plan.list_files(source, excludes or ())
+
+    def prepare(entry: TreeEntry) -> Optional[SyncCandidate]:
+        if entry.excluded:
+            return None
+        return plan.prepare(entry.path, target_root / base_relative / entry.relative)
+
+    for entry, candidate in zip(entries, map_ordered(prepare, entries, plan.jobs)):
+        record_path = base_relative / entry.relative
+        if candidate is None:
+            plan.record(record_path, "skipped", "[excluded directory]" if entry.is_dir else "", reason="excluded")
             continue
-        sync_managed_bytes(
+        plan_managed_bytes(
+            plan,
             target_root / record_path,
             record_path,
-            item.read_bytes(),
-            result,
+            entry.path,
             manifest_entries,
             ownership=ownership,
-            source_label=f"{source_label_prefix}/{normalize_relative_path(relative)}",
+            source_label=f"{source_label_prefix}/{entry.relative}",
             force=force,
             always_overwrite=always_overwrite,
             preserve_untracked=preserve_untracked,
+            candidate=candidate,
         )
-    return result
 
 
-def seed_directory_from_legacy_runtime(
+def sync_tree_with_policy(
+    source: Path,
     target_root: Path,
-    relative_dir: Path,
+    base_relative: Path,
+    manifest_entries: Dict[str, dict],
+    *,
+    ownership: str,
+    source_label_prefix: str,
+    force: bool = False,
+    always_overwrite: bool = False,
+    preserve_untracked: bool = True,
     excludes: Optional[Sequence[str]] = None,
+    hash_cache: Optional[HashCache] = None,
+    jobs: int = 1,
 ) -> SyncResult:
+    """Sync a source tree into target_root / base_relative; see plan_tree_with_policy."""
+    plan = SyncPlan(hash_cache, jobs)
+    plan_tree_with_policy(
+        plan,
+        source,
+        target_root,
+        base_relative,
+        manifest_entries,
+        ownership=ownership,
+        source_label_prefix=source_label_prefix,
+        force=force,
+        always_overwrite=always_overwrite,
+        preserve_untracked=preserve_untracked,
+        excludes=excludes,
+    )
+    return apply_sync_plan(plan)
+
+
+def plan_seed_from_legacy_runtime(
+    plan: SyncPlan,
+    target_root: Path,
+    relative_dir: Path,
+    excludes: Optional[Sequence[str]] = None,
+) -> None:
     legacy_source = target_root / ".github" / relative_dir
     target_dir = target_root / relative_dir
-    if target_dir.exists() or not legacy_source.exists():
-        return SyncResult([], [], [], [])
-    return sync_tree(legacy_source, target_dir, force=False, excludes=excludes)
+    if plan.exists(target_dir) or not plan.exists(legacy_source):
+        return
+    plan_tree_copy(plan, legacy_source, target_dir, force=False, excludes=excludes)
 
 
-def sync_tree(
+def seed_directory_from_legacy_runtime(
+    target_root: Path,
+    relative_dir: Path,
+    excludes: Optional[Sequence[str]] = None,
+) -> SyncResult:
+    plan = SyncPlan()
+    plan_seed_from_legacy_runtime(plan, target_root, relative_dir, excludes)
+    return apply_sync_plan(plan)
+
+
+def plan_tree_copy(
+    plan: SyncPlan,
     source: Path,
     destination: Path,
     force: bool,
     excludes: Optional[Sequence[str]] = None,
-) -> SyncResult:
-    if not source.exists():
+) -> None:
+    """Plan an unmanaged metadata-preserving copy; results are tree-relative."""
+    if not plan.exists(source):
         raise FileNotFoundError(f"Source path not found: {source}")
 
-    excludes = excludes or ()
-    destination.mkdir(parents=True, exist_ok=True)
+    plan.ensure_directory(destination)
 
-    result = SyncResult([], [], [], [])
-    for item in source.rglob("*"):
-        if item.is_dir():
-            continue
-        relative = item.relative_to(source)
-        normalized = normalize_relative_path(relative)
-        if should_exclude_relative(relative, excludes):
-            result.files_skipped.append(normalized)
+    for entry in plan.list_files(source, excludes or ()):
+        relative = Path(entry.relative)
+        if entry.excluded:
+            plan.record(relative, "skipped", "[excluded directory]" if entry.is_dir else "", reason="excluded")
             continue
 
+        item = entry.path
         target_file = destination / relative
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-
-        if target_file.exists():
-            if files_are_identical(item, target_file):
-                result.files_skipped.append(normalized)
+        if plan.planned(target_file) is not None or target_file.exists():
+            if plan.same_content(item, target_file):
+                plan.record(relative, "skipped", reason="identical")
             elif force:
-                shutil.copy2(item, target_file)
-                result.files_updated.append(normalized)
+                plan.add(
+                    SyncAction(
+                        relative,
+                        "updated",
+                        target=target_file,
+                        source_file=item,
+                        preserve_metadata=True,
+                        reason="forced",
+                    )
+                )
             else:
-                result.files_conflicted.append(normalized)
+                plan.record(relative, "conflicted", reason="target-differs")
         else:
-            shutil.copy2(item, target_file)
-            result.files_added.append(normalized)
+            plan.add(
+                SyncAction(
+                    relative,
+                    "added",
+                    target=target_file,
+                    source_file=item,
+                    preserve_metadata=True,
+                    reason="target-missing",
+                )
+            )
 
-    return result
+
+def sync_tree(
+    source: Path,
+    destination: Path,
+    force: bool,
+    excludes: Optional[Sequence[str]] = None,
+) -> SyncResult:
+    plan = SyncPlan()
+    plan_tree_copy(plan, source, destination, force, excludes)
+    return apply_sync_plan(plan)
 
 
 def record_managed_path(
@@ -1676,19 +2326,9 @@ def record_managed_path(
     path: Path,
     status: str,
     suffix: str = "",
+    reason: str = "",
 ) -> None:
-    normalized = path.as_posix()
-    if suffix:
-        normalized = f"{normalized} {suffix}"
-
-    if status == "added":
-        result.files_added.append(normalized)
-    elif status == "updated":
-        result.files_updated.append(normalized)
-    elif status == "skipped":
-        result.files_skipped.append(normalized)
-    elif status == "conflicted":
-        result.files_conflicted.append(normalized)
+    result.add(SyncRecord(path.as_posix(), status, suffix, reason))
 
 
 def write_managed_text_file(path: Path, content: str, force: bool) -> str:
@@ -1717,257 +2357,105 @@ def remove_path(path: Path) -> None:
         shutil.rmtree(path)
 
 
-def ensure_skill_link(link_path: Path, target_dir: Path, force: bool) -> Tuple[str, str]:
-    label_suffix = ""
+_SKILL_LINK_REASONS = {
+    "added": "target-missing",
+    "updated": "forced",
+    "skipped": "link-in-place",
+    "conflicted": "target-differs",
+}
+
+
+def _skill_link_status(link_path: Path, target_dir: Path, force: bool) -> str:
     if link_path.exists() or link_path.is_symlink():
         if link_path.is_symlink():
             try:
                 if link_path.resolve() == target_dir.resolve():
-                    return "skipped", label_suffix
+                    return "skipped"
             except OSError:
                 pass
         if not force:
-            return "conflicted", label_suffix
-        remove_path(link_path)
-        status = "updated"
-    else:
-        status = "added"
+            return "conflicted"
+        return "updated"
+    return "added"
+
 
+def _create_skill_link(link_path: Path, target_dir: Path, replace: bool) -> str:
+    if replace:
+        remove_path(link_path)
     link_path.parent.mkdir(parents=True, exist_ok=True)
     relative_target = os.path.relpath(target_dir, link_path.parent)
     try:
         os.symlink(relative_target, link_path, target_is_directory=True)
-        return status, label_suffix
+        return ""
     except OSError:
-        shutil.copytree(target_dir, link_path, dirs_exist_ok=False)
-        return status, "[copy fallback]"
-
-
-def unquote_frontmatter_value(value: str) -> str:
-    value = value.strip()
-    if len(value) >= 2 and value[0] == value[-1] and value[0] in {"'", '"'}:
-        return value[1:-1]
-    return value
-
-
-def parse_agent_definition(agent_file: Path) -> Tuple[str, str, str]:
-    raw = agent_file.read_text(encoding="utf-8")
-    match = re.match(r"^---\r?\n(.*?)\r?\n---\r?\n?(.*)$", raw, re.S)
-    if not match:
-        raise ValueError(f"Invalid agent file: {agent_file}")
-
-    frontmatter = match.group(1)
-    body = match.group(2).strip()
-    description_match = re.search(r"^description:\s*(.+)$", frontmatter, re.M)
-    description = unquote_frontmatter_value(description_match.group(1)) if description_match else ""
-    name = agent_file.name.replace(".agent.md", "")
-    return name, description, body
+        shutil.copytree(target_dir, link_path, dirs_exist_ok=False, copy_function=copy_file_with_metadata)
+        return "[copy fallback]"
 
 
-def build_claude_agent_content(name: str, description: str, body: str) -> str:
-    return (
-        "---\n"
-        f"name: {json.dumps(name, ensure_ascii=False)}\n"
-        f"description: {json.dumps(description, ensure_ascii=False)}\n"
-        "---\n\n"
-        f"{body.rstrip()}\n"
-    )
-
-
-def build_codex_agent_content(name: str, description: str, body: str) -> str:
-    escaped_body = body.rstrip().replace('"""', '\\"""')
-    return (
-        f"name = {json.dumps(name, ensure_ascii=False)}\n"
-        f"description = {json.dumps(description, ensure_ascii=False)}\n"
-        'developer_instructions = """\n'
-        f"{escaped_body}\n"
-        '"""\n'
-    )
+def mirror_link_mode(source: Path, target: Path) -> Optional[str]:
+    """Return "hardlink" or "symlink" when target already is source, else None."""
+    try:
+        if not os.path.samefile(source, target):
+            return None
+    except (OSError, ValueError):
+        return None
+    return "symlink" if target.is_symlink() else "hardlink"
 
 
-def install_portable_runtime(
-    source_root: Path,
-    target_root: Path,
-    force: bool,
-    manifest_entries: Dict[str, dict],
-) -> SyncResult:
-    result = SyncResult([], [], [], [])
-    skills_source = source_root / "skills"
-    agents_source = source_root / "agents"
-    top_level_skill_excludes: Sequence[str] = ()
-    if source_root.resolve() != target_root.resolve():
-        top_level_skill_excludes = ("gate-check",)
-
-    result = merge_sync_results(
-        result,
-        seed_directory_from_legacy_runtime(target_root, Path("skills"), excludes=top_level_skill_excludes),
-        seed_directory_from_legacy_runtime(target_root, Path("agents")),
-        sync_tree_with_policy(
-            skills_source,
-            target_root,
-            Path("skills"),
-            manifest_entries,
-            ownership="template-managed",
-            source_label_prefix="template:skills",
-            force=force,
-            excludes=top_level_skill_excludes,
-        ),
-        sync_tree_with_policy(
-            agents_source,
-            target_root,
-            Path("agents"),
-            manifest_entries,
-            ownership="template-managed",
-            source_label_prefix="template:agents",
-            force=force,
-        ),
-    )
-
-    guide_templates = {
-        Path("AGENTS.md"): source_root / "docs" / "AGENTS.template.md",
-        Path("CLAUDE.md"): source_root / "docs" / "CLAUDE.template.md",
-        Path("GEMINI.md"): source_root / "docs" / "GEMINI.template.md",
-    }
-    for relative_path, template_path in guide_templates.items():
-        if not template_path.exists():
-            continue
-        normalized_content = normalize_text_content(template_path.read_text(encoding="utf-8"))
-        target_file = target_root / relative_path
-        if target_file.exists():
-            record_managed_path(result, relative_path, "skipped", "[project-owned]")
-            update_manifest_entry(
-                manifest_entries,
-                relative_path,
-                ownership="project-owned",
-                source_label=f"template:docs/{template_path.name}",
-                kind="file",
-                managed_hash=hash_bytes(normalized_content.encode("utf-8")),
-                observed_hash=get_path_hash(target_file),
-                status="project-owned",
-            )
-            continue
-        target_file.parent.mkdir(parents=True, exist_ok=True)
-        target_file.write_text(normalized_content, encoding="utf-8")
-        record_managed_path(result, relative_path, "added")
-        update_manifest_entry(
-            manifest_entries,
-            relative_path,
-            ownership="project-owned",
-            source_label=f"template:docs/{template_path.name}",
-            kind="file",
-            managed_hash=hash_bytes(normalized_content.encode("utf-8")),
-            observed_hash=get_path_hash(target_file),
-            status="project-owned",
-        )
+def _create_mirror_file(source: Path, target: Path, mode: str) -> str:
+    """Replace target with a link to source and return the mode achieved.
 
-    result = merge_sync_results(
-        result,
-        install_lifecycle_assets(source_root, target_root, manifest_entries),
-    )
+    A hardlink is tried first when requested, then a relative per-file
+    symlink, and a plain copy when the filesystem supports neither.
+    """
+    remove_path(target)
+    if mode == "hardlink":
+        try:
+            os.link(source, target)
+            return "hardlink"
+        except OSError:
+            pass
+    try:
+        os.symlink(os.path.relpath(source, target.parent), target)
+        return "symlink"
+    except OSError:
+        copy_file_contents(source, target)
+        return "copy"
 
-    shared_skills = target_root / "skills"
-    for relative_link in PORTABLE_SKILL_LINKS:
-        status, suffix = ensure_skill_link(target_root / relative_link, shared_skills, True)
-        record_managed_path(result, relative_link, status, suffix)
-        update_manifest_entry(
-            manifest_entries,
-            relative_link,
-            ownership="derived-runtime",
-            source_label="project:skills",
-            kind="mount",
-            managed_hash=None,
-            observed_hash=None,
-            status="derived-runtime",
-        )
 
-    target_agents_dir = target_root / "agents"
-    if target_agents_dir.exists():
-        for agent_file in sorted(target_agents_dir.glob("*.agent.md")):
-            name, description, body = parse_agent_definition(agent_file)
-            claude_relative = Path(".claude/agents") / f"{name}.md"
-            claude_bytes = normalize_text_content(
-                build_claude_agent_content(name, description, body)
-            ).encode("utf-8")
-            sync_managed_bytes(
-                target_root / claude_relative,
-                claude_relative,
-                claude_bytes,
-                result,
-                manifest_entries,
-                ownership="derived-runtime",
-                source_label=f"project:agents/{agent_file.name}",
-                always_overwrite=True,
-                preserve_untracked=False,
-            )
-            codex_relative = Path(".codex/agents") / f"{name}.toml"
-            codex_bytes = normalize_text_content(
-                build_codex_agent_content(name, description, body)
-            ).encode("utf-8")
-            sync_managed_bytes(
-                target_root / codex_relative,
-                codex_relative,
-                codex_bytes,
-                result,
-                manifest_entries,
-                ownership="derived-runtime",
-                source_label=f"project:agents/{agent_file.name}",
-                always_overwrite=True,
-                preserve_untracked=False,
-            )
+def ensure_skill_link(link_path: Path, target_dir: Path, force: bool) -> Tuple[str, str]:
+    status = _skill_link_status(link_path, target_dir, force)
+    if status in {"skipped", "conflicted"}:
+        return status, ""
+    return status, _create_skill_link(link_path, target_dir, replace=status == "updated")
 
-    result = merge_sync_results(
-        result,
-        sync_tree_with_policy(
-            target_root / "skills",
-            target_root,
-            Path(".github/skills"),
-            manifest_entries,
-            ownership="derived-runtime",
-            source_label_prefix="project:skills",
-            always_overwrite=True,
-            preserve_untracked=False,
-        ),
-        sync_tree_with_policy(
-            target_root / "agents",
-            target_root,
-            Path(".github/agents"),
-            manifest_entries,
-            ownership="derived-runtime",
-            source_label_prefix="project:agents",
-            always_overwrite=True,
-            preserve_untracked=False,
-        ),
-    )
 
-    return result
+def plan_skill_link(
+    plan: SyncPlan, link_path: Path, target_dir: Path, force: bool, record_path: Path
+) -> SyncAction:
+    status = _skill_link_status(link_path, target_dir, force)
+    reason = _SKILL_LINK_REASONS[status]
+    if status in {"skipped", "conflicted"}:
+        return plan.record(record_path, status, reason=reason)
+    return plan.add(SyncAction(record_path, status, target=link_path, link_target=target_dir, reason=reason))
 
 
-def sync_workflow_files(
+def plan_workflow_files(
+    plan: SyncPlan,
     source: Path,
     target_root: Path,
     force: bool,
     manifest_entries: Dict[str, dict],
-    backup: bool = False,
     constitution_source_root: Optional[Path] = None,
-) -> SyncResult:
+) -> None:
     if not source.exists():
         raise FileNotFoundError(f"Source path not found: {source}")
-    target_root.mkdir(parents=True, exist_ok=True)
-    target_github = target_root / ".github"
-    
-    # Create backup if requested and target exists
-    if backup and target_github.exists():
-        backup_result = backup_directory(target_github)
-        if backup_result.success:
-            safe_print(f"✅ {backup_result.message}")
-        else:
-            safe_print(f"⚠️  {backup_result.message}")
-    
-    target_github.mkdir(parents=True, exist_ok=True)
+    plan.ensure_directory(target_root / ".github")
 
     legacy_excludes = set(LEGACY_RUNTIME_EXCLUDES) | {"copilot-instructions.md"}
 
-    result = sync_tree_with_policy(
+    plan_tree_with_policy(
+        plan,
         source,
         target_root,
         Path(".github"),
@@ -1979,35 +2467,64 @@ def sync_workflow_files(
     )
 
     if constitution_source_root is not None:
-        constitution_result = install_adopter_constitution(
+        plan.discard(Path(".github/copilot-instructions.md"), "skipped")
+        plan_adopter_constitution(
+            plan,
             constitution_source_root,
             target_root,
             manifest_entries,
         )
-        result.files_skipped = [
-            item
-            for item in result.files_skipped
-            if item != ".github/copilot-instructions.md"
-        ]
-        result = merge_sync_results(result, constitution_result)
 
     # Also copy root-level template files (e.g. .gitattributes, .editorconfig) into project root
     root_files = [".gitattributes", ".editorconfig"]
     for rf in root_files:
         src_root = source.parent / rf
         if src_root.exists():
-            sync_managed_bytes(
+            plan_managed_bytes(
+                plan,
                 target_root / rf,
                 Path(rf),
-                src_root.read_bytes(),
-                result,
+                src_root,
                 manifest_entries,
                 ownership="legacy-compat",
                 source_label=f"template:{rf}",
                 force=force,
             )
 
-    return result
+
+def sync_workflow_files(
+    source: Path,
+    target_root: Path,
+    force: bool,
+    manifest_entries: Dict[str, dict],
+    backup: bool = False,
+    constitution_source_root: Optional[Path] = None,
+    hash_cache: Optional[HashCache] = None,
+    jobs: int = 1,
+) -> SyncResult:
+    if not source.exists():
+        raise FileNotFoundError(f"Source path not found: {source}")
+    target_root.mkdir(parents=True, exist_ok=True)
+    target_github = target_root / ".github"
+
+    # Create backup if requested and target exists
+    if backup and target_github.exists():
+        backup_result = backup_directory(target_github)
+        if backup_result.success:
+            safe_print(f"✅ {backup_result.message}")
+        else:
+            safe_print(f"⚠️  {backup_result.message}")
+
+    plan = SyncPlan(hash_cache, jobs)
+    plan_workflow_files(
+        plan,
+        source,
+        target_root,
+        force,
+        manifest_entries,
+        constitution_source_root,
+    )
+    return apply_sync_plan(plan)
 
 
 def initialize_git_repo(target_root: Path) -> GitInitResult:
@@ -2031,23 +2548,151 @@ def initialize_git_repo(target_root: Path) -> GitInitResult:
     raise RuntimeError("git init executed but .git directory not found")
 
 
+# Linux ioctl request that clones a file's extents (_IOW(0x94, 9, int)).
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 1024 * 1024
+EVENT_BUFFER_SIZE = 64 * 1024
+EVENT_FLUSH_INTERVAL_S = 0.5
+# Bytes compare_files reads from each end of a file before a full compare.
+COMPARE_SAMPLE_SIZE = 4096
+# errnos meaning "this primitive cannot copy between these two files"; the
+# next, more portable primitive is tried instead of failing the copy.
+_UNSUPPORTED_COPY_ERRNOS = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSOCK,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EXDEV,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+}
+
+
+def _kernel_copy(copy_chunk: Callable[[int, int, int], int], source_fd: int, destination_fd: int) -> bool:
+    size = os.fstat(source_fd).st_size
+    copied = 0
+    try:
+        while copied < size:
+            sent = copy_chunk(source_fd, destination_fd, min(COPY_CHUNK_SIZE, size - copied))
+            if sent == 0:
+                break
+            copied += sent
+    except OSError as error:
+        if error.errno not in _UNSUPPORTED_COPY_ERRNOS:
+            raise
+        os.lseek(source_fd, 0, os.SEEK_SET)
+        os.lseek(destination_fd, 0, os.SEEK_SET)
+        os.ftruncate(destination_fd, 0)
+        return False
+    # A file that grew while copying is finished by the buffered fallback.
+    return os.fstat(source_fd).st_size == copied
+
+
+def copy_file_contents(source: Path, destination: Path) -> str:
+    """Copy file bytes with the cheapest primitive available and name it.
+
+    Tries a reflink (FICLONE), then os.copy_file_range, then os.sendfile,
+    so data stays in the kernel, and falls back to a buffered copy.
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        source_fd = source_file.fileno()
+        destination_fd = destination_file.fileno()
+        if fcntl is not None and sys.platform.startswith("linux"):
+            try:
+                fcntl.ioctl(destination_fd, FICLONE, source_fd)
+                return "reflink"
+            except OSError as error:
+                if error.errno not in _UNSUPPORTED_COPY_ERRNOS:
+                    raise
+        if hasattr(os, "copy_file_range") and _kernel_copy(
+            lambda src, dst, count: os.copy_file_range(src, dst, count), source_fd, destination_fd
+        ):
+            return "copy_file_range"
+        if hasattr(os, "sendfile") and sys.platform.startswith("linux") and _kernel_copy(
+            lambda src, dst, count: os.sendfile(dst, src, None, count), source_fd, destination_fd
+        ):
+            return "sendfile"
+        source_file.seek(0)
+        destination_file.seek(0)
+        destination_file.truncate()
+        shutil.copyfileobj(source_file, destination_file, COPY_CHUNK_SIZE)
+        return "buffered"
+
+
+def copy_file_with_metadata(source: Union[Path, str], destination: Union[Path, str]) -> str:
+    """shutil.copy2 replacement (and copytree copy_function) using copy_file_contents."""
+    copy_file_contents(Path(source), Path(destination))
+    shutil.copystat(source, destination)
+    return os.fspath(destination)
+
+
 def calculate_file_hash(file_path: Path) -> str:
-    """Calculate SHA256 hash of a file."""
+    """Calculate SHA256 hash of a file.
+
+    The file is read into one buffer of at most COPY_CHUNK_SIZE bytes, so
+    memory stays flat for large assets and small files take a single read.
+    """
+    global FILES_HASHED
+    with _FILES_HASHED_LOCK:
+        FILES_HASHED += 1
     sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
+    with open(file_path, "rb", buffering=0) as f:
+        buffer = bytearray(min(COPY_CHUNK_SIZE, os.fstat(f.fileno()).st_size + 1))
+        view = memoryview(buffer)
         while True:
-            chunk = f.read(8192)
-            if not chunk:
+            count = f.readinto(buffer)
+            if not count:
                 break
-            sha256.update(chunk)
+            sha256.update(view[:count])
     return sha256.hexdigest()
 
 
+def compare_files(first: Path, second: Path) -> bool:
+    """Return True when two regular files hold the same bytes, cheapest check first.
+
+    Escalates from the same inode, to the size, to the first and last
+    COMPARE_SAMPLE_SIZE bytes, to a chunked compare that stops at the first
+    difference. Nothing is hashed; anything but two regular files differs.
+    """
+    try:
+        first_stat = first.stat()
+        second_stat = second.stat()
+    except OSError:
+        return False
+    if not (stat.S_ISREG(first_stat.st_mode) and stat.S_ISREG(second_stat.st_mode)):
+        return False
+    if first_stat.st_ino and (first_stat.st_dev, first_stat.st_ino) == (second_stat.st_dev, second_stat.st_ino):
+        return True
+    size = first_stat.st_size
+    if size != second_stat.st_size:
+        return False
+    with open(first, "rb", buffering=0) as first_file, open(second, "rb", buffering=0) as second_file:
+        if size > 2 * COMPARE_SAMPLE_SIZE:
+            for offset in (0, size - COMPARE_SAMPLE_SIZE):
+                first_file.seek(offset)
+                second_file.seek(offset)
+                if first_file.read(COMPARE_SAMPLE_SIZE) != second_file.read(COMPARE_SAMPLE_SIZE):
+                    return False
+            first_file.seek(0)
+            second_file.seek(0)
+        first_buffer = bytearray(min(COPY_CHUNK_SIZE, size + 1))
+        second_buffer = bytearray(len(first_buffer))
+        first_view = memoryview(first_buffer)
+        second_view = memoryview(second_buffer)
+        while True:
+            count = first_file.readinto(first_buffer)
+            if second_file.readinto(second_buffer) != count or first_view[:count] != second_view[:count]:
+                return False
+            if not count:
+                return True
+
+
 def files_are_identical(file1: Path, file2: Path) -> bool:
-    """Check if two files have identical content."""
+    """Check if two files have identical content; see compare_files."""
     if not file1.exists() or not file2.exists():
         return False
-    return calculate_file_hash(file1) == calculate_file_hash(file2)
+    return compare_files(file1, file2)
 
 
 def backup_directory(source: Path, backup_name: Optional[str] = None) -> BackupResult:
@@ -2062,7 +2707,7 @@ def backup_directory(source: Path, backup_name: Optional[str] = None) -> BackupR
     backup_path = source.parent / backup_name
     
     try:
-        shutil.copytree(source, backup_path, dirs_exist_ok=False)
+        shutil.copytree(source, backup_path, dirs_exist_ok=False, copy_function=copy_file_with_metadata)
         return BackupResult(True, str(backup_path), f"Backup created: {backup_path}")
     except FileExistsError:
         return BackupResult(False, None, f"Backup already exists: {backup_path}")
@@ -2090,9 +2735,11 @@ def backup_managed_paths(
             destination_path.parent.mkdir(parents=True, exist_ok=True)
 
             if source_path.is_dir():
-                shutil.copytree(source_path, destination_path, symlinks=True)
+                shutil.copytree(
+                    source_path, destination_path, symlinks=True, copy_function=copy_file_with_metadata
+                )
             else:
-                shutil.copy2(source_path, destination_path)
+                copy_file_with_metadata(source_path, destination_path)
 
         return BackupResult(True, str(backup_root), f"Backup created: {backup_root}")
     except FileExistsError:
@@ -2101,20 +2748,302 @@ def backup_managed_paths(
         return BackupResult(False, None, f"Backup failed: {error}")
 
 
-def check_git_uncommitted_changes(target_root: Path, directory: str = ".github") -> bool:
-    """Check if there are uncommitted changes in a directory."""
+class BackupStore:
+    """Content-addressed backup store under the adopter root.
+
+    Every unique file body is kept once in objects/ under its sha256, and
+    each backup is a small JSON index in snapshots/ mapping paths to those
+    blobs, so a backup only copies bytes no earlier backup already holds.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    @property
+    def path(self) -> Path:
+        return self.root / BACKUP_STORE_DIRNAME
+
+    def object_path(self, digest: str) -> Path:
+        hex_digest = digest.split(":", 1)[1]
+        return self.path / "objects" / hex_digest[:2] / hex_digest[2:]
+
+    def index_path(self, name: str) -> Path:
+        return self.path / "snapshots" / f"{name}.json"
+
+    def snapshot_names(self) -> List[str]:
+        snapshots = self.path / "snapshots"
+        if not snapshots.is_dir():
+            return []
+        return sorted(index.stem for index in snapshots.glob("*.json"))
+
+    def _walk(self, relative_paths: Sequence[str]) -> Iterator[Tuple[str, Path]]:
+        for relative in relative_paths:
+            top = self.root / relative
+            if top.is_symlink():
+                yield "symlink", top
+                continue
+            if top.is_file():
+                yield "file", top
+                continue
+            if not top.is_dir():
+                continue
+            yield "directory", top
+            for current, dirnames, filenames in os.walk(top):
+                dirnames.sort()
+                current_path = Path(current)
+                for dirname in list(dirnames):
+                    path = current_path / dirname
+                    if path.is_symlink():
+                        dirnames.remove(dirname)
+                        yield "symlink", path
+                    else:
+                        yield "directory", path
+                for filename in sorted(filenames):
+                    path = current_path / filename
+                    yield ("symlink" if path.is_symlink() else "file"), path
+
+    def _store_blob(self, source: Path, digest: str) -> bool:
+        blob = self.object_path(digest)
+        if blob.is_file():
+            return False
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        temporary = blob.with_name(f"{blob.name}.tmp")
+        copy_file_contents(source, temporary)
+        if get_path_hash(temporary) != digest:
+            temporary.unlink()
+            raise RuntimeError(f"File changed while backing up: {source}")
+        os.replace(temporary, blob)
+        return True
+
+    def snapshot(
+        self,
+        relative_paths: Sequence[str],
+        hash_cache: Optional[HashCache] = None,
+        name: Optional[str] = None,
+    ) -> BackupResult:
+        """Back up the given root-relative paths; unchanged files cost one index line.
+
+        Without a name the snapshot is named after the current time, with a
+        counter appended if another backup already took that name.
+        """
+        unique = name is None
+        if name is None:
+            name = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        index_path = self.index_path(name)
+        if not unique and index_path.exists():
+            return BackupResult(False, None, f"Backup already exists: {index_path}")
+
+        entries = []
+        new_blobs = 0
+        try:
+            for kind, path in self._walk(relative_paths):
+                relative = path.relative_to(self.root).as_posix()
+                if kind == "symlink":
+                    entries.append({"path": relative, "kind": "symlink", "target": os.readlink(path)})
+                    continue
+                info = path.stat()
+                if kind == "directory":
+                    entries.append({"path": relative, "kind": "directory", "mode": stat.S_IMODE(info.st_mode)})
+                    continue
+                digest = get_path_hash(path, hash_cache)
+                if self._store_blob(path, digest):
+                    new_blobs += 1
+                entries.append(
+                    {
+                        "path": relative,
+                        "kind": "file",
+                        "sha256": digest,
+                        "mode": stat.S_IMODE(info.st_mode),
+                        "mtime_ns": info.st_mtime_ns,
+                    }
+                )
+            if not entries:
+                return BackupResult(True, None, "No portable runtime paths to backup")
+
+            _ensure_ignored_dir(self.path)
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {
+                "version": BACKUP_INDEX_VERSION,
+                "created_at": datetime.now().astimezone().isoformat(),
+                "paths": list(relative_paths),
+                "entries": entries,
+            }
+            index_path = self._write_index(name, payload, unique)
+        except FileExistsError:
+            return BackupResult(False, None, f"Backup already exists: {index_path}")
+        except Exception as error:
+            return BackupResult(False, None, f"Backup failed: {error}")
+
+        file_count = sum(1 for entry in entries if entry["kind"] == "file")
+        return BackupResult(
+            True,
+            str(index_path),
+            f"Backup created: {index_path} ({file_count} files, {new_blobs} new blobs)",
+        )
+
+    def _write_index(self, name: str, payload: Dict[str, Any], unique: bool) -> Path:
+        text = json.dumps(payload, ensure_ascii=False, indent=2) + "\n"
+        candidate = name
+        attempt = 1
+        while True:
+            index_path = self.index_path(candidate)
+            try:
+                with open(index_path, "x", encoding="utf-8") as handle:
+                    handle.write(text)
+                return index_path
+            except FileExistsError:
+                if not unique:
+                    raise
+            attempt += 1
+            candidate = f"{name}-{attempt}"
+
+    def _entry_error(self, entry: Dict[str, Any]) -> Optional[str]:
+        """Why an index entry cannot be restored, or None; checked before any write."""
+        relative = Path(entry["path"])
+        if not relative.parts or relative.is_absolute() or ".." in relative.parts:
+            return "Unsafe path in backup index"
+        kind = entry["kind"]
+        if kind == "symlink":
+            return None if isinstance(entry.get("target"), str) else f"Invalid symlink entry for {entry['path']}"
+        if type(entry.get("mode")) is not int:
+            return f"Invalid mode for {entry['path']}"
+        if kind == "file":
+            if type(entry.get("mtime_ns")) is not int:
+                return f"Invalid mtime_ns for {entry['path']}"
+            if not (
+                isinstance(entry.get("sha256"), str)
+                and _HASH_PATTERN.fullmatch(entry["sha256"])
+                and self.object_path(entry["sha256"]).is_file()
+            ):
+                return f"Backup blob missing for {entry['path']}"
+        return None
+
+    def restore(self, name: str) -> BackupResult:
+        """Materialise a backup over the adopter root.
+
+        Paths recorded in the backup are rewritten; files created after the
+        backup are left in place. Nothing is written unless every entry is
+        well formed and every blob it refers to is present.
+        """
+        index_path = self.index_path(name)
+        try:
+            payload = json.loads(index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return BackupResult(False, None, f"Backup not found: {name}")
+        except (OSError, UnicodeError, json.JSONDecodeError) as error:
+            return BackupResult(False, None, f"Backup index unreadable: {error}")
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != BACKUP_INDEX_VERSION
+            or not isinstance(payload.get("entries"), list)
+            or not all(
+                isinstance(entry, dict)
+                and isinstance(entry.get("path"), str)
+                and entry.get("kind") in {"file", "directory", "symlink"}
+                for entry in payload["entries"]
+            )
+        ):
+            return BackupResult(False, None, f"Unsupported backup index: {index_path}")
+        entries = payload["entries"]
+        for entry in entries:
+            error = self._entry_error(entry)
+            if error is not None:
+                return BackupResult(False, None, f"{error}: {index_path}")
+
+        try:
+            for entry in entries:
+                destination = self.root / entry["path"]
+                kind = entry["kind"]
+                if kind == "directory":
+                    if destination.is_symlink() or destination.is_file():
+                        remove_path(destination)
+                    destination.mkdir(parents=True, exist_ok=True)
+                    continue
+                if kind == "symlink" or destination.is_symlink() or destination.is_dir():
+                    remove_path(destination)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                if kind == "symlink":
+                    os.symlink(entry["target"], destination)
+                    continue
+                temporary = destination.with_name(f"{destination.name}.restore-tmp")
+                copy_file_contents(self.object_path(entry["sha256"]), temporary)
+                os.chmod(temporary, entry["mode"])
+                os.utime(temporary, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+                os.replace(temporary, destination)
+        except OSError as error:
+            return BackupResult(False, None, f"Restore failed: {error}")
+
+        file_count = sum(1 for entry in entries if entry["kind"] == "file")
+        return BackupResult(True, str(index_path), f"Backup restored: {name} ({file_count} files)")
+
+
+def _git_prefix(target_root: Path) -> str:
+    """Return target_root relative to its work tree as "sub/dir/" ("" at the top)."""
+    resolved = target_root.resolve()
+    for candidate in (resolved, *resolved.parents):
+        if (candidate / ".git").exists():
+            relative = resolved.relative_to(candidate).as_posix()
+            return "" if relative == "." else f"{relative}/"
+    return ""
+
+
+def git_dirty_paths(target_root: Path, paths: Sequence[str]) -> Dict[str, bool]:
+    """Map each path below target_root to whether Git reports uncommitted changes in it.
+
+    A single `git status --porcelain=v1 -z` call covers every pathspec.
+    Outside a repository, or without Git, every path maps to False.
+    """
+    dirty = {path: False for path in paths}
+    if not paths:
+        return dirty
     try:
         result = subprocess.run(
-            ["git", "status", "--porcelain", directory],
+            ["git", "status", "--porcelain=v1", "-z", "--", *paths],
             cwd=target_root,
             capture_output=True,
-            text=True,
             check=False,
         )
-        # If output is not empty, there are uncommitted changes
-        return bool(result.stdout.strip())
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+    except OSError:
+        return dirty
+    if result.returncode != 0:
+        return dirty
+
+    reported: List[str] = []
+    fields = result.stdout.decode("utf-8", "surrogateescape").split("\0")
+    index = 0
+    while index < len(fields):
+        record = fields[index]
+        index += 1
+        if len(record) < 4:
+            continue
+        reported.append(record[3:])
+        # Renames and copies carry the original path as the next field.
+        if "R" in record[:2] or "C" in record[:2]:
+            if index < len(fields):
+                reported.append(fields[index])
+            index += 1
+
+    prefix = _git_prefix(target_root)
+    keys = {path: normalize_relative_path(path).strip("/") for path in paths}
+    for name in reported:
+        if prefix and name.startswith(prefix):
+            name = name[len(prefix):]
+        name = name.rstrip("/")
+        matched = False
+        for path, key in keys.items():
+            # A collapsed untracked directory may be a parent of the pathspec.
+            if name == key or name.startswith(f"{key}/") or key.startswith(f"{name}/"):
+                dirty[path] = True
+                matched = True
+        if not matched:
+            # Unmappable output still came from one of the pathspecs; stay safe.
+            return {path: True for path in paths}
+    return dirty
+
+
+def check_git_uncommitted_changes(target_root: Path, directory: str = ".github") -> bool:
+    """Check if there are uncommitted changes in a directory."""
+    return git_dirty_paths(target_root, [directory])[directory]
 
 
 def safe_print(text: str) -> None:
@@ -2127,6 +3056,78 @@ def safe_print(text: str) -> None:
         print(ascii_text)
 
 
+def _plan_install_or_exit(
+    template_source: Path,
+    repo_root: Path,
+    current_path: Path,
+    force: bool,
+    manifest_entries: Dict[str, dict],
+    hash_cache: Optional[HashCache],
+    jobs: int,
+    source_index: Optional[SourceIndex] = None,
+    mirror: bool = False,
+    render_cache: Optional[AgentRenderCache] = None,
+    source_delta: Optional[SourceDelta] = None,
+    profiler: Optional[Profiler] = None,
+) -> SyncPlan:
+    plan = SyncPlan(hash_cache, jobs, source_index, render_cache)
+    if source_delta is not None:
+        plan.use_source_delta(source_delta, current_path, manifest_entries)
+    try:
+        with profile_phase(profiler, "workflow-files"):
+            plan_workflow_files(
+                plan,
+                template_source,
+                current_path,
+                force,
+                manifest_entries,
+                constitution_source_root=repo_root,
+            )
+    except FileNotFoundError as error:
+        safe_print(f"❌ 檔案同步失敗: {error}")
+        sys.exit(1)
+    try:
+        from scripts.portable_runtime import plan_portable_runtime
+
+        with profile_phase(profiler, "portable-runtime"):
+            plan_portable_runtime(plan, repo_root, current_path, force, manifest_entries, mirror)
+    except (FileNotFoundError, ValueError) as error:
+        safe_print(f"❌ Portable runtime 安裝失敗: {error}")
+        sys.exit(1)
+    return plan
+
+
+def write_sync_summary(sync_result: SyncResult, verbose: bool = False) -> None:
+    if sync_result.files_added:
+        safe_print(f"✅ 新增 {len(sync_result.files_added)} 個檔案")
+    if sync_result.files_updated:
+        safe_print(f"✅ 更新 {len(sync_result.files_updated)} 個檔案")
+    if sync_result.files_skipped:
+        safe_print(
+            f"⏭️  跳過 {len(sync_result.files_skipped)} 個檔案（保留既有客製、排除項或內容相同）"
+        )
+    if sync_result.files_conflicted:
+        safe_print(f"⚠️  偵測到 {len(sync_result.files_conflicted)} 個衝突檔案（內容不同但未覆蓋）")
+        if verbose:
+            for file in sync_result.files_conflicted:
+                print(f"   - {file}")
+        print()
+        print("提示：使用 --force 參數強制覆蓋模板管理的衝突檔案")
+    print()
+
+    if verbose:
+        if sync_result.files_added:
+            print("新增的檔案:")
+            for item in sync_result.files_added:
+                print(f"  + {item}")
+            print()
+        if sync_result.files_updated:
+            print("更新的檔案:")
+            for item in sync_result.files_updated:
+                print(f"  ~ {item}")
+            print()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Initialize the AI workflow into the current project."
@@ -2139,20 +3140,156 @@ def main() -> None:
     parser.add_argument("--operation", choices=("conversion-plan", "reconcile"), help="Report-only operation")
     parser.add_argument("--source-root", help="Template root for report-only planning")
     parser.add_argument("--target-root", help="Adopter root for report-only planning")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Hash and compare source/target files on N threads (default: 1)",
+    )
+    parser.add_argument(
+        "--write-source-index",
+        action="store_true",
+        help=f"Regenerate {SOURCE_INDEX_PATH.as_posix()} in the template repo and exit (maintainers)",
+    )
+    parser.add_argument(
+        "--restore-backup",
+        metavar="NAME",
+        help="Restore a backup from .ai-workflow-backups/ (use 'latest' for the newest) and exit",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the install plan without writing anything (exit 2 when changes are pending)",
+    )
+    parser.add_argument(
+        "--mirror-runtime",
+        action="store_true",
+        help="Hardlink .github/skills and .github/agents to skills/ and agents/ instead of copying",
+    )
+    parser.add_argument(
+        "--fleet",
+        metavar="LIST_FILE",
+        help="Install into every target root listed in LIST_FILE (one per line) instead of the current directory",
+    )
+    parser.add_argument(
+        "--fleet-workers",
+        type=int,
+        metavar="N",
+        help="Worker processes for --fleet (default: one per CPU, at most one per target)",
+    )
+    parser.add_argument(
+        "--events",
+        metavar="FILE",
+        help="Stream one JSON object per managed-path decision to FILE ('-' for stdout; messages move to stderr)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Write per-phase wall/CPU time, I/O bytes, files hashed and memory peaks to FILE as JSON",
+    )
     args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.fleet_workers is not None and args.fleet_workers < 1:
+        parser.error("--fleet-workers must be at least 1")
 
+    if args.fleet and args.profile:
+        parser.error("--profile cannot be combined with --fleet")
     if args.report_only:
-        if args.force or args.update or args.backup:
-            parser.error("--report-only cannot be combined with --force, --update, or --backup")
+        if args.force or args.update or args.backup or args.plan or args.restore_backup or args.fleet or args.events:
+            parser.error(
+                "--report-only cannot be combined with --force, --update, --backup, --plan, --restore-backup, "
+                "--fleet, or --events"
+            )
         if not args.operation or not args.source_root or not args.target_root:
             parser.error("--report-only requires --operation, --source-root, and --target-root")
         from scripts import manifest_reconciliation
-        raise SystemExit(
-            manifest_reconciliation.emit_report(
-                Path(args.source_root), Path(args.target_root), args.operation
-            )
+        profiler = _start_profiler("report-only") if args.profile else None
+        status = manifest_reconciliation.emit_report(
+            Path(args.source_root), Path(args.target_root), args.operation, profiler
         )
+        if profiler is not None:
+            # stdout carries only the report.
+            with contextlib.redirect_stdout(sys.stderr):
+                _write_profile(profiler, Path(args.profile))
+        raise SystemExit(status)
+
+    if args.write_source_index:
+        source_root = Path(__file__).resolve().parent.parent
+        if not (source_root / COMPONENT_CATALOG_PATH).is_file():
+            parser.error("--write-source-index must run from a template repository checkout")
+        index_path = SourceIndex.build(source_root).write()
+        safe_print(f"✅ Source index written: {index_path}")
+        return
+
+    if args.fleet and (args.plan or args.restore_backup):
+        parser.error("--fleet cannot be combined with --plan or --restore-backup")
+
+    if args.restore_backup:
+        if args.force or args.update or args.backup or args.plan or args.events:
+            parser.error("--restore-backup cannot be combined with --force, --update, --backup, --plan, or --events")
+        store = BackupStore(Path.cwd())
+        names = store.snapshot_names()
+        name = names[-1] if args.restore_backup == "latest" and names else args.restore_backup
+        restore_result = store.restore(name)
+        if not restore_result.success:
+            safe_print(f"❌ {restore_result.message}")
+            if names:
+                print(f"   Available backups: {', '.join(names)}")
+            raise SystemExit(1)
+        safe_print(f"✅ {restore_result.message}")
+        return
 
+    try:
+        events = EventLog.open(args.events) if args.events else None
+    except OSError as error:
+        parser.error(f"cannot open --events destination: {error}")
+    # With --events - the JSON lines own stdout; everything human-readable goes to stderr.
+    with contextlib.ExitStack() as stack:
+        if events is not None:
+            stack.callback(events.close)
+        if args.events == "-":
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        profiler = None
+        if args.profile:
+            profiler = _start_profiler("bootstrap")
+            # Also written when the run exits early, e.g. --plan or an aborted prompt.
+            stack.callback(_write_profile, profiler, Path(args.profile))
+        if args.fleet:
+            from scripts import fleet
+
+            raise SystemExit(
+                fleet.main(
+                    Path(args.fleet),
+                    Path(__file__).resolve().parent.parent,
+                    fleet.FleetOptions(args.force, args.update, args.backup, args.mirror_runtime, args.jobs),
+                    args.fleet_workers,
+                    args.verbose,
+                    events,
+                )
+            )
+        _run_install(args, events, profiler)
+
+
+def _start_profiler(name: str) -> Profiler:
+    from scripts.profiling import Profiler
+
+    return Profiler(name)
+
+
+def _write_profile(profiler: Profiler, destination: Path) -> None:
+    try:
+        profiler.write(destination)
+    except OSError as error:
+        safe_print(f"⚠️  Profile 未寫入: {error}")
+        return
+    safe_print(f"📈 Profile written: {destination}")
+
+
+def _run_install(
+    args: argparse.Namespace, events: Optional[EventLog] = None, profiler: Optional[Profiler] = None
+) -> None:
     force_mode = args.force
     backup_mode = args.backup or args.update  # Always backup in update mode
 
@@ -2160,7 +3297,8 @@ def main() -> None:
     current_path = Path.cwd()
     template_source = repo_root / ".github"
     catalog_source_root = repo_root if (repo_root / COMPONENT_CATALOG_PATH).is_file() else None
-    manifest_result = load_install_manifest(current_path, source_root=catalog_source_root)
+    with profile_phase(profiler, "manifest-load"):
+        manifest_result = load_install_manifest(current_path, source_root=catalog_source_root)
     if manifest_result.state == "v3-validation-blocked":
         safe_print(f"❌ v3-validation-blocked: {manifest_result.manifest_path}")
         print(f"   catalog-unavailable: {manifest_result.detail}")
@@ -2181,6 +3319,41 @@ def main() -> None:
         return
     manifest_entries = manifest_result.entries
 
+    is_template_root = current_path.resolve() == repo_root.resolve()
+    hash_cache = None if is_template_root else HashCache.load(current_path)
+    render_cache = None if is_template_root else AgentRenderCache.load(current_path)
+    # A maintainer's working copy may be ahead of the shipped index.
+    source_index = None if is_template_root else SourceIndex.load(repo_root)
+    source_delta = None
+    if args.update and not is_template_root:
+        source_delta = SourceDelta.load(repo_root, manifest_result.source_ref)
+
+    if args.plan:
+        with profile_phase(profiler, "plan"):
+            plan = _plan_install_or_exit(
+                template_source,
+                repo_root,
+                current_path,
+                force_mode,
+                manifest_entries,
+                hash_cache,
+                args.jobs,
+                source_index,
+                args.mirror_runtime,
+                render_cache,
+                source_delta,
+                profiler,
+            )
+        if events is not None:
+            events.manifest_entries = manifest_entries
+            for action in plan.actions:
+                events.action(action, hash_cache, applied=False)
+            events.summary(plan.result(), hash_cache, applied=False)
+        safe_print("📋 Install plan (no files written)")
+        print()
+        write_sync_summary(plan.result(), verbose=args.verbose)
+        raise SystemExit(2 if plan.has_changes else 0)
+
     if args.update and not args.force:
         safe_print("ℹ️  Running --update mode (will preserve project customizations and create backup).")
 
@@ -2188,16 +3361,20 @@ def main() -> None:
     print()
 
     print("環境檢測:")
-    git_result = check_git_installed()
+    with profile_phase(profiler, "environment-checks"):
+        probe_cache = ToolProbeCache.load()
+        checks = probe_environment(probe_cache)
+        try:
+            probe_cache.save()
+        except OSError:
+            pass
+    git_result = checks["git"]
     write_check("Git", git_result, "https://git-scm.com/downloads", MIN_GIT)
-    python_result = check_python_version()
-    write_check("Python", python_result, "https://www.python.org/downloads/", MIN_PYTHON)
-    ps_result = check_powershell_version()
+    write_check("Python", checks["python"], "https://www.python.org/downloads/", MIN_PYTHON)
+    ps_result = checks["powershell"]
     write_check("PowerShell", ps_result, "https://aka.ms/powershell", MIN_POWERSHELL)
-    node_result = check_node_installed()
-    write_check("Node.js", node_result, "https://nodejs.org", MIN_NODE)
-    gh_result = check_github_cli_installed()
-    write_check("GitHub CLI", gh_result, "https://cli.github.com/", MIN_GHCLI)
+    write_check("Node.js", checks["node"], "https://nodejs.org", MIN_NODE)
+    write_check("GitHub CLI", checks["gh"], "https://cli.github.com/", MIN_GHCLI)
     print()
 
     if not git_result.installed:
@@ -2229,12 +3406,12 @@ def main() -> None:
         managed_paths = [
             path for path in PORTABLE_RUNTIME_PATHS if (current_path / path).exists()
         ]
-        has_changes = any(
-            check_git_uncommitted_changes(current_path, path)
-            for path in managed_paths
-        )
-        if has_changes:
+        dirty = git_dirty_paths(current_path, managed_paths)
+        if any(dirty.values()):
             safe_print("⚠️  檢測到 AI workflow 管理目錄有未提交的變更")
+            for path in managed_paths:
+                if dirty[path]:
+                    print(f"   - {path}")
             print("   建議先提交變更後再執行 --update")
             response = input("是否繼續更新? (y/n): ").strip().lower()
             if response != "y":
@@ -2246,77 +3423,81 @@ def main() -> None:
     print("同步工作流檔案...")
     print()
 
-    try:
-        sync_result = sync_workflow_files(
+    with profile_phase(profiler, "plan"):
+        plan = _plan_install_or_exit(
             template_source,
+            repo_root,
             current_path,
             force_mode,
             manifest_entries,
-            backup_mode,
-            constitution_source_root=repo_root,
+            hash_cache,
+            args.jobs,
+            source_index,
+            args.mirror_runtime,
+            render_cache,
+            source_delta,
+            profiler,
         )
-    except FileNotFoundError as error:
-        safe_print(f"❌ 檔案同步失敗: {error}")
-        sys.exit(1)
 
-    if backup_mode:
-        portable_backup_result = backup_managed_paths(current_path, PORTABLE_BACKUP_PATHS)
-        if portable_backup_result.backup_path:
-            if portable_backup_result.success:
-                safe_print(f"✅ {portable_backup_result.message}")
-            else:
-                safe_print(f"⚠️  {portable_backup_result.message}")
+    # A no-op refresh has nothing worth backing up.
+    if backup_mode and plan.has_changes:
+        with profile_phase(profiler, "backup"):
+            backup_result = BackupStore(current_path).snapshot(PORTABLE_RUNTIME_PATHS, hash_cache)
+        if not backup_result.success:
+            # The backup store is the only copy of what --update replaces, so
+            # nothing is applied without it.
+            safe_print(f"❌ {backup_result.message}")
+            sys.exit(1)
+        if backup_result.backup_path:
+            safe_print(f"✅ {backup_result.message}")
 
+    if events is not None:
+        plan.events = events
+        events.manifest_entries = manifest_entries
     try:
-        portable_result = install_portable_runtime(
-            repo_root,
-            current_path,
-            force_mode,
-            manifest_entries,
-        )
-    except (FileNotFoundError, ValueError) as error:
-        safe_print(f"❌ Portable runtime 安裝失敗: {error}")
+        with profile_phase(profiler, "apply"):
+            sync_result = apply_sync_plan(plan)
+    except (OSError, RuntimeError) as error:
+        safe_print(f"❌ 檔案同步失敗: {error}")
         sys.exit(1)
+    if events is not None:
+        events.summary(sync_result, hash_cache)
+    from scripts.portable_runtime import record_mirror_modes
 
-    sync_result = merge_sync_results(sync_result, portable_result)
-
-    if current_path.resolve() != repo_root.resolve():
-        write_install_manifest(current_path, repo_root, manifest_entries)
+    record_mirror_modes(plan, manifest_entries)
 
-    if sync_result.files_added:
-        safe_print(f"✅ 新增 {len(sync_result.files_added)} 個檔案")
-    if sync_result.files_updated:
-        safe_print(f"✅ 更新 {len(sync_result.files_updated)} 個檔案")
-    if sync_result.files_skipped:
-        safe_print(
-            f"⏭️  跳過 {len(sync_result.files_skipped)} 個檔案（保留既有客製、排除項或內容相同）"
-        )
-    if sync_result.files_conflicted:
-        safe_print(f"⚠️  偵測到 {len(sync_result.files_conflicted)} 個衝突檔案（內容不同但未覆蓋）")
-        if args.verbose:
-            for file in sync_result.files_conflicted:
-                print(f"   - {file}")
+    if not is_template_root:
+        with profile_phase(profiler, "manifest-write"):
+            write_install_manifest(current_path, repo_root, manifest_entries)
+        with profile_phase(profiler, "cache-save"):
+            try:
+                hash_cache.save()
+                render_cache.save()
+            except OSError as error:
+                safe_print(f"⚠️  Hash cache 未更新: {error}")
+
+    write_sync_summary(sync_result, verbose=args.verbose)
+    if args.verbose and hash_cache is not None:
+        print(f"Hash cache: {hash_cache.hits} hits, {hash_cache.misses} misses")
+        if source_index is not None:
+            print(f"Source index: {source_index.hits} hits, {source_index.stale} stale")
+        if render_cache is not None:
+            print(f"Agent render cache: {render_cache.hits} hits, {render_cache.misses} misses")
+        if source_delta is not None:
+            print(
+                f"Source delta since {source_delta.source_ref}: {len(source_delta.changed)} changed paths, "
+                f"{plan.delta_hits} files trusted"
+            )
+        elif args.update:
+            print("Source delta: unavailable, compared every path")
         print()
-        print("提示：使用 --force 參數強制覆蓋模板管理的衝突檔案")
-    print()
-
-    if args.verbose:
-        if sync_result.files_added:
-            print("新增的檔案:")
-            for item in sync_result.files_added:
-                print(f"  + {item}")
-            print()
-        if sync_result.files_updated:
-            print("更新的檔案:")
-            for item in sync_result.files_updated:
-                print(f"  ~ {item}")
-            print()
 
     print("檢查 Git 初始化...")
     print()
 
     try:
-        git_init = initialize_git_repo(current_path)
+        with profile_phase(profiler, "git-init"):
+            git_init = initialize_git_repo(current_path)
         if git_init.is_new:
             safe_print("✅ Git repository 已初始化")
         else:
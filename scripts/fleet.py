@@ -0,0 +1,380 @@
+"""Fleet installs: sync one template checkout into many adopter repositories.
+
+The Production Schema, Component Catalog and source tree index are loaded
+and validated once in the parent process and handed to a process pool; each
+target is then planned, backed up, applied and recorded exactly as a
+single-target bootstrap run would, except that nothing prompts: targets that
+would need an answer are skipped and reported instead.
+
+scripts.bootstrap imports this module only for --fleet.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from scripts.bootstrap import (
+    COMPONENT_CATALOG_PATH,
+    PORTABLE_RUNTIME_PATHS,
+    AgentRenderCache,
+    BackupStore,
+    EventLog,
+    HashCache,
+    ManifestValidationError,
+    SourceDelta,
+    SourceIndex,
+    SyncPlan,
+    SyncResult,
+    apply_sync_plan,
+    check_git_installed,
+    git_dirty_paths,
+    initialize_git_repo,
+    load_install_manifest,
+    plan_workflow_files,
+    safe_print,
+    template_source_ref,
+    write_install_manifest,
+)
+from scripts.portable_runtime import plan_portable_runtime, record_mirror_modes
+
+FLEET_STATUSES = ("synced", "unchanged", "skipped", "failed")
+
+
+@dataclass
+class FleetOptions:
+    force: bool = False
+    update: bool = False
+    backup: bool = False
+    mirror: bool = False
+    jobs: int = 1
+    # Collect --events lines per target; the parent writes them as targets finish.
+    events: bool = False
+
+
+@dataclass
+class FleetSource:
+    """Template state shared by every target of one fleet run.
+
+    Everything here is plain data so it can be pickled once per worker
+    process rather than re-read from the template checkout per target.
+    """
+
+    repo_root: Path
+    source_files: Dict[str, dict]
+    source_ref: str
+    catalog: Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]] = None
+    _deltas: Dict[Optional[str], Optional[SourceDelta]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def load(cls, repo_root: Path) -> "FleetSource":
+        """Validate and index repo_root; raises ManifestValidationError on a bad catalog."""
+        catalog = None
+        if (repo_root / COMPONENT_CATALOG_PATH).is_file():
+            from scripts import manifest_v3
+
+            catalog = manifest_v3.preload_source_validation(repo_root)
+        # A stale or missing shipped index is rebuilt in memory once for the whole fleet,
+        # and entries Git cannot prove current are rehashed before workers trust them.
+        index = SourceIndex.load(repo_root)
+        files = index.fresh_files() if index is not None else SourceIndex.build(repo_root).files
+        source_ref = template_source_ref(repo_root)
+        return cls(repo_root, files, source_ref or "unknown", catalog)
+
+    def delta(self, source_ref: Optional[str]) -> Optional[SourceDelta]:
+        """Return the SourceDelta since source_ref, loading each ref once per process."""
+        if source_ref not in self._deltas:
+            self._deltas[source_ref] = SourceDelta.load(self.repo_root, source_ref)
+        return self._deltas[source_ref]
+
+    @property
+    def catalog_source_root(self) -> Optional[Path]:
+        return self.repo_root if self.catalog is not None else None
+
+    def activate(self) -> None:
+        """Seed this process's v3 validation with the parent's validated catalog."""
+        if self.catalog is not None:
+            from scripts import manifest_v3
+
+            manifest_v3.preload_source_validation(self.repo_root, self.catalog)
+
+
+@dataclass
+class FleetTargetResult:
+    target: str
+    status: str
+    message: str = ""
+    result: Optional[SyncResult] = None
+    notes: List[str] = field(default_factory=list)
+    events: str = ""
+
+
+def read_fleet_targets(list_path: Path) -> List[Path]:
+    """Return the target roots listed one per line in list_path.
+
+    Blank lines and lines starting with '#' are ignored, relative paths are
+    resolved against the list file's directory, and duplicates are dropped.
+    """
+    targets: List[Path] = []
+    seen = set()
+    for line in list_path.read_text(encoding="utf-8").splitlines():
+        entry = line.strip()
+        if not entry or entry.startswith("#"):
+            continue
+        path = Path(entry).expanduser()
+        if not path.is_absolute():
+            path = list_path.parent / path
+        path = path.resolve()
+        if path not in seen:
+            seen.add(path)
+            targets.append(path)
+    return targets
+
+
+def install_target(target_root: Path, source: FleetSource, options: FleetOptions) -> FleetTargetResult:
+    """Install or update one fleet target without prompting."""
+    label = str(target_root)
+    if not target_root.is_dir():
+        return FleetTargetResult(label, "failed", "target directory not found")
+    if target_root.resolve() == source.repo_root.resolve():
+        return FleetTargetResult(label, "skipped", "target is the template repository itself")
+
+    manifest_result = load_install_manifest(target_root, source_root=source.catalog_source_root)
+    if manifest_result.state == "valid-v3":
+        return FleetTargetResult(label, "failed", "manifest-v3-writer-disabled: the v3 Manifest was left untouched")
+    if manifest_result.state in {"v3-validation-blocked", "corrupt", "unsupported"}:
+        detail = manifest_result.detail or f"schema version {manifest_result.schema_version}"
+        return FleetTargetResult(label, "failed", f"{manifest_result.state} install manifest: {detail}")
+    if options.update and manifest_result.state == "missing":
+        return FleetTargetResult(
+            label, "skipped", "legacy project manifest is missing; update is report-only for this target"
+        )
+    if options.update and not options.force:
+        managed_paths = [path for path in PORTABLE_RUNTIME_PATHS if (target_root / path).exists()]
+        dirty = [path for path, changed in git_dirty_paths(target_root, managed_paths).items() if changed]
+        if dirty:
+            return FleetTargetResult(
+                label, "skipped", f"uncommitted changes in {', '.join(dirty)}; commit them or pass --force"
+            )
+    manifest_entries = manifest_result.entries
+
+    hash_cache = HashCache.load(target_root)
+    render_cache = AgentRenderCache.load(target_root)
+    plan = SyncPlan(hash_cache, options.jobs, SourceIndex(source.repo_root, source.source_files, verified=True), render_cache)
+    if options.events:
+        plan.events = EventLog(io.StringIO(), {"target": label})
+        plan.events.manifest_entries = manifest_entries
+    if options.update:
+        delta = source.delta(manifest_result.source_ref)
+        if delta is not None:
+            plan.use_source_delta(delta, target_root, manifest_entries)
+    try:
+        plan_workflow_files(
+            plan,
+            source.repo_root / ".github",
+            target_root,
+            options.force,
+            manifest_entries,
+            constitution_source_root=source.repo_root,
+        )
+        plan_portable_runtime(plan, source.repo_root, target_root, options.force, manifest_entries, options.mirror)
+    except (FileNotFoundError, ValueError) as error:
+        return FleetTargetResult(label, "failed", f"planning failed: {error}")
+
+    notes: List[str] = []
+    if (options.backup or options.update) and plan.has_changes:
+        backup_result = BackupStore(target_root).snapshot(PORTABLE_RUNTIME_PATHS, hash_cache)
+        if not backup_result.success:
+            return FleetTargetResult(label, "failed", f"backup failed, nothing applied: {backup_result.message}")
+        if backup_result.backup_path:
+            notes.append(backup_result.message)
+
+    try:
+        sync_result = apply_sync_plan(plan)
+    except (OSError, RuntimeError) as error:
+        return FleetTargetResult(label, "failed", f"sync failed: {error}", notes=notes, events=_event_text(plan))
+    record_mirror_modes(plan, manifest_entries)
+    write_install_manifest(target_root, source.repo_root, manifest_entries, source.source_ref)
+    try:
+        hash_cache.save()
+        render_cache.save()
+    except OSError as error:
+        notes.append(f"hash cache not updated: {error}")
+    try:
+        if initialize_git_repo(target_root).is_new:
+            notes.append("git repository initialized")
+    except RuntimeError as error:
+        notes.append(f"git init failed: {error}")
+
+    status = "synced" if sync_result.files_added or sync_result.files_updated else "unchanged"
+    if plan.events is not None:
+        plan.events.summary(sync_result, hash_cache, status=status)
+    return FleetTargetResult(label, status, result=sync_result, notes=notes, events=_event_text(plan))
+
+
+def _event_text(plan: SyncPlan) -> str:
+    return plan.events.stream.getvalue() if plan.events is not None else ""
+
+
+# Per-worker state installed by _init_worker.
+_WORKER_SOURCE: Optional[FleetSource] = None
+_WORKER_OPTIONS: Optional[FleetOptions] = None
+
+
+def _init_worker(source: FleetSource, options: FleetOptions) -> None:
+    global _WORKER_SOURCE, _WORKER_OPTIONS
+    source.activate()
+    _WORKER_SOURCE = source
+    _WORKER_OPTIONS = options
+
+
+def _install_in_worker(target_root: Path) -> FleetTargetResult:
+    # Planner messages are kept with their target instead of interleaving
+    # on the shared terminal.
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            target_result = install_target(target_root, _WORKER_SOURCE, _WORKER_OPTIONS)
+    except (OSError, RuntimeError, ValueError) as error:
+        target_result = FleetTargetResult(str(target_root), "failed", str(error))
+    except Exception as error:
+        # Any other failure is still this target's alone; the rest of the fleet runs on.
+        target_result = FleetTargetResult(str(target_root), "failed", f"{type(error).__name__}: {error}")
+    target_result.notes[:0] = [line.strip() for line in output.getvalue().splitlines() if line.strip()]
+    return target_result
+
+
+def run_fleet(
+    targets: Sequence[Path],
+    source: FleetSource,
+    options: FleetOptions,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[FleetTargetResult], None]] = None,
+) -> List[FleetTargetResult]:
+    """Install every target, in parallel processes when workers > 1.
+
+    on_result is called in this process as each target finishes, in
+    completion order; the returned list keeps target order.
+    """
+    if workers is None:
+        workers = min(len(targets), os.cpu_count() or 1)
+    if workers <= 1 or len(targets) <= 1:
+        _init_worker(source, options)
+        results = []
+        for target in targets:
+            results.append(_install_in_worker(target))
+            if on_result is not None:
+                on_result(results[-1])
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(source, options)
+    ) as executor:
+        futures = {executor.submit(_install_in_worker, target): index for index, target in enumerate(targets)}
+        ordered: List[Optional[FleetTargetResult]] = [None] * len(targets)
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                ordered[index] = future.result()
+            except Exception as error:
+                # A worker that died (OOM kill, crash) breaks the pool; every
+                # target still pending then completes here as failed.
+                ordered[index] = FleetTargetResult(str(targets[index]), "failed", f"{type(error).__name__}: {error}")
+            if on_result is not None:
+                on_result(ordered[index])
+    return [item for item in ordered if item is not None]
+
+
+def write_fleet_summary(results: Sequence[FleetTargetResult], verbose: bool = False) -> None:
+    counts = {status: 0 for status in FLEET_STATUSES}
+    totals = [0, 0, 0, 0]
+    for item in results:
+        counts[item.status] += 1
+        if item.result is not None:
+            totals[0] += len(item.result.files_added)
+            totals[1] += len(item.result.files_updated)
+            totals[2] += len(item.result.files_skipped)
+            totals[3] += len(item.result.files_conflicted)
+
+    icons = {"synced": "✅", "unchanged": "ℹ️ ", "skipped": "⏭️ ", "failed": "❌"}
+    for item in results:
+        if item.result is not None:
+            result = item.result
+            line = (
+                f"+{len(result.files_added)} ~{len(result.files_updated)} "
+                f"={len(result.files_skipped)} !{len(result.files_conflicted)}"
+            )
+        else:
+            line = item.message
+        safe_print(f"{icons[item.status]} {item.target}: {line}")
+        for note in item.notes:
+            print(f"   {note}")
+        if verbose and item.result is not None:
+            for prefix, files in (
+                ("+", item.result.files_added),
+                ("~", item.result.files_updated),
+                ("!", item.result.files_conflicted),
+            ):
+                for file in files:
+                    print(f"   {prefix} {file}")
+    print()
+    safe_print(
+        f"🚢 Fleet: {len(results)} targets — "
+        + ", ".join(f"{counts[status]} {status}" for status in FLEET_STATUSES)
+    )
+    print(
+        f"   Files: {totals[0]} added, {totals[1]} updated, {totals[2]} skipped, {totals[3]} conflicted"
+    )
+    if totals[3]:
+        print("提示：使用 --force 參數強制覆蓋模板管理的衝突檔案")
+    print()
+
+
+def main(
+    list_path: Path,
+    repo_root: Path,
+    options: FleetOptions,
+    workers: Optional[int],
+    verbose: bool,
+    events: Optional[EventLog] = None,
+) -> int:
+    """Run a fleet install from the CLI; returns the process exit status."""
+    try:
+        targets = read_fleet_targets(list_path)
+    except (OSError, UnicodeError) as error:
+        safe_print(f"❌ Fleet list unreadable: {error}")
+        return 1
+    if not targets:
+        safe_print(f"❌ Fleet list has no targets: {list_path}")
+        return 1
+    if not check_git_installed().installed:
+        safe_print("❌ Git is required but not found.")
+        return 1
+    try:
+        source = FleetSource.load(repo_root)
+    except ManifestValidationError as error:
+        safe_print(f"❌ {error.category}: {error.detail}")
+        print("   Fleet aborted before any target was touched.")
+        return 1
+
+    safe_print(f"🚢 Syncing {len(targets)} targets from {repo_root}")
+    print()
+    on_result = None
+    if events is not None:
+        options.events = True
+
+        def on_result(item: FleetTargetResult) -> None:
+            if item.events:
+                events.write_lines(item.events)
+            else:
+                events.emit("target", target=item.target, status=item.status, message=item.message or None)
+
+    results = run_fleet(targets, source, options, workers, on_result)
+    write_fleet_summary(results, verbose=verbose)
+    return 1 if any(item.status == "failed" for item in results) else 0
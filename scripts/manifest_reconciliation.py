@@ -31,6 +31,10 @@ def _digest_bytes(value: bytes) -> str:
     return "sha256:" + hashlib.sha256(value).hexdigest()
 
 
+def _digest_file(path: Path) -> str:
+    return "sha256:" + bootstrap.calculate_file_hash(path)
+
+
 def _canonical(value: Any) -> bytes:
     if not isinstance(value, dict):
         raise ValueError("canonical report must be an object")
@@ -62,11 +66,15 @@ def _safe_path(root: Path, relative: str) -> Optional[Path]:
     return candidate
 
 
-def _path_digest(root: Path, relative: str) -> Optional[str]:
+def _path_digest(root: Path, relative: str, source_index: Optional[bootstrap.SourceIndex] = None) -> Optional[str]:
     path = _safe_path(root, relative)
     if path is None or not path.is_file():
         return None
-    return _digest_bytes(path.read_bytes())
+    if source_index is not None:
+        digest = source_index.file_hash(path)
+        if digest is not None:
+            return digest
+    return _digest_file(path)
 
 
 def _read_json(path: Path) -> Tuple[Optional[Any], Optional[str]]:
@@ -78,48 +86,26 @@ def _read_json(path: Path) -> Tuple[Optional[Any], Optional[str]]:
         return None, "corrupt"
 
 
-def _source_evidence(source_root: Path) -> Tuple[Dict[str, dict], Optional[bytes], Optional[bytes], Optional[str]]:
-    schema_path = source_root / bootstrap.PRODUCTION_MANIFEST_SCHEMA
-    catalog_path = source_root / bootstrap.COMPONENT_CATALOG_PATH
-    try:
-        schema_bytes = schema_path.read_bytes()
-    except (OSError, UnicodeError):
-        return {}, None, None, "schema-missing"
-    try:
-        catalog_bytes = catalog_path.read_bytes()
-    except (OSError, UnicodeError):
-        return {}, schema_bytes, None, "catalog-missing"
-    try:
-        schema_bytes.decode("utf-8")
-        catalog_bytes.decode("utf-8")
-        bootstrap._load_and_validate_production_schema(source_root)
-        catalog, records, _ = bootstrap._load_and_validate_component_catalog(source_root)
-    except UnicodeError:
-        return {}, schema_bytes, catalog_bytes, "source-utf8"
-    except (json.JSONDecodeError, bootstrap.ManifestValidationError):
-        return {}, schema_bytes, catalog_bytes, "source-invalid"
-    except (OSError, KeyError, TypeError, ValueError):
-        return {}, schema_bytes, catalog_bytes, "source-invalid"
-    return records, schema_bytes, catalog_bytes, None
-
-
-def _tree_snapshot(root: Path) -> dict:
+def _tree_snapshot(root: Path, known_digests: Optional[Dict[str, str]] = None) -> dict:
+    """Inventory root; known_digests supplies already-hashed files by relative path."""
+    known_digests = known_digests or {}
     files = []
     directories = []
     links = []
     if root.exists():
-        for path in sorted(root.rglob("*"), key=lambda item: item.relative_to(root).as_posix()):
-            relative = path.relative_to(root).as_posix()
+        entries = sorted(bootstrap.walk_tree(root, include_directories=True), key=lambda entry: entry.relative)
+        for entry in entries:
             try:
-                stat = path.lstat()
+                stat = entry.lstat()
             except OSError:
                 continue
-            if path.is_symlink():
-                links.append({"path": relative, "target": os.readlink(path)})
-            elif path.is_dir():
-                directories.append(relative)
-            elif path.is_file():
-                files.append({"path": relative, "digest": _digest_bytes(path.read_bytes()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+            if entry.is_symlink:
+                links.append({"path": entry.relative, "target": os.readlink(entry.path)})
+            elif entry.is_dir:
+                directories.append(entry.relative)
+            elif entry.dir_entry.is_file():
+                digest = known_digests.get(entry.relative) or _digest_file(entry.path)
+                files.append({"path": entry.relative, "digest": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
     return {"files": files, "directories": directories, "links": links, "git_present": (root / ".git").exists()}
 
 
@@ -150,13 +136,16 @@ def _forbidden_artifacts(snapshot: dict) -> list:
     return sorted(item["path"] for item in snapshot["files"] if any(fnmatch.fnmatch(item["path"], pattern) for pattern in names))
 
 
-def _manifest_state(source_root: Path, target_root: Path) -> Tuple[bootstrap.ManifestLoadResult, Optional[bytes]]:
+def _manifest_state(evidence: bootstrap.SourceEvidence, target_root: Path) -> Tuple[bootstrap.ManifestLoadResult, Optional[bytes]]:
     path = target_root / bootstrap.MANIFEST_FILENAME
     try:
-        raw = path.read_bytes()
+        raw: Optional[bytes] = path.read_bytes()
     except FileNotFoundError:
-        return bootstrap.load_install_manifest(target_root, source_root=source_root), None
-    return bootstrap.load_install_manifest(target_root, source_root=source_root), raw
+        raw = None
+    result = bootstrap.load_install_manifest(
+        target_root, source_root=evidence.root, record_validation=False, source_evidence=evidence
+    )
+    return result, raw
 
 
 def _classification(record: Optional[dict], catalog_record: dict, target_hash: Optional[str], source_hash: Optional[str]) -> Tuple[str, str, str]:
@@ -180,9 +169,9 @@ def _classification(record: Optional[dict], catalog_record: dict, target_hash: O
     return "unknown", "insufficient-byte-proof", "report"
 
 
-def _decision(component_id: str, catalog_record: dict, record: Optional[dict], source_root: Path, target_root: Path, state: str) -> dict:
+def _decision(component_id: str, catalog_record: dict, record: Optional[dict], source_root: Path, target_root: Path, state: str, source_index: Optional[bootstrap.SourceIndex] = None) -> dict:
     relative = catalog_record["canonical_source_path"]
-    source_hash = _path_digest(source_root, relative)
+    source_hash = _path_digest(source_root, relative, source_index)
     target_hash = _path_digest(target_root, relative)
     previous_hashes = {old: _path_digest(target_root, old) for old in sorted(catalog_record.get("previous_paths", []))}
     classification, basis, action = _classification(record, catalog_record, target_hash, source_hash) if state == "valid-v3" else ("legacy", "compatibility-reader", "report")
@@ -231,26 +220,33 @@ def _decision(component_id: str, catalog_record: dict, record: Optional[dict], s
 def _inventory(root: Path) -> list:
     if not root.exists():
         return []
-    return sorted(p.relative_to(root).as_posix() for p in root.rglob("*") if p.is_file())
+    return sorted(entry.relative for entry in bootstrap.walk_tree(root) if entry.dir_entry.is_file())
 
 
-def build_report(source_root: Path, target_root: Path, operation: str) -> Dict[str, Any]:
+def build_report(source_root: Path, target_root: Path, operation: str, profiler: Optional[Any] = None) -> Dict[str, Any]:
     if operation not in OPERATIONS:
         raise ValueError("operation must be conversion-plan or reconcile")
     source_root = Path(source_root).resolve()
     target_root = Path(target_root).resolve()
-    target_before = _tree_snapshot(target_root)
-    source_before = _tree_snapshot(source_root)
+    # The Schema and Catalog are read, parsed and digested once here; the
+    # source snapshot, the v3 validator and the decisions all reuse them.
+    with bootstrap.profile_phase(profiler, "source-evidence"):
+        evidence = bootstrap.SourceEvidence.load(source_root)
+    with bootstrap.profile_phase(profiler, "snapshot-before"):
+        target_before = _tree_snapshot(target_root)
+        source_before = _tree_snapshot(source_root, evidence.file_digests())
     manifest_path = target_root / bootstrap.MANIFEST_FILENAME
     try:
         manifest_bytes = manifest_path.read_bytes()
     except FileNotFoundError:
         manifest_bytes = None
-    catalog_records, schema_bytes, catalog_bytes, source_error = _source_evidence(source_root)
+    source_error = evidence.error
+    catalog_records = evidence.records
     if source_error:
         manifest_result = bootstrap.ManifestLoadResult("source-blocked", {}, None, source_error, manifest_path, source_error, False)
     else:
-        manifest_result, manifest_bytes = _manifest_state(source_root, target_root)
+        with bootstrap.profile_phase(profiler, "manifest-state"):
+            manifest_result, manifest_bytes = _manifest_state(evidence, target_root)
     state = manifest_result.state
     blocking = []
     if source_error:
@@ -258,23 +254,26 @@ def build_report(source_root: Path, target_root: Path, operation: str) -> Dict[s
     if state in {"corrupt", "unsupported", "v3-validation-blocked"}:
         blocking.append({"code": manifest_result.diagnostic_category or "manifest-blocked", "detail": "manifest cannot be planned"})
     records = manifest_result.entries if state in {"valid-v3", "valid-v1", "valid-v2"} else {}
+    source_index = bootstrap.SourceIndex.load(source_root) if not source_error else None
     mapped = []
     unmapped = []
-    if state in {"valid-v3", "valid-v1", "valid-v2"}:
-        if state == "valid-v3":
-            for cid in sorted(catalog_records):
-                mapped.append(_decision(cid, catalog_records[cid], records.get(cid), source_root, target_root, state))
-        else:
-            catalog_by_path = {item["canonical_source_path"]: (cid, item) for cid, item in catalog_records.items()}
-            for name in sorted(records):
-                if name in catalog_by_path:
-                    cid, item = catalog_by_path[name]
-                    mapped.append(_decision(cid, item, None, source_root, target_root, state))
-                else:
-                    unmapped.append({"record": name, "classification": "unknown", "reason": "no-exact-catalog-path"})
+    with bootstrap.profile_phase(profiler, "decisions"):
+        if state in {"valid-v3", "valid-v1", "valid-v2"}:
+            if state == "valid-v3":
+                for cid in sorted(catalog_records):
+                    mapped.append(_decision(cid, catalog_records[cid], records.get(cid), source_root, target_root, state, source_index))
+            else:
+                catalog_by_path = {item["canonical_source_path"]: (cid, item) for cid, item in catalog_records.items()}
+                for name in sorted(records):
+                    if name in catalog_by_path:
+                        cid, item = catalog_by_path[name]
+                        mapped.append(_decision(cid, item, None, source_root, target_root, state, source_index))
+                    else:
+                        unmapped.append({"record": name, "classification": "unknown", "reason": "no-exact-catalog-path"})
     before_inventory = [item["path"] for item in target_before["files"]]
-    source_after = _tree_snapshot(source_root)
-    target_after = _tree_snapshot(target_root)
+    with bootstrap.profile_phase(profiler, "snapshot-after"):
+        source_after = _tree_snapshot(source_root)
+        target_after = _tree_snapshot(target_root)
     inventory_unchanged = _stable_snapshot(target_before) == _stable_snapshot(target_after)
     timestamps_unchanged = _timestamp_index(target_before) == _timestamp_index(target_after)
     link_metadata_unchanged = target_before.get("links") == target_after.get("links")
@@ -295,8 +294,8 @@ def build_report(source_root: Path, target_root: Path, operation: str) -> Dict[s
         blocking.append({"code": "no-write-proof-failed", "detail": "pre/post snapshots changed during report-only execution"})
     snapshot = {
         "manifest_digest": _digest_bytes(manifest_bytes) if manifest_bytes is not None else None,
-        "source_schema_digest": _digest_bytes(schema_bytes) if schema_bytes is not None else None,
-        "source_catalog_digest": _digest_bytes(catalog_bytes) if catalog_bytes is not None else None,
+        "source_schema_digest": evidence.schema_digest,
+        "source_catalog_digest": evidence.catalog_digest,
         "target_inventory": before_inventory,
         "target_hashes": {d["component_identity"]["path"]: d["observed_hash"] for d in mapped},
     }
@@ -309,7 +308,7 @@ def build_report(source_root: Path, target_root: Path, operation: str) -> Dict[s
         "manifest_parse_state": {"state": state, "schema_version": manifest_result.schema_version, "diagnostic_category": manifest_result.diagnostic_category},
         "plan_identity": {"report_contract_version": REPORT_CONTRACT_VERSION, "tool_version": TOOL_VERSION, "operation": operation, "input_manifest_digest": snapshot["manifest_digest"], "source_release_id": bootstrap.COMPONENT_CATALOG_RELEASE_ID if not source_error else None, "selected_component_ids": [d["component_identity"]["id"] for d in mapped], "normalized_input_snapshot_identity": snapshot_digest},
         "report_identity": {"report_id": None, "canonical_body_digest": None},
-        "source": {"source_release_id": bootstrap.COMPONENT_CATALOG_RELEASE_ID if not source_error else None, "schema_path": bootstrap.PRODUCTION_MANIFEST_SCHEMA.as_posix(), "schema_digest": _digest_bytes(schema_bytes) if schema_bytes is not None else None, "catalog_path": bootstrap.COMPONENT_CATALOG_PATH.as_posix(), "catalog_digest": _digest_bytes(catalog_bytes) if catalog_bytes is not None else None},
+        "source": {"source_release_id": bootstrap.COMPONENT_CATALOG_RELEASE_ID if not source_error else None, "schema_path": bootstrap.PRODUCTION_MANIFEST_SCHEMA.as_posix(), "schema_digest": evidence.schema_digest, "catalog_path": bootstrap.COMPONENT_CATALOG_PATH.as_posix(), "catalog_digest": evidence.catalog_digest},
         "normalized_input_snapshot_identity": {"digest": snapshot_digest, "inventory": before_inventory},
         "mapped_component_decisions": sorted(mapped, key=lambda item: item["component_identity"]["id"]),
         "unmapped_records": sorted(unmapped, key=lambda item: item["record"]),
@@ -323,8 +322,8 @@ def build_report(source_root: Path, target_root: Path, operation: str) -> Dict[s
     return report
 
 
-def emit_report(source_root: Path, target_root: Path, operation: str) -> int:
-    report = build_report(source_root, target_root, operation)
+def emit_report(source_root: Path, target_root: Path, operation: str, profiler: Optional[Any] = None) -> int:
+    report = build_report(source_root, target_root, operation, profiler)
     sys.stdout.buffer.write(json.dumps(report, ensure_ascii=False, separators=(",", ":"), sort_keys=False).encode("utf-8") + b"\n")
     return 0
 
@@ -0,0 +1,1348 @@
+"""Manifest v3 and component-catalog validation for the bootstrap installer.
+
+scripts.bootstrap imports this module on demand: load_install_manifest when
+it meets a v3 manifest, and the report-only planner. Ordinary v1/v2 installs
+never compile these validators or their regular expressions. Manifest
+structure is checked by validators compiled from the Production Schema
+(scripts.schema_compiler); the hand-written checks here add the semantics.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from scripts import bootstrap
+from scripts.bootstrap import (
+    COMPONENT_CATALOG_PATH,
+    COMPONENT_CATALOG_RELEASE_ID,
+    COMPONENT_CATALOG_SCHEMA_VERSION,
+    COMPONENT_CATALOG_VERSION,
+    PRODUCTION_MANIFEST_SCHEMA,
+    _HASH_PATTERN,
+    ManifestValidationError,
+    _write_cache_file,
+    hash_bytes,
+    user_cache_dir,
+)
+
+if TYPE_CHECKING:
+    from scripts.schema_compiler import CompiledSchema
+
+
+_COMPONENT_ID_PATTERN = re.compile(r"^cmp:[a-z0-9][a-z0-9._-]{2,127}$")
+_TRANSACTION_ID_PATTERN = re.compile(r"^txn:[a-z0-9][a-z0-9._-]{2,127}$")
+_TIMESTAMP_PATTERN = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,9}))?Z$"
+)
+_RELATIVE_PATH_PATTERN = re.compile(r"^[A-Za-z0-9@+_.-]+(?:/[A-Za-z0-9@+_.-]+)*$")
+_DRIVE_PREFIX_PATTERN = re.compile(r"[A-Za-z]:/")
+_WINDOWS_RESERVED_NAMES = {
+    "con", "prn", "aux", "nul",
+    *(f"com{index}" for index in range(1, 10)),
+    *(f"lpt{index}" for index in range(1, 10)),
+}
+_FORK_MAPPING = {
+    "untouched": ("verified-managed-equality", "manage"),
+    "customized": ("hash-divergence", "preserve"),
+    "project-owned": ("explicit-project-ownership", "preserve"),
+    "legacy": ("legacy-import", "report-only"),
+    "unknown": ("missing-lineage", "report-only"),
+    "derived-customized": ("derived-hash-divergence", "preserve"),
+    "conflicted": ("conflicting-evidence", "block"),
+    "not-applicable": ("hash-not-applicable", "report-only"),
+}
+
+# Bump when validation rules change without this file changing (the cache key
+# also covers this file's own bytes).
+MANIFEST_V3_VALIDATOR_VERSION = 1
+VALIDATION_CACHE_FILENAME = "manifest-v3-validation.json"
+VALIDATION_CACHE_VERSION = 1
+VALIDATION_CACHE_LIMIT = 256
+
+# Valid timestamps parsed so far; Manifests repeat a handful of them.
+_TIMESTAMP_KEYS: Dict[str, Tuple[int, ...]] = {}
+_TIMESTAMP_KEY_LIMIT = 4096
+
+# Longer cycles are reported with their middle elided.
+CYCLE_PATH_DISPLAY_LIMIT = 32
+
+# Resolved source root -> validated Component Catalog, see preload_source_validation.
+_PRELOADED_CATALOGS: Dict[str, Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]] = {}
+
+_ROLE_OWNERSHIP = {
+    "canonical": "template-managed",
+    "generated": "derived-runtime",
+    "project-owned": "project-owned",
+    "compatibility": "legacy-compat",
+}
+_ROLE_SOURCE_KIND = {
+    "canonical": "template",
+    "generated": "generated",
+    "project-owned": "project",
+    "compatibility": "legacy",
+}
+
+
+def _validation_error(category: str, detail: str) -> None:
+    raise ManifestValidationError(category, detail)
+
+
+def _exact_object(
+    value: Any, expected_keys: Set[str], category: str, label: str
+) -> Dict[str, Any]:
+    if not isinstance(value, dict):
+        _validation_error(category, f"{label} must be an object.")
+    observed = set(value)
+    if observed != expected_keys:
+        missing = sorted(expected_keys - observed)
+        unknown = sorted(observed - expected_keys)
+        _validation_error(
+            category,
+            f"{label} has invalid properties; missing={missing}, unknown={unknown}.",
+        )
+    return value
+
+
+def _validate_component_id(value: Any, category: str, label: str) -> str:
+    if not isinstance(value, str) or not _COMPONENT_ID_PATTERN.fullmatch(value):
+        _validation_error(category, f"{label} is not a valid component ID.")
+    return value
+
+
+def _validate_optional_component_id(value: Any, category: str, label: str) -> Optional[str]:
+    if value is None:
+        return None
+    return _validate_component_id(value, category, label)
+
+
+def _validate_relative_path(value: Any, category: str, label: str) -> str:
+    if not isinstance(value, str) or not value or len(value) > 512:
+        _validation_error(category, f"{label} must be a non-empty relative path.")
+    if (
+        not _RELATIVE_PATH_PATTERN.fullmatch(value)
+        or value.startswith("/")
+        or "\\" in value
+        or ":" in value
+        or "//" in value
+    ):
+        _validation_error(category, f"{label} contains unsafe path syntax.")
+    return _check_path_segments(value, category, label)
+
+
+def _check_path_segments(value: str, category: str, label: str) -> str:
+    for segment in value.split("/"):
+        if segment in {".", ".."} or segment.endswith((".", " ")):
+            _validation_error(category, f"{label} contains an unsafe path segment.")
+        base_name = segment.split(".", 1)[0].lower()
+        if base_name in _WINDOWS_RESERVED_NAMES:
+            _validation_error(category, f"{label} contains a Windows reserved name.")
+    return value
+
+
+def _validate_hash(value: Any, category: str, label: str) -> Optional[str]:
+    if value is None:
+        return None
+    if not isinstance(value, str) or not _HASH_PATTERN.fullmatch(value):
+        _validation_error(category, f"{label} must be null or a lowercase SHA-256 digest.")
+    return value
+
+
+def _timestamp_key(value: Any, category: str, label: str) -> Tuple[int, ...]:
+    if not isinstance(value, str):
+        _validation_error(category, f"{label} must be a UTC timestamp.")
+    cached = _TIMESTAMP_KEYS.get(value)
+    if cached is not None:
+        return cached
+    match = _TIMESTAMP_PATTERN.fullmatch(value)
+    if not match:
+        _validation_error(category, f"{label} must use canonical UTC Z syntax.")
+    parts = [int(part) for part in match.groups()[:6]]
+    fraction = (match.group(7) or "").ljust(9, "0")
+    try:
+        datetime(*parts)
+    except ValueError:
+        _validation_error(category, f"{label} is not a real calendar timestamp.")
+    key = tuple(parts + [int(fraction or "0")])
+    if len(_TIMESTAMP_KEYS) >= _TIMESTAMP_KEY_LIMIT:
+        _TIMESTAMP_KEYS.clear()
+    _TIMESTAMP_KEYS[value] = key
+    return key
+
+
+def _validate_sorted_unique_strings(
+    value: Any,
+    category: str,
+    label: str,
+    *,
+    component_ids: bool = False,
+    paths: bool = False,
+    max_items: int = 64,
+) -> List[str]:
+    if not isinstance(value, list) or len(value) > max_items:
+        _validation_error(category, f"{label} must be an array with at most {max_items} items.")
+    if any(not isinstance(item, str) for item in value):
+        _validation_error(category, f"{label} must contain only strings.")
+    if value != sorted(value) or len(set(value)) != len(value):
+        _validation_error(category, f"{label} must be sorted and duplicate-free.")
+    for item in value:
+        if component_ids:
+            _validate_component_id(item, category, label)
+        if paths:
+            _validate_relative_path(item, category, label)
+    return value
+
+
+def _relationship_index(
+    records: Dict[str, Dict[str, Any]], catalog: bool
+) -> Tuple[List[str], List[List[int]], List[int]]:
+    """Number components in ID order and list each one's outgoing edges.
+
+    A component's generated_from edges come first in its adjacency list, so
+    adjacency[node][:provenance_edges[node]] is the provenance-only graph.
+    References to unknown IDs are left to the resolution checks.
+    """
+    ids = sorted(records)
+    position = {component_id: node for node, component_id in enumerate(ids)}
+    adjacency: List[List[int]] = []
+    provenance_edges: List[int] = []
+    for component_id in ids:
+        record = records[component_id]
+        if catalog:
+            generated_from = record["generated_from"]
+            others = (record["successor_component_id"], record["reintroduces_component_id"])
+        else:
+            generated_from = record["provenance"]["generated_from"]
+            lifecycle = record["lifecycle"]
+            retirement = lifecycle["retirement"]
+            others = (
+                lifecycle["reintroduces_component_id"],
+                retirement["successor_component_id"] if retirement is not None else None,
+            )
+        edges = [position[target] for target in generated_from if target in position]
+        provenance_edges.append(len(edges))
+        edges.extend(position[target] for target in others if target is not None and target in position)
+        adjacency.append(edges)
+    return ids, adjacency, provenance_edges
+
+
+def _cyclic_components(
+    nodes: Iterable[int], successors: Callable[[int], Sequence[int]]
+) -> List[List[int]]:
+    """Strongly connected components that contain a cycle (iterative Tarjan).
+
+    Runs in O(nodes + edges) with an explicit stack, so chain length is not
+    bounded by the interpreter's recursion limit.
+    """
+    index: Dict[int, int] = {}
+    lowlink: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    cyclic: List[List[int]] = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors(child))))
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] != index[node]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in successors(node):
+                    cyclic.append(sorted(component))
+    return cyclic
+
+
+def _cycle_path(start: int, successors: Callable[[int], Sequence[int]]) -> List[int]:
+    """Shortest cycle through start, as start -> ... -> start; start must lie on one."""
+    parents: Dict[int, int] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for child in successors(node):
+            if child == start:
+                path = [node]
+                while path[-1] != start:
+                    path.append(parents[path[-1]])
+                return [*reversed(path), start]
+            if child not in parents:
+                parents[child] = node
+                queue.append(child)
+    raise ValueError("start does not lie on a cycle")
+
+
+def _reject_cycle(category: str, ids: List[str], path: List[int]) -> None:
+    names = [ids[node] for node in path]
+    if len(names) > CYCLE_PATH_DISPLAY_LIMIT:
+        half = CYCLE_PATH_DISPLAY_LIMIT // 2
+        names = [*names[:half], f"... {len(names) - 2 * half} more ...", *names[-half:]]
+    _validation_error(category, "Component relationship graph contains a cycle: " + " -> ".join(names))
+
+
+def _reject_relationship_cycles(
+    records: Dict[str, Dict[str, Any]],
+    category: str,
+    *,
+    catalog: bool,
+    provenance_category: Optional[str] = None,
+) -> None:
+    """Reject a cycle through generated_from, successor or reintroduction edges.
+
+    The whole graph is checked in one pass. When provenance_category is set
+    and a cycle exists, the cyclic components are searched again over
+    generated_from edges alone; a cycle there is reported under
+    provenance_category in preference to category. The detail names the
+    shortest cycle through the lowest component ID involved.
+    """
+    ids, adjacency, provenance_edges = _relationship_index(records, catalog)
+    cyclic = _cyclic_components(range(len(ids)), adjacency.__getitem__)
+    if not cyclic:
+        return
+    cyclic.sort()
+    if provenance_category is not None:
+        for component in cyclic:
+            members = set(component)
+
+            def provenance(node: int, members: Set[int] = members) -> List[int]:
+                return [child for child in adjacency[node][: provenance_edges[node]] if child in members]
+
+            inner = _cyclic_components(component, provenance)
+            if inner:
+                _reject_cycle(provenance_category, ids, _cycle_path(min(inner)[0], provenance))
+    _reject_cycle(category, ids, _cycle_path(cyclic[0][0], adjacency.__getitem__))
+
+
+def _load_and_validate_component_catalog(
+    source_root: Path,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]:
+    catalog_path = source_root / COMPONENT_CATALOG_PATH
+    try:
+        catalog_bytes = catalog_path.read_bytes()
+    except OSError:
+        _validation_error("catalog-missing", f"Component Catalog is unavailable: {catalog_path}")
+    try:
+        catalog = json.loads(catalog_bytes.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        _validation_error("catalog-json", "Component Catalog is not valid UTF-8 JSON.")
+    return _validate_component_catalog(catalog, catalog_bytes)
+
+
+def _validate_component_catalog(
+    catalog: Any, catalog_bytes: bytes
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]:
+    catalog = _exact_object(
+        catalog,
+        {"catalog_schema_version", "catalog_version", "source_release", "components"},
+        "catalog-schema",
+        "Component Catalog",
+    )
+    if (
+        type(catalog["catalog_schema_version"]) is not int
+        or catalog["catalog_schema_version"] != COMPONENT_CATALOG_SCHEMA_VERSION
+    ):
+        _validation_error("catalog-schema", "Unsupported Component Catalog schema version.")
+    if catalog["catalog_version"] != COMPONENT_CATALOG_VERSION:
+        _validation_error("catalog-release", "Unexpected Component Catalog version.")
+    source_release = _exact_object(
+        catalog["source_release"],
+        {"release_id", "source_ref", "version"},
+        "catalog-schema",
+        "Component Catalog source_release",
+    )
+    if source_release != {
+        "release_id": COMPONENT_CATALOG_RELEASE_ID,
+        "source_ref": COMPONENT_CATALOG_PATH.as_posix(),
+        "version": COMPONENT_CATALOG_VERSION,
+    }:
+        _validation_error("catalog-release", "Unexpected Component Catalog release identity.")
+    if not isinstance(catalog["components"], list) or len(catalog["components"]) > 10000:
+        _validation_error("catalog-schema", "Component Catalog components must be an array.")
+
+    records: Dict[str, Dict[str, Any]] = {}
+    active_path_keys: Set[str] = set()
+    component_order: List[str] = []
+    required = {
+        "id", "canonical_source_path", "role", "kind", "lifecycle_status",
+        "previous_paths", "generated_from", "successor_component_id",
+        "reintroduces_component_id", "introduced_release", "retired_release",
+    }
+    for index, raw_component in enumerate(catalog["components"]):
+        component = _exact_object(
+            raw_component, required, "catalog-schema", f"Catalog component {index}"
+        )
+        component_id = _validate_component_id(component["id"], "catalog-schema", "Catalog component ID")
+        if component_id in records:
+            _validation_error("catalog-duplicate-id", f"Duplicate Catalog ID: {component_id}")
+        component_order.append(component_id)
+        path = _validate_relative_path(
+            component["canonical_source_path"], "catalog-schema", "Catalog canonical_source_path"
+        )
+        if component["role"] not in _ROLE_OWNERSHIP:
+            _validation_error("catalog-schema", "Catalog component role is invalid.")
+        if component["kind"] not in {"file", "directory", "mount", "link"}:
+            _validation_error("catalog-schema", "Catalog component kind is invalid.")
+        if component["lifecycle_status"] not in {"active", "retired", "tombstoned"}:
+            _validation_error("catalog-lifecycle", "Catalog lifecycle_status is invalid.")
+        _validate_sorted_unique_strings(
+            component["previous_paths"], "catalog-schema", "Catalog previous_paths", paths=True
+        )
+        _validate_sorted_unique_strings(
+            component["generated_from"], "catalog-schema", "Catalog generated_from",
+            component_ids=True, max_items=10000,
+        )
+        _validate_optional_component_id(
+            component["successor_component_id"], "catalog-reference", "Catalog successor_component_id"
+        )
+        _validate_optional_component_id(
+            component["reintroduces_component_id"], "catalog-reference", "Catalog reintroduces_component_id"
+        )
+        if component["introduced_release"] != COMPONENT_CATALOG_RELEASE_ID:
+            _validation_error("catalog-release", "Catalog introduced_release is invalid.")
+        if component["lifecycle_status"] == "active":
+            if component["retired_release"] is not None:
+                _validation_error("catalog-lifecycle", "Active Catalog identity cannot be retired.")
+            if component["successor_component_id"] is not None:
+                _validation_error("catalog-lifecycle", "Active Catalog identity cannot declare a successor.")
+            path_key = path.lower()
+            if path_key in active_path_keys:
+                _validation_error("catalog-duplicate-active-path", f"Duplicate active Catalog path: {path}")
+            active_path_keys.add(path_key)
+        elif not isinstance(component["retired_release"], str) or not component["retired_release"]:
+            _validation_error("catalog-lifecycle", "Retired Catalog identity needs retired_release.")
+        if component["lifecycle_status"] != "active" and component["reintroduces_component_id"] is not None:
+            _validation_error("catalog-lifecycle", "Terminal Catalog identity cannot reintroduce another ID.")
+        if component["role"] == "generated":
+            if not component["generated_from"]:
+                _validation_error("catalog-reference", "Generated Catalog identity needs a parent.")
+        elif component["generated_from"]:
+            _validation_error("catalog-reference", "Non-generated Catalog identity cannot have parents.")
+        if component["kind"] in {"mount", "link"} and component["role"] != "generated":
+            _validation_error(
+                "catalog-role-kind",
+                "Catalog mount/link identities must be generated and parent-bound.",
+            )
+        records[component_id] = component
+
+    if component_order != sorted(component_order):
+        _validation_error("catalog-schema", "Component Catalog records must be sorted by ID.")
+    for component_id, component in records.items():
+        references = list(component["generated_from"])
+        references.extend(
+            value
+            for value in (
+                component["successor_component_id"], component["reintroduces_component_id"]
+            )
+            if value is not None
+        )
+        for reference in references:
+            if reference == component_id:
+                _validation_error("catalog-self-reference", f"Catalog ID self-references: {component_id}")
+            if reference not in records:
+                _validation_error("catalog-reference", f"Unknown Catalog reference: {reference}")
+        reintroduced = component["reintroduces_component_id"]
+        if reintroduced is not None:
+            if component["lifecycle_status"] != "active" or records[reintroduced]["lifecycle_status"] != "tombstoned":
+                _validation_error("catalog-lifecycle", "Catalog reintroduction must target a tombstone.")
+    _reject_relationship_cycles(records, "catalog-cycle", catalog=True)
+    return catalog, records, catalog_bytes
+
+
+def preload_source_validation(
+    source_root: Path,
+    validated: Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]:
+    """Validate source_root's Production Schema and Component Catalog once.
+
+    Later v3 Manifest checks against the same source root reuse the result
+    for the rest of the process. Fleet workers pass the tuple validated by
+    the parent process as `validated` instead of reading the files again.
+    """
+    if validated is None:
+        _load_and_validate_production_schema(source_root)
+        validated = _load_and_validate_component_catalog(source_root)
+    _PRELOADED_CATALOGS[str(source_root.resolve())] = validated
+    return validated
+
+
+@dataclass
+class SourceEvidence:
+    """A template's Production Schema and Component Catalog, read once.
+
+    load() reads each file once, parses and validates it once, and digests
+    the exact bytes. The report planner hands the result to
+    load_install_manifest and to its own decisions, so neither goes back to
+    disk. `error` is the report's blocking code (schema-missing,
+    catalog-missing, source-utf8 or source-invalid); records and catalog
+    are only filled in when it is None.
+    """
+
+    root: Path
+    schema_bytes: Optional[bytes] = None
+    catalog_bytes: Optional[bytes] = None
+    schema_digest: Optional[str] = None
+    catalog_digest: Optional[str] = None
+    catalog: Optional[Dict[str, Any]] = None
+    records: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @classmethod
+    def load(cls, source_root: Path) -> "SourceEvidence":
+        evidence = cls(source_root)
+        try:
+            evidence.schema_bytes = (source_root / PRODUCTION_MANIFEST_SCHEMA).read_bytes()
+        except OSError:
+            evidence.error = "schema-missing"
+            return evidence
+        evidence.schema_digest = hash_bytes(evidence.schema_bytes)
+        try:
+            evidence.catalog_bytes = (source_root / COMPONENT_CATALOG_PATH).read_bytes()
+        except OSError:
+            evidence.error = "catalog-missing"
+            return evidence
+        evidence.catalog_digest = hash_bytes(evidence.catalog_bytes)
+        try:
+            schema_text = evidence.schema_bytes.decode("utf-8")
+            catalog_text = evidence.catalog_bytes.decode("utf-8")
+        except UnicodeError:
+            evidence.error = "source-utf8"
+            return evidence
+        try:
+            _validate_production_schema(json.loads(schema_text))
+            catalog, records, _ = _validate_component_catalog(json.loads(catalog_text), evidence.catalog_bytes)
+        except (json.JSONDecodeError, ManifestValidationError, KeyError, TypeError, ValueError):
+            evidence.error = "source-invalid"
+            return evidence
+        evidence.catalog = catalog
+        evidence.records = records
+        return evidence
+
+    @property
+    def validated(self) -> Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], bytes]]:
+        """The (catalog, records, catalog bytes) triple _validate_manifest_v3 checks against."""
+        if self.error is not None or self.catalog is None or self.catalog_bytes is None:
+            return None
+        return self.catalog, self.records, self.catalog_bytes
+
+    def file_digests(self) -> Dict[str, str]:
+        """Digests of the files read, keyed by their source-relative POSIX path."""
+        digests: Dict[str, str] = {}
+        if self.schema_digest is not None:
+            digests[PRODUCTION_MANIFEST_SCHEMA.as_posix()] = self.schema_digest
+        if self.catalog_digest is not None:
+            digests[COMPONENT_CATALOG_PATH.as_posix()] = self.catalog_digest
+        return digests
+
+
+def _validate_v3_source_release(value: Any) -> Dict[str, Any]:
+    source_release = _exact_object(
+        value,
+        {"release_id", "source_ref", "version", "component_catalog"},
+        "manifest-schema",
+        "Manifest source_release",
+    )
+    for key, maximum in (("release_id", 128), ("source_ref", 256), ("version", 64)):
+        observed = source_release[key]
+        if not isinstance(observed, str) or not observed or len(observed) > maximum:
+            _validation_error("manifest-schema", f"Manifest source_release.{key} is invalid.")
+    binding = _exact_object(
+        source_release["component_catalog"],
+        {"path", "schema_version", "sha256"},
+        "manifest-schema",
+        "Manifest component_catalog binding",
+    )
+    if binding["path"] != COMPONENT_CATALOG_PATH.as_posix():
+        _validation_error("catalog-release", "Manifest binds an unexpected Component Catalog path.")
+    if (
+        type(binding["schema_version"]) is not int
+        or binding["schema_version"] != COMPONENT_CATALOG_SCHEMA_VERSION
+    ):
+        _validation_error("catalog-release", "Manifest binds an unsupported Component Catalog schema.")
+    _validate_hash(binding["sha256"], "catalog-digest", "Manifest Component Catalog digest")
+    return source_release
+
+
+def _validate_v3_transaction(value: Any) -> Dict[str, Any]:
+    transaction = _exact_object(
+        value,
+        {"id", "mode", "writer", "started_at", "completed_at", "result"},
+        "manifest-schema",
+        "Manifest last_transaction",
+    )
+    transaction_id = transaction["id"]
+    if not isinstance(transaction_id, str) or not _TRANSACTION_ID_PATTERN.fullmatch(transaction_id):
+        _validation_error("manifest-schema", "Manifest transaction ID is invalid.")
+    if transaction["mode"] not in {"install", "update", "migration"}:
+        _validation_error("manifest-schema", "Manifest transaction mode is invalid.")
+    if transaction["writer"] not in {"python", "powershell"}:
+        _validation_error("manifest-schema", "Manifest transaction writer is invalid.")
+    if transaction["result"] != "committed":
+        _validation_error("manifest-schema", "Manifest transaction must be committed.")
+    started = _timestamp_key(transaction["started_at"], "manifest-timestamp", "Transaction started_at")
+    completed = _timestamp_key(transaction["completed_at"], "manifest-timestamp", "Transaction completed_at")
+    if started > completed:
+        _validation_error("manifest-timestamp", "Transaction completed_at precedes started_at.")
+    return transaction
+
+
+def _validate_v3_link(value: Any, kind: str) -> Optional[Dict[str, Any]]:
+    if kind not in {"mount", "link"}:
+        if value is not None:
+            _validation_error("manifest-link", "Only mount/link identities may contain link metadata.")
+        return None
+    link = _exact_object(
+        value,
+        {"target_path", "target_path_key", "mode"},
+        "manifest-link",
+        "Manifest identity.link",
+    )
+    target_path = _validate_relative_path(
+        link["target_path"], "manifest-link", "Manifest link target_path"
+    )
+    if link["target_path_key"] != target_path.lower():
+        _validation_error("manifest-link", "Manifest link target_path_key does not match target_path.")
+    if link["mode"] not in {"symlink", "junction", "copy-fallback"}:
+        _validation_error("manifest-link", "Manifest link mode is invalid.")
+    if kind == "link" and link["mode"] != "symlink":
+        _validation_error("manifest-link", "A link identity must use symlink mode.")
+    return link
+
+
+def _validate_v3_fork(value: Any) -> Dict[str, Any]:
+    fork = _exact_object(
+        value,
+        {"status", "basis", "decision", "classified_at"},
+        "manifest-schema",
+        "Manifest provenance.fork",
+    )
+    expected = _FORK_MAPPING.get(fork["status"])
+    if expected is None or (fork["basis"], fork["decision"]) != expected:
+        _validation_error("manifest-fork", "Manifest fork status/basis/decision mapping is invalid.")
+    _timestamp_key(fork["classified_at"], "manifest-timestamp", "Fork classified_at")
+    return fork
+
+
+def _validate_v3_provenance(value: Any, role: str, kind: str) -> Dict[str, Any]:
+    provenance = _exact_object(
+        value,
+        {"ownership", "source", "generated_from", "fork"},
+        "manifest-schema",
+        "Manifest provenance",
+    )
+    if provenance["ownership"] != _ROLE_OWNERSHIP[role]:
+        _validation_error("manifest-provenance", "Manifest role and ownership disagree.")
+    source = _exact_object(
+        provenance["source"],
+        {"kind", "locator", "release"},
+        "manifest-schema",
+        "Manifest provenance.source",
+    )
+    source_kind = source["kind"]
+    if source_kind != _ROLE_SOURCE_KIND[role]:
+        _validation_error("manifest-provenance", "Manifest role and source kind disagree.")
+    locator = source["locator"]
+    if (
+        not isinstance(locator, str)
+        or len(locator) < 3
+        or len(locator) > 512
+        or not re.fullmatch(r"(?:template|project|generated|legacy|unknown):[A-Za-z0-9@+_.:/#-]+", locator)
+        or "\\" in locator
+        or _unsafe_locator(locator, source_kind)
+    ):
+        _validation_error("manifest-provenance", "Manifest source locator is unsafe or inconsistent.")
+    if source["release"] is not None and (
+        not isinstance(source["release"], str) or not source["release"] or len(source["release"]) > 128
+    ):
+        _validation_error("manifest-schema", "Manifest source release is invalid.")
+    generated_from = _validate_sorted_unique_strings(
+        provenance["generated_from"],
+        "manifest-provenance",
+        "Manifest generated_from",
+        component_ids=True,
+    )
+    if role == "generated" and not generated_from:
+        _validation_error("manifest-provenance", "Generated Manifest component needs a parent.")
+    if role != "generated" and generated_from:
+        _validation_error("manifest-provenance", "Non-generated Manifest component cannot have parents.")
+    fork = _validate_v3_fork(provenance["fork"])
+    _check_v3_fork_role(fork, role, kind)
+    return provenance
+
+
+def _unsafe_locator(locator: str, source_kind: str) -> bool:
+    """True when a syntactically valid locator disagrees with its kind or escapes its root."""
+    rest = locator.split(":", 1)[1]
+    return bool(
+        not locator.startswith(f"{source_kind}:")
+        or rest.startswith("/")
+        or _DRIVE_PREFIX_PATTERN.match(rest)
+        or "://" in rest
+        or any(part in {".", ".."} for part in rest.split("/"))
+    )
+
+
+def _check_v3_fork_role(fork: Dict[str, Any], role: str, kind: str) -> None:
+    if fork["status"] == "project-owned" and role != "project-owned":
+        _validation_error("manifest-fork", "Project-owned fork status requires project-owned role.")
+    if fork["status"] == "legacy" and role != "compatibility":
+        _validation_error("manifest-fork", "Legacy fork status requires compatibility role.")
+    if fork["status"] == "derived-customized" and role != "generated":
+        _validation_error("manifest-fork", "Derived customization requires generated role.")
+    if fork["status"] == "customized" and role != "canonical":
+        _validation_error("manifest-fork", "Canonical customization requires canonical role.")
+    if fork["status"] == "not-applicable" and kind == "file":
+        _validation_error("manifest-fork", "A regular file cannot use not-applicable hash status.")
+
+
+def _validate_v3_hashes(value: Any, fork: Dict[str, Any], kind: str) -> Dict[str, Any]:
+    hashes = _exact_object(
+        value,
+        {"algorithm", "content_basis", "baseline", "observed_before", "proposed_source", "result_after"},
+        "manifest-schema",
+        "Manifest hashes",
+    )
+    if hashes["algorithm"] != "sha256" or hashes["content_basis"] != "exact-bytes":
+        _validation_error("manifest-hash", "Manifest hash algorithm/content basis is invalid.")
+    for key in ("baseline", "observed_before", "proposed_source", "result_after"):
+        _validate_hash(hashes[key], "manifest-hash", f"Manifest hashes.{key}")
+    _check_v3_hash_evidence(hashes, fork, kind)
+    return hashes
+
+
+def _check_v3_hash_evidence(hashes: Dict[str, Any], fork: Dict[str, Any], kind: str) -> None:
+    status = fork["status"]
+    if status == "untouched":
+        if hashes["baseline"] is None or hashes["baseline"] != hashes["observed_before"]:
+            _validation_error("manifest-fork", "Untouched classification needs equal known baseline and observation.")
+    if status in {"customized", "derived-customized"}:
+        if (
+            hashes["baseline"] is None
+            or hashes["observed_before"] is None
+            or hashes["baseline"] == hashes["observed_before"]
+        ):
+            _validation_error("manifest-fork", "Customization classification needs known divergent hashes.")
+    if kind in {"mount", "directory", "link"} and status == "not-applicable":
+        if any(hashes[key] is not None for key in hashes if key not in {"algorithm", "content_basis"}):
+            _validation_error("manifest-hash", "Non-hashable component cannot claim content hashes.")
+
+
+def _validate_v3_retirement(value: Any) -> Dict[str, Any]:
+    retirement = _exact_object(
+        value,
+        {"reason", "detected_at", "source_evidence", "successor_component_id", "pruned_at"},
+        "manifest-schema",
+        "Manifest retirement",
+    )
+    if retirement["reason"] not in {"renamed", "deleted", "source-retired", "superseded"}:
+        _validation_error("manifest-lifecycle", "Manifest retirement reason is invalid.")
+    _timestamp_key(retirement["detected_at"], "manifest-timestamp", "Retirement detected_at")
+    evidence = _exact_object(
+        retirement["source_evidence"],
+        {"type", "locator"},
+        "manifest-schema",
+        "Manifest retirement source_evidence",
+    )
+    if evidence["type"] not in {"rename-map", "component-absent-in-source", "release-retirement-record"}:
+        _validation_error("manifest-lifecycle", "Manifest retirement evidence type is invalid.")
+    if not isinstance(evidence["locator"], str) or not re.fullmatch(
+        r"(?:template|release):[A-Za-z0-9@+_.:/#-]+", evidence["locator"]
+    ):
+        _validation_error("manifest-lifecycle", "Manifest retirement evidence locator is invalid.")
+    _validate_optional_component_id(
+        retirement["successor_component_id"], "manifest-lifecycle", "Retirement successor_component_id"
+    )
+    if retirement["pruned_at"] is not None:
+        _timestamp_key(retirement["pruned_at"], "manifest-timestamp", "Retirement pruned_at")
+    return retirement
+
+
+def _validate_v3_lifecycle(value: Any, hashes: Dict[str, Any], outcome: str) -> Dict[str, Any]:
+    lifecycle = _exact_object(
+        value,
+        {"state", "previous_paths", "retirement", "reintroduces_component_id"},
+        "manifest-schema",
+        "Manifest lifecycle",
+    )
+    state = lifecycle["state"]
+    if state not in {"active", "retired", "tombstoned"}:
+        _validation_error("manifest-lifecycle", "Manifest lifecycle state is invalid.")
+    _validate_sorted_unique_strings(
+        lifecycle["previous_paths"], "manifest-path", "Manifest previous_paths", paths=True
+    )
+    reintroduces = _validate_optional_component_id(
+        lifecycle["reintroduces_component_id"],
+        "manifest-reintroduction",
+        "Manifest reintroduces_component_id",
+    )
+    if state == "active":
+        if lifecycle["retirement"] is not None:
+            _validation_error("manifest-lifecycle", "Active Manifest component cannot have retirement data.")
+    else:
+        if not isinstance(lifecycle["retirement"], dict):
+            _validation_error("manifest-lifecycle", "Terminal Manifest component needs retirement data.")
+        retirement = _validate_v3_retirement(lifecycle["retirement"])
+        if reintroduces is not None:
+            _validation_error("manifest-reintroduction", "Terminal Manifest component cannot reintroduce an ID.")
+        if hashes["proposed_source"] is not None:
+            _validation_error("manifest-lifecycle", "Terminal Manifest component cannot have proposed source bytes.")
+        if state == "retired":
+            if retirement["pruned_at"] is not None or outcome != "retired":
+                _validation_error("manifest-lifecycle", "Retired Manifest component has invalid terminal evidence.")
+        elif retirement["pruned_at"] is None or hashes["result_after"] is not None or outcome != "tombstoned":
+            _validation_error("manifest-lifecycle", "Tombstoned Manifest component has invalid terminal evidence.")
+    return lifecycle
+
+
+def _validate_v3_component(value: Any, index: int) -> Dict[str, Any]:
+    component = _exact_object(
+        value,
+        {"identity", "provenance", "hashes", "lifecycle", "last_operation", "installed_at", "updated_at"},
+        "manifest-schema",
+        f"Manifest component {index}",
+    )
+    identity = _exact_object(
+        component["identity"],
+        {"id", "path", "path_key", "kind", "role", "link"},
+        "manifest-schema",
+        "Manifest identity",
+    )
+    _validate_component_id(identity["id"], "manifest-schema", "Manifest component ID")
+    path = _validate_relative_path(identity["path"], "manifest-path", "Manifest identity.path")
+    if identity["path_key"] != path.lower():
+        _validation_error("manifest-path", "Manifest identity.path_key does not match identity.path.")
+    if identity["kind"] not in {"file", "directory", "mount", "link"}:
+        _validation_error("manifest-schema", "Manifest identity kind is invalid.")
+    if identity["role"] not in _ROLE_OWNERSHIP:
+        _validation_error("manifest-schema", "Manifest identity role is invalid.")
+    if identity["kind"] in {"mount", "link"} and identity["role"] != "generated":
+        _validation_error(
+            "manifest-role-kind",
+            "Manifest mount/link identities must be generated and parent-bound.",
+        )
+    _validate_v3_link(identity["link"], identity["kind"])
+    provenance = _validate_v3_provenance(component["provenance"], identity["role"], identity["kind"])
+    hashes = _validate_v3_hashes(component["hashes"], provenance["fork"], identity["kind"])
+    operation = _exact_object(
+        component["last_operation"],
+        {"transaction_id", "outcome"},
+        "manifest-schema",
+        "Manifest last_operation",
+    )
+    if not isinstance(operation["transaction_id"], str) or not _TRANSACTION_ID_PATTERN.fullmatch(operation["transaction_id"]):
+        _validation_error("manifest-schema", "Manifest component transaction ID is invalid.")
+    if operation["outcome"] not in {
+        "installed", "updated", "preserved-existing", "preserved-customization",
+        "conflicted", "reported", "retired", "tombstoned",
+    }:
+        _validation_error("manifest-schema", "Manifest component outcome is invalid.")
+    _validate_v3_lifecycle(component["lifecycle"], hashes, operation["outcome"])
+    _check_v3_outcome_and_times(component)
+    return component
+
+
+def _check_v3_outcome_and_times(component: Dict[str, Any]) -> None:
+    hashes = component["hashes"]
+    lifecycle = component["lifecycle"]
+    outcome = component["last_operation"]["outcome"]
+    fork = component["provenance"]["fork"]
+    fork_status = fork["status"]
+    if outcome in {"installed", "updated"}:
+        if hashes["proposed_source"] is None or hashes["result_after"] != hashes["proposed_source"]:
+            _validation_error("manifest-hash", "Installed/updated result must equal proposed source bytes.")
+    elif outcome == "preserved-customization":
+        if fork_status not in {"customized", "derived-customized"} or hashes["result_after"] != hashes["observed_before"]:
+            _validation_error("manifest-fork", "Preserved customization evidence is inconsistent.")
+    elif outcome == "preserved-existing":
+        if hashes["result_after"] != hashes["observed_before"]:
+            _validation_error("manifest-hash", "Preserved existing result must equal observed bytes.")
+    elif outcome == "conflicted" and fork_status != "conflicted":
+        _validation_error("manifest-fork", "Conflicted outcome requires conflicted fork evidence.")
+    elif outcome == "retired" and hashes["result_after"] != hashes["observed_before"]:
+        _validation_error("manifest-hash", "Retired result must preserve observed bytes.")
+    installed = None
+    if component["installed_at"] is not None:
+        installed = _timestamp_key(component["installed_at"], "manifest-timestamp", "Component installed_at")
+    updated = _timestamp_key(component["updated_at"], "manifest-timestamp", "Component updated_at")
+    if installed is not None and installed > updated:
+        _validation_error("manifest-timestamp", "Component updated_at precedes installed_at.")
+    if _timestamp_key(fork["classified_at"], "manifest-timestamp", "Fork classified_at") > updated:
+        _validation_error("manifest-timestamp", "Fork classification postdates component update.")
+    if lifecycle["retirement"] is not None:
+        retirement = lifecycle["retirement"]
+        if _timestamp_key(retirement["detected_at"], "manifest-timestamp", "Retirement detected_at") > updated:
+            _validation_error("manifest-timestamp", "Retirement detection postdates component update.")
+        if retirement["pruned_at"] is not None and _timestamp_key(
+            retirement["pruned_at"], "manifest-timestamp", "Retirement pruned_at"
+        ) > updated:
+            _validation_error("manifest-timestamp", "Prune timestamp postdates component update.")
+
+
+def _check_v3_component_semantics(component: Dict[str, Any], index: int) -> Dict[str, Any]:
+    """The part of _validate_v3_component the Production Schema cannot express.
+
+    Only runs on components the compiled schema accepted, so every shape,
+    enum, pattern, length and if/then rule already holds. The checks run in
+    the hand-written validator's order, so the first failure and its
+    category match it.
+    """
+    identity = component["identity"]
+    path = _check_path_segments(identity["path"], "manifest-path", "Manifest identity.path")
+    if identity["path_key"] != path.lower():
+        _validation_error("manifest-path", "Manifest identity.path_key does not match identity.path.")
+    kind, role = identity["kind"], identity["role"]
+    if kind in {"mount", "link"} and role != "generated":
+        _validation_error(
+            "manifest-role-kind",
+            "Manifest mount/link identities must be generated and parent-bound.",
+        )
+    link = identity["link"]
+    if link is not None:
+        target_path = _check_path_segments(link["target_path"], "manifest-link", "Manifest link target_path")
+        if link["target_path_key"] != target_path.lower():
+            _validation_error("manifest-link", "Manifest link target_path_key does not match target_path.")
+    provenance = component["provenance"]
+    source = provenance["source"]
+    if source["kind"] != _ROLE_SOURCE_KIND[role]:
+        _validation_error("manifest-provenance", "Manifest role and source kind disagree.")
+    if _unsafe_locator(source["locator"], source["kind"]):
+        _validation_error("manifest-provenance", "Manifest source locator is unsafe or inconsistent.")
+    generated_from = provenance["generated_from"]
+    if generated_from != sorted(generated_from):
+        _validation_error("manifest-provenance", "Manifest generated_from must be sorted and duplicate-free.")
+    fork = provenance["fork"]
+    _timestamp_key(fork["classified_at"], "manifest-timestamp", "Fork classified_at")
+    _check_v3_fork_role(fork, role, kind)
+    _check_v3_hash_evidence(component["hashes"], fork, kind)
+    lifecycle = component["lifecycle"]
+    previous_paths = lifecycle["previous_paths"]
+    if previous_paths != sorted(previous_paths):
+        _validation_error("manifest-path", "Manifest previous_paths must be sorted and duplicate-free.")
+    for previous_path in previous_paths:
+        _check_path_segments(previous_path, "manifest-path", "Manifest previous_paths")
+    retirement = lifecycle["retirement"]
+    if retirement is not None:
+        _timestamp_key(retirement["detected_at"], "manifest-timestamp", "Retirement detected_at")
+        if retirement["pruned_at"] is not None:
+            _timestamp_key(retirement["pruned_at"], "manifest-timestamp", "Retirement pruned_at")
+    _check_v3_outcome_and_times(component)
+    return component
+
+
+def _load_and_validate_production_schema(source_root: Path) -> Dict[str, Any]:
+    schema_path = source_root / PRODUCTION_MANIFEST_SCHEMA
+    try:
+        schema_bytes = schema_path.read_bytes()
+    except OSError:
+        _validation_error("schema-missing", f"Production Schema is unavailable: {schema_path}")
+    try:
+        schema = json.loads(schema_bytes.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        _validation_error("schema-json", "Production Schema is not valid UTF-8 JSON.")
+    return _validate_production_schema(schema)
+
+
+def _validate_production_schema(schema: Any) -> Dict[str, Any]:
+    def contains_proposal_marker(value: Any) -> bool:
+        if isinstance(value, dict):
+            return "proposal_status" in value or any(
+                contains_proposal_marker(item) for item in value.values()
+            )
+        if isinstance(value, list):
+            return any(contains_proposal_marker(item) for item in value)
+        return value == "proposal_status"
+
+    if contains_proposal_marker(schema):
+        _validation_error(
+            "schema-proposal-marker",
+            "Production Schema must not contain proposal_status markers.",
+        )
+    schema = _exact_object(
+        schema,
+        {
+            "$schema", "$id", "title", "description", "type",
+            "additionalProperties", "required", "properties", "$defs",
+        },
+        "schema-structure",
+        "Production Schema",
+    )
+    if (
+        schema["$schema"] != "https://json-schema.org/draft/2020-12/schema"
+        or schema["$id"] != "urn:ai-dev-workflow:manifest-schema:v3"
+    ):
+        _validation_error("schema-identity", "Production Schema identity is invalid.")
+    required = [
+        "schema_version", "written_at", "source_release", "last_transaction", "components"
+    ]
+    if (
+        schema["type"] != "object"
+        or schema["additionalProperties"] is not False
+        or schema["required"] != required
+        or not isinstance(schema["properties"], dict)
+        or set(schema["properties"]) != set(required)
+        or not isinstance(schema["$defs"], dict)
+    ):
+        _validation_error("schema-structure", "Production Schema root structure is invalid.")
+    properties = schema["properties"]
+    if (
+        not isinstance(properties["schema_version"], dict)
+        or type(properties["schema_version"].get("const")) is not int
+        or properties["schema_version"].get("const") != 3
+        or not isinstance(properties["components"], dict)
+        or type(properties["components"].get("maxItems")) is not int
+        or properties["components"].get("maxItems") != 10000
+    ):
+        _validation_error("schema-structure", "Production Schema constraints are invalid.")
+    required_defs = {
+        "timestamp", "hash", "componentId", "relativePath", "pathKey", "sourceRelease",
+        "componentCatalogBinding", "transaction", "identity", "link", "source", "fork",
+        "provenance", "hashes", "retirement", "lifecycle", "operation", "component",
+    }
+    if set(schema["$defs"]) != required_defs or any(
+        not isinstance(definition, dict) for definition in schema["$defs"].values()
+    ):
+        _validation_error("schema-structure", "Production Schema definitions are invalid.")
+    return schema
+
+
+def _validate_manifest_v3(
+    data: Dict[str, Any], source_root: Optional[Path], evidence: Optional[SourceEvidence] = None
+) -> Tuple[Dict[str, dict], bool, Optional[str]]:
+    if evidence is not None and evidence.validated is None:
+        evidence = None
+    catalog_root = evidence.root if evidence is not None else _catalog_source_root(source_root)
+    # Structure first, in one pass of the compiled Production Schema; the
+    # hand-written validators then only add the semantic checks. When the
+    # Schema rejects the Manifest they run in full instead, so their more
+    # specific categories win and the Schema error is the last resort.
+    validate_component = _validate_v3_component
+    schema_error = None
+    compiled = _compiled_production_schema(catalog_root, evidence)
+    if compiled is not None:
+        schema_error = compiled.first_error(data)
+        if schema_error is None:
+            validate_component = _check_v3_component_semantics
+
+    manifest = _exact_object(
+        data,
+        {"schema_version", "written_at", "source_release", "last_transaction", "components"},
+        "manifest-schema",
+        "Manifest",
+    )
+    if manifest["schema_version"] != 3:
+        _validation_error("manifest-schema", "Manifest schema version is not 3.")
+    written_at = _timestamp_key(manifest["written_at"], "manifest-timestamp", "Manifest written_at")
+    source_release = _validate_v3_source_release(manifest["source_release"])
+    transaction = _validate_v3_transaction(manifest["last_transaction"])
+    if _timestamp_key(transaction["completed_at"], "manifest-timestamp", "Transaction completed_at") > written_at:
+        _validation_error("manifest-timestamp", "Manifest was written before its transaction completed.")
+    if not isinstance(manifest["components"], list) or len(manifest["components"]) > 10000:
+        _validation_error("manifest-schema", "Manifest components must be an array.")
+
+    records: Dict[str, Dict[str, Any]] = {}
+    ordered_ids: List[str] = []
+    for index, raw_component in enumerate(manifest["components"]):
+        component = validate_component(raw_component, index)
+        component_id = component["identity"]["id"]
+        if component_id in records:
+            _validation_error("manifest-schema", f"Manifest contains duplicate component ID: {component_id}")
+        if _timestamp_key(component["updated_at"], "manifest-timestamp", "Component updated_at") > written_at:
+            _validation_error("manifest-timestamp", "Component update postdates Manifest write.")
+        ordered_ids.append(component_id)
+        records[component_id] = component
+    if ordered_ids != sorted(ordered_ids):
+        _validation_error("manifest-schema", "Manifest components must be sorted by component ID.")
+
+    active_paths: Dict[str, str] = {}
+    terminal_paths: Dict[str, List[str]] = {}
+    for component_id, component in records.items():
+        identity = component["identity"]
+        lifecycle = component["lifecycle"]
+        path_key = identity["path_key"]
+        references = list(component["provenance"]["generated_from"])
+        if lifecycle["reintroduces_component_id"] is not None:
+            references.append(lifecycle["reintroduces_component_id"])
+        if lifecycle["retirement"] is not None and lifecycle["retirement"]["successor_component_id"] is not None:
+            references.append(lifecycle["retirement"]["successor_component_id"])
+        for reference in references:
+            if reference == component_id:
+                category = "manifest-reintroduction" if lifecycle["reintroduces_component_id"] == reference else "manifest-provenance"
+                _validation_error(category, f"Manifest component self-references: {component_id}")
+            if reference not in records:
+                category = "manifest-reintroduction" if lifecycle["reintroduces_component_id"] == reference else "manifest-provenance"
+                _validation_error(category, f"Manifest reference does not resolve: {reference}")
+        reintroduced = lifecycle["reintroduces_component_id"]
+        if reintroduced is not None and records[reintroduced]["lifecycle"]["state"] != "tombstoned":
+            _validation_error("manifest-reintroduction", "Manifest reintroduction must target a tombstone.")
+        if lifecycle["state"] == "active":
+            if path_key in active_paths:
+                _validation_error("manifest-path-collision", f"Duplicate active Manifest path: {identity['path']}")
+            active_paths[path_key] = component_id
+        else:
+            terminal_paths.setdefault(path_key, []).append(component_id)
+    for path_key, active_id in active_paths.items():
+        for terminal_id in terminal_paths.get(path_key, []):
+            active = records[active_id]
+            terminal = records[terminal_id]
+            if (
+                terminal["lifecycle"]["state"] != "tombstoned"
+                or active["lifecycle"]["reintroduces_component_id"] != terminal_id
+                or terminal["hashes"]["result_after"] is not None
+            ):
+                _validation_error("manifest-path-collision", "Manifest path collision lacks valid reintroduction evidence.")
+    _reject_relationship_cycles(
+        records, "manifest-reintroduction", catalog=False, provenance_category="manifest-provenance"
+    )
+
+    catalog_validated = False
+    detail: Optional[str] = None
+    source_root = catalog_root
+    if source_root is None:
+        detail = "Production Schema and Component Catalog validation are unavailable."
+    else:
+        if evidence is not None:
+            preloaded = evidence.validated
+        else:
+            preloaded = _PRELOADED_CATALOGS.get(str(source_root.resolve()))
+        if preloaded is None:
+            _load_and_validate_production_schema(source_root)
+            preloaded = _load_and_validate_component_catalog(source_root)
+        catalog, catalog_records, catalog_bytes = preloaded
+        binding = source_release["component_catalog"]
+        observed_digest = evidence.catalog_digest if evidence is not None else hash_bytes(catalog_bytes)
+        if binding["sha256"] != observed_digest:
+            _validation_error("catalog-digest", "Manifest Component Catalog digest does not match exact Catalog bytes.")
+        if any(source_release[key] != catalog["source_release"][key] for key in ("release_id", "source_ref", "version")):
+            _validation_error("catalog-release", "Manifest source release does not match Component Catalog.")
+        for component_id, component in records.items():
+            catalog_component = catalog_records.get(component_id)
+            if catalog_component is None:
+                _validation_error("catalog-agreement", f"Manifest component is absent from Catalog: {component_id}")
+            identity = component["identity"]
+            lifecycle = component["lifecycle"]
+            if (
+                identity["path"] != catalog_component["canonical_source_path"]
+                or identity["role"] != catalog_component["role"]
+                or identity["kind"] != catalog_component["kind"]
+                or lifecycle["state"] != catalog_component["lifecycle_status"]
+                or lifecycle["previous_paths"] != catalog_component["previous_paths"]
+                or component["provenance"]["generated_from"] != catalog_component["generated_from"]
+                or lifecycle["reintroduces_component_id"] != catalog_component["reintroduces_component_id"]
+                or (
+                    lifecycle["retirement"] is not None
+                    and lifecycle["retirement"]["successor_component_id"] != catalog_component["successor_component_id"]
+                )
+                or (lifecycle["retirement"] is None and catalog_component["successor_component_id"] is not None)
+            ):
+                _validation_error("catalog-agreement", f"Manifest component disagrees with Catalog: {component_id}")
+            if component["provenance"]["source"]["release"] not in {None, source_release["release_id"]}:
+                _validation_error("catalog-agreement", f"Manifest component release disagrees with source release: {component_id}")
+        catalog_validated = True
+    if schema_error is not None:
+        _validation_error("manifest-schema", f"Manifest does not match the Production Schema at {schema_error}.")
+    return records, catalog_validated, detail
+
+
+def _compiled_production_schema(
+    catalog_root: Optional[Path], evidence: Optional[SourceEvidence]
+) -> Optional[CompiledSchema]:
+    """The Production Schema compiled by scripts.schema_compiler, or None.
+
+    None means the hand-written validators do all the work: no Schema is
+    available, the compiler is missing, or the Schema fails
+    _validate_production_schema or uses something the compiler does not
+    support (the catalog stage still reports a broken Schema as before).
+    """
+    # SourceEvidence has already validated its Schema.
+    check: Optional[Callable[[Any], Any]] = None
+    if evidence is not None:
+        schema_bytes = evidence.schema_bytes
+    elif catalog_root is None:
+        return None
+    else:
+        try:
+            schema_bytes = (catalog_root / PRODUCTION_MANIFEST_SCHEMA).read_bytes()
+        except OSError:
+            return None
+        check = _validate_production_schema
+    try:
+        from scripts import schema_compiler
+    except ImportError:
+        return None
+    try:
+        return schema_compiler.load_compiled_schema(schema_bytes, check=check)
+    except (schema_compiler.SchemaCompileError, ManifestValidationError):
+        return None
+
+
+def _catalog_source_root(source_root: Optional[Path]) -> Optional[Path]:
+    """Return source_root, or the checkout this script runs from when it has the Schema and Catalog."""
+    if source_root is not None:
+        return source_root
+    inferred = Path(bootstrap.__file__).resolve().parent.parent
+    if (inferred / COMPONENT_CATALOG_PATH).is_file() and (inferred / PRODUCTION_MANIFEST_SCHEMA).is_file():
+        return inferred
+    return None
+
+
+_VALIDATOR_DIGEST: Optional[str] = None
+
+
+def _validator_digest() -> str:
+    """Digest of this module and the schema compiler, whose code decides verdicts."""
+    global _VALIDATOR_DIGEST
+    if _VALIDATOR_DIGEST is None:
+        digest = hashlib.sha256(Path(__file__).read_bytes())
+        try:
+            digest.update(Path(__file__).with_name("schema_compiler.py").read_bytes())
+        except OSError:
+            pass
+        _VALIDATOR_DIGEST = digest.hexdigest()
+    return _VALIDATOR_DIGEST
+
+
+class ValidationCache:
+    """Manifest v3 verdicts in the user cache directory, keyed by input digests.
+
+    An entry says that one exact combination of Manifest, Production Schema
+    and Component Catalog bytes, checked by this validator version, was
+    valid or failed with a given category and detail. Any byte change in
+    any input is a different key and gets a full validation. At most
+    VALIDATION_CACHE_LIMIT verdicts are kept, oldest dropped first.
+    """
+
+    def __init__(self, path: Path, entries: Optional[Dict[str, dict]] = None) -> None:
+        self.path = path
+        self.entries: Dict[str, dict] = entries or {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "ValidationCache":
+        cache = cls(path or user_cache_dir() / VALIDATION_CACHE_FILENAME)
+        try:
+            data = json.loads(cache.path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeError, json.JSONDecodeError):
+            return cache
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != VALIDATION_CACHE_VERSION
+            or not isinstance(data.get("entries"), dict)
+        ):
+            return cache
+        cache.entries = {
+            key: entry
+            for key, entry in data["entries"].items()
+            if isinstance(entry, dict)
+            and (entry.get("category") is None or isinstance(entry.get("category"), str))
+            and (entry.get("detail") is None or isinstance(entry.get("detail"), str))
+        }
+        return cache
+
+    @staticmethod
+    def key(manifest_bytes: bytes, schema_bytes: bytes, catalog_bytes: bytes) -> str:
+        digest = hashlib.sha256(f"{MANIFEST_V3_VALIDATOR_VERSION}:{_validator_digest()}".encode("ascii"))
+        for value in (manifest_bytes, schema_bytes, catalog_bytes):
+            digest.update(hashlib.sha256(value).digest())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, category: Optional[str] = None, detail: Optional[str] = None) -> None:
+        self.entries.pop(key, None)
+        self.entries[key] = {"category": category, "detail": detail}
+        while len(self.entries) > VALIDATION_CACHE_LIMIT:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self) -> None:
+        _write_cache_file(self.path, {"version": VALIDATION_CACHE_VERSION, "entries": self.entries}, indent=2)
+
+
+def validate_manifest_v3_cached(
+    data: Dict[str, Any],
+    manifest_bytes: bytes,
+    source_root: Optional[Path],
+    record: bool = True,
+    evidence: Optional[SourceEvidence] = None,
+) -> Tuple[Dict[str, dict], bool, Optional[str]]:
+    """_validate_manifest_v3 behind the ValidationCache.
+
+    A hit returns the Manifest's components by ID without walking them, or
+    re-raises the cached ManifestValidationError. A miss validates fully
+    and, when record is set, stores the verdict; report-only runs read the
+    cache but never write it. A validated SourceEvidence supplies the
+    Schema and Catalog bytes instead of reading them from source_root.
+    """
+    if evidence is not None and evidence.validated is not None:
+        schema_bytes, catalog_bytes = evidence.schema_bytes, evidence.catalog_bytes
+    else:
+        evidence = None
+        catalog_root = _catalog_source_root(source_root)
+        if catalog_root is None:
+            return _validate_manifest_v3(data, source_root)
+        try:
+            schema_bytes = (catalog_root / PRODUCTION_MANIFEST_SCHEMA).read_bytes()
+            catalog_bytes = (catalog_root / COMPONENT_CATALOG_PATH).read_bytes()
+        except OSError:
+            return _validate_manifest_v3(data, source_root)
+
+    cache = ValidationCache.load()
+    key = cache.key(manifest_bytes, schema_bytes, catalog_bytes)
+    verdict = cache.get(key)
+    if verdict is not None:
+        if verdict["category"] is not None:
+            raise ManifestValidationError(verdict["category"], verdict["detail"] or "")
+        return {component["identity"]["id"]: component for component in data["components"]}, True, None
+
+    try:
+        result = _validate_manifest_v3(data, source_root, evidence)
+    except ManifestValidationError as error:
+        cache.put(key, error.category, error.detail)
+        _save_validation_cache(cache, record)
+        raise
+    if result[1]:
+        cache.put(key)
+        _save_validation_cache(cache, record)
+    return result
+
+
+def _save_validation_cache(cache: ValidationCache, record: bool) -> None:
+    if not record:
+        return
+    try:
+        cache.save()
+    except OSError:
+        pass
@@ -0,0 +1,431 @@
+"""Portable runtime planning: shared skills/agents and their derived trees.
+
+Renders .claude/.codex agents, mirrors skills/ and agents/ into .github and
+plans the runtime skill links. scripts.bootstrap imports it when an install
+is planned, so --help and --report-only never load it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from scripts.bootstrap import (
+    PORTABLE_SKILL_LINKS,
+    HashCache,
+    SyncAction,
+    SyncCandidate,
+    SyncPlan,
+    SyncResult,
+    TreeEntry,
+    apply_sync_plan,
+    hash_bytes,
+    map_ordered,
+    mirror_link_mode,
+    normalize_relative_path,
+    normalize_text_content,
+    plan_lifecycle_assets,
+    plan_managed_bytes,
+    plan_seed_from_legacy_runtime,
+    plan_skill_link,
+    plan_tree_with_policy,
+    update_manifest_entry,
+)
+
+
+def record_mirror_modes(plan: SyncPlan, manifest_entries: Dict[str, dict]) -> None:
+    """Write the link mode each applied mirror action achieved into the manifest."""
+    for action in plan.actions:
+        if action.mirror is None:
+            continue
+        entry = manifest_entries.get(normalize_relative_path(action.path))
+        if entry is None:
+            continue
+        if action.mirror == "copy":
+            entry.pop("mirror", None)
+        else:
+            entry["mirror"] = action.mirror
+
+
+def unquote_frontmatter_value(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in {"'", '"'}:
+        return value[1:-1]
+    return value
+
+
+def parse_agent_definition(agent_file: Path, raw: Optional[str] = None) -> Tuple[str, str, str]:
+    if raw is None:
+        raw = agent_file.read_text(encoding="utf-8")
+    match = re.match(r"^---\r?\n(.*?)\r?\n---\r?\n?(.*)$", raw, re.S)
+    if not match:
+        raise ValueError(f"Invalid agent file: {agent_file}")
+
+    frontmatter = match.group(1)
+    body = match.group(2).strip()
+    description_match = re.search(r"^description:\s*(.+)$", frontmatter, re.M)
+    description = unquote_frontmatter_value(description_match.group(1)) if description_match else ""
+    name = agent_file.name.replace(".agent.md", "")
+    return name, description, body
+
+
+def build_claude_agent_content(name: str, description: str, body: str) -> str:
+    return (
+        "---\n"
+        f"name: {json.dumps(name, ensure_ascii=False)}\n"
+        f"description: {json.dumps(description, ensure_ascii=False)}\n"
+        "---\n\n"
+        f"{body.rstrip()}\n"
+    )
+
+
+def build_codex_agent_content(name: str, description: str, body: str) -> str:
+    escaped_body = body.rstrip().replace('"""', '\\"""')
+    return (
+        f"name = {json.dumps(name, ensure_ascii=False)}\n"
+        f"description = {json.dumps(description, ensure_ascii=False)}\n"
+        'developer_instructions = """\n'
+        f"{escaped_body}\n"
+        '"""\n'
+    )
+
+
+def render_agent_outputs(agent_file: Path, raw: str) -> List[Tuple[Path, bytes]]:
+    """Return the .claude and .codex renders of one agents/*.agent.md file."""
+    name, description, body = parse_agent_definition(agent_file, raw)
+    return [
+        (
+            Path(".claude/agents") / f"{name}.md",
+            normalize_text_content(build_claude_agent_content(name, description, body)).encode("utf-8"),
+        ),
+        (
+            Path(".codex/agents") / f"{name}.toml",
+            normalize_text_content(build_codex_agent_content(name, description, body)).encode("utf-8"),
+        ),
+    ]
+
+
+def plan_agent_renders(
+    plan: SyncPlan,
+    target_root: Path,
+    agent_files: Sequence[Path],
+    manifest_entries: Dict[str, dict],
+) -> None:
+    """Plan the derived .claude/agents and .codex/agents files.
+
+    With plan.render_cache, an agent whose source digest is cached and whose
+    rendered targets still hold the cached digests is recorded in sync
+    without parsing, rendering, or hashing its targets beyond the hash cache.
+    All other agents are rendered together as one batch on plan.jobs threads.
+    """
+    cache = plan.render_cache
+    source_hashes: Dict[Path, Optional[str]] = {}
+    cached: Dict[Path, List[Tuple[str, str]]] = {}
+    for agent_file in agent_files:
+        if cache is None:
+            continue
+        source_hash = plan.observe(agent_file)[1]
+        source_hashes[agent_file] = source_hash
+        key = agent_file.relative_to(target_root).as_posix()
+        outputs = cache.lookup(key, source_hash)
+        if outputs is not None and all(
+            plan.observe(target_root / relative) == (True, digest) for relative, digest in outputs
+        ):
+            cache.hits += 1
+            cached[agent_file] = outputs
+        else:
+            cache.misses += 1
+
+    pending = [agent_file for agent_file in agent_files if agent_file not in cached]
+    rendered = dict(
+        zip(
+            pending,
+            map_ordered(
+                lambda agent_file: render_agent_outputs(agent_file, plan.read_text(agent_file)),
+                pending,
+                plan.jobs,
+            ),
+        )
+    )
+
+    for agent_file in agent_files:
+        source_label = f"project:agents/{agent_file.name}"
+        hit = cached.get(agent_file)
+        # An earlier agent rendering to the same name invalidates the hit.
+        if hit is not None and any(plan.planned(target_root / relative) for relative, _ in hit):
+            hit = None
+        if hit is not None:
+            for relative, digest in hit:
+                plan.record(Path(relative), "skipped", reason="render-cache-hit")
+                update_manifest_entry(
+                    manifest_entries,
+                    Path(relative),
+                    ownership="derived-runtime",
+                    source_label=source_label,
+                    kind="file",
+                    managed_hash=digest,
+                    observed_hash=digest,
+                    status="in-sync",
+                )
+            continue
+        if agent_file not in rendered:
+            rendered[agent_file] = render_agent_outputs(agent_file, plan.read_text(agent_file))
+        outputs = []
+        for relative, content in rendered[agent_file]:
+            candidate = plan.prepare(content, target_root / relative)
+            plan_managed_bytes(
+                plan,
+                target_root / relative,
+                relative,
+                content,
+                manifest_entries,
+                ownership="derived-runtime",
+                source_label=source_label,
+                always_overwrite=True,
+                preserve_untracked=False,
+                candidate=candidate,
+            )
+            outputs.append((relative.as_posix(), candidate.desired_hash))
+        source_hash = source_hashes.get(agent_file)
+        if cache is not None and source_hash is not None:
+            cache.store(agent_file.relative_to(target_root).as_posix(), source_hash, outputs)
+
+
+def plan_runtime_mirror(
+    plan: SyncPlan,
+    source: Path,
+    target_root: Path,
+    base_relative: Path,
+    manifest_entries: Dict[str, dict],
+    *,
+    source_label_prefix: str,
+    mirror: bool = False,
+) -> None:
+    """Plan a derived-runtime tree such as .github/skills from a project tree.
+
+    Without mirror this matches plan_tree_with_policy with always_overwrite,
+    except that a target still linked to its source by an earlier mirror run
+    is rewritten as a real copy. With mirror every file becomes a hardlink to
+    its source (a per-file symlink across devices), and a target that already
+    is its unchanged source is confirmed by inode identity instead of hashed.
+    """
+    if not plan.exists(source):
+        raise FileNotFoundError(f"Source path not found: {source}")
+
+    link_mode: Optional[str] = None
+    if mirror:
+        # On a first install the source tree is itself still only planned.
+        existing = source
+        while not existing.exists() and existing.parent != existing:
+            existing = existing.parent
+        try:
+            same_device = os.stat(existing).st_dev == os.stat(target_root).st_dev
+        except OSError:
+            same_device = False
+        link_mode = "hardlink" if same_device else "symlink"
+    entries = plan.list_files(source)
+
+    def prepare(entry: TreeEntry) -> Tuple[Optional[str], Optional[SyncCandidate]]:
+        target_file = target_root / base_relative / entry.relative
+        linked = None
+        if plan.planned(entry.path) is None and plan.planned(target_file) is None:
+            linked = mirror_link_mode(entry.path, target_file)
+        if link_mode is None and linked is None:
+            return None, plan.prepare(entry.path, target_file)
+        return linked, None
+
+    for entry, (linked, candidate) in zip(entries, map_ordered(prepare, entries, plan.jobs)):
+        record_path = base_relative / entry.relative
+        target_file = target_root / record_path
+        source_label = f"{source_label_prefix}/{entry.relative}"
+        if candidate is not None:
+            plan_managed_bytes(
+                plan,
+                target_file,
+                record_path,
+                entry.path,
+                manifest_entries,
+                ownership="derived-runtime",
+                source_label=source_label,
+                always_overwrite=True,
+                preserve_untracked=False,
+                candidate=candidate,
+            )
+            continue
+        source_hash = plan.observe(entry.path)[1]
+        if link_mode is not None and linked is not None:
+            plan.record(record_path, "skipped", reason="mirror-linked")
+            status = "in-sync"
+        else:
+            plan.add(
+                SyncAction(
+                    record_path,
+                    "updated" if plan.exists(target_file) else "added",
+                    target=target_file,
+                    source_file=entry.path,
+                    digest=source_hash,
+                    mirror=link_mode,
+                    reason="mirror" if link_mode is not None else "derived-copy",
+                )
+            )
+            status = "managed"
+        update_manifest_entry(
+            manifest_entries,
+            record_path,
+            ownership="derived-runtime",
+            source_label=source_label,
+            kind="file",
+            managed_hash=source_hash,
+            observed_hash=source_hash,
+            status=status,
+            mirror=linked if link_mode is not None and linked is not None else link_mode,
+        )
+
+
+def plan_portable_runtime(
+    plan: SyncPlan,
+    source_root: Path,
+    target_root: Path,
+    force: bool,
+    manifest_entries: Dict[str, dict],
+    mirror: bool = False,
+) -> None:
+    skills_source = source_root / "skills"
+    agents_source = source_root / "agents"
+    top_level_skill_excludes: Sequence[str] = ()
+    if source_root.resolve() != target_root.resolve():
+        top_level_skill_excludes = ("gate-check",)
+
+    plan_seed_from_legacy_runtime(plan, target_root, Path("skills"), excludes=top_level_skill_excludes)
+    plan_seed_from_legacy_runtime(plan, target_root, Path("agents"))
+    plan_tree_with_policy(
+        plan,
+        skills_source,
+        target_root,
+        Path("skills"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:skills",
+        force=force,
+        excludes=top_level_skill_excludes,
+    )
+    plan_tree_with_policy(
+        plan,
+        agents_source,
+        target_root,
+        Path("agents"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:agents",
+        force=force,
+    )
+
+    guide_templates = {
+        Path("AGENTS.md"): source_root / "docs" / "AGENTS.template.md",
+        Path("CLAUDE.md"): source_root / "docs" / "CLAUDE.template.md",
+        Path("GEMINI.md"): source_root / "docs" / "GEMINI.template.md",
+    }
+    for relative_path, template_path in guide_templates.items():
+        if not template_path.exists():
+            continue
+        normalized_content = normalize_text_content(template_path.read_text(encoding="utf-8"))
+        managed_hash = hash_bytes(normalized_content.encode("utf-8"))
+        target_file = target_root / relative_path
+        if plan.exists(target_file):
+            plan.record(relative_path, "skipped", "[project-owned]", reason="project-owned")
+            update_manifest_entry(
+                manifest_entries,
+                relative_path,
+                ownership="project-owned",
+                source_label=f"template:docs/{template_path.name}",
+                kind="file",
+                managed_hash=managed_hash,
+                observed_hash=plan.observe(target_file)[1],
+                status="project-owned",
+            )
+            continue
+        # Guides are written in text mode, so keep the platform line endings.
+        written_bytes = normalized_content.replace("\n", os.linesep).encode("utf-8")
+        plan.add(
+            SyncAction(
+                relative_path,
+                "added",
+                target=target_file,
+                content=written_bytes,
+                digest=hash_bytes(written_bytes),
+                reason="target-missing",
+            )
+        )
+        update_manifest_entry(
+            manifest_entries,
+            relative_path,
+            ownership="project-owned",
+            source_label=f"template:docs/{template_path.name}",
+            kind="file",
+            managed_hash=managed_hash,
+            observed_hash=hash_bytes(written_bytes),
+            status="project-owned",
+        )
+
+    plan_lifecycle_assets(plan, source_root, target_root, manifest_entries)
+
+    shared_skills = target_root / "skills"
+    for relative_link in PORTABLE_SKILL_LINKS:
+        plan_skill_link(plan, target_root / relative_link, shared_skills, True, relative_link)
+        update_manifest_entry(
+            manifest_entries,
+            relative_link,
+            ownership="derived-runtime",
+            source_label="project:skills",
+            kind="mount",
+            managed_hash=None,
+            observed_hash=None,
+            status="derived-runtime",
+        )
+
+    target_agents_dir = target_root / "agents"
+    if plan.exists(target_agents_dir):
+        agent_files = sorted(
+            entry.path
+            for entry in plan.list_files(target_agents_dir)
+            if "/" not in entry.relative and entry.relative.endswith(".agent.md")
+        )
+        plan_agent_renders(plan, target_root, agent_files, manifest_entries)
+
+    plan_runtime_mirror(
+        plan,
+        target_root / "skills",
+        target_root,
+        Path(".github/skills"),
+        manifest_entries,
+        source_label_prefix="project:skills",
+        mirror=mirror,
+    )
+    plan_runtime_mirror(
+        plan,
+        target_root / "agents",
+        target_root,
+        Path(".github/agents"),
+        manifest_entries,
+        source_label_prefix="project:agents",
+        mirror=mirror,
+    )
+
+
+def install_portable_runtime(
+    source_root: Path,
+    target_root: Path,
+    force: bool,
+    manifest_entries: Dict[str, dict],
+    hash_cache: Optional[HashCache] = None,
+    jobs: int = 1,
+    mirror: bool = False,
+) -> SyncResult:
+    plan = SyncPlan(hash_cache, jobs)
+    plan_portable_runtime(plan, source_root, target_root, force, manifest_entries, mirror)
+    result = apply_sync_plan(plan)
+    record_mirror_modes(plan, manifest_entries)
+    return result
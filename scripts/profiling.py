@@ -0,0 +1,165 @@
+"""Per-phase timing and memory profile for --profile.
+
+A Profiler records a tree of named phases. Each phase gets its wall time,
+CPU time, bytes read and written by this process, files hashed by
+calculate_file_hash, and the tracemalloc peak reached while it ran. Callers
+go through scripts.bootstrap.profile_phase, which is a no-op without a
+profiler, so neither the installer nor manifest_reconciliation.build_report
+imports this module unless a profile was requested.
+
+Byte counts come from the operating system's per-process I/O counters
+(/proc/self/io on Linux, GetProcessIoCounters on Windows) and are null
+elsewhere. Per-phase memory peaks need Python 3.9+ (tracemalloc.reset_peak);
+older interpreters report the peak of the whole run so far.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+PROFILE_FORMAT_VERSION = 1
+
+
+def _proc_io_bytes() -> Optional[Tuple[int, int]]:
+    try:
+        with open("/proc/self/io", "rb") as handle:
+            fields = dict(line.split(b":", 1) for line in handle.read().splitlines() if b":" in line)
+        return int(fields[b"rchar"]), int(fields[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _windows_io_bytes() -> Optional[Tuple[int, int]]:
+    import ctypes
+    from ctypes import wintypes
+
+    class IoCounters(ctypes.Structure):
+        _fields_ = [
+            (name, ctypes.c_ulonglong)
+            for name in (
+                "ReadOperationCount",
+                "WriteOperationCount",
+                "OtherOperationCount",
+                "ReadTransferCount",
+                "WriteTransferCount",
+                "OtherTransferCount",
+            )
+        ]
+
+    counters = IoCounters()
+    kernel32 = ctypes.windll.kernel32
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    if not kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+        return None
+    return counters.ReadTransferCount, counters.WriteTransferCount
+
+
+def process_io_bytes() -> Optional[Tuple[int, int]]:
+    """Return (bytes read, bytes written) by this process so far, or None when unavailable."""
+    if sys.platform.startswith("linux"):
+        return _proc_io_bytes()
+    if sys.platform == "win32":
+        try:
+            return _windows_io_bytes()
+        except (AttributeError, OSError):
+            return None
+    return None
+
+
+def _files_hashed() -> int:
+    from scripts import bootstrap
+
+    return bootstrap.FILES_HASHED
+
+
+class _Phase:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.children: List[_Phase] = []
+        self.io_start = process_io_bytes()
+        self.hashed_start = _files_hashed()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        self.memory_peak = 0
+        self.stats: Dict[str, Any] = {}
+
+    def finish(self) -> None:
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        io_end = process_io_bytes()
+        if tracemalloc.is_tracing():
+            self.memory_peak = max(self.memory_peak, tracemalloc.get_traced_memory()[1])
+        self.stats = {
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "bytes_read": io_end[0] - self.io_start[0] if io_end and self.io_start else None,
+            "bytes_written": io_end[1] - self.io_start[1] if io_end and self.io_start else None,
+            "files_hashed": _files_hashed() - self.hashed_start,
+            "memory_peak_bytes": self.memory_peak if tracemalloc.is_tracing() else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"name": self.name, **self.stats}
+        if self.children:
+            data["phases"] = [child.to_dict() for child in self.children]
+        return data
+
+
+class Profiler:
+    """Nested phase recorder; see the module docstring for what is measured."""
+
+    def __init__(self, name: str, trace_memory: bool = True) -> None:
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.root = _Phase(name)
+        self._stack: List[_Phase] = [self.root]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        parent = self._stack[-1]
+        if tracemalloc.is_tracing():
+            # The parent keeps the peak it reached before this phase; the
+            # child's own peak is folded back in when it finishes.
+            parent.memory_peak = max(parent.memory_peak, tracemalloc.get_traced_memory()[1])
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        current = _Phase(name)
+        parent.children.append(current)
+        self._stack.append(current)
+        try:
+            yield
+        finally:
+            current.finish()
+            self._stack.pop()
+            parent.memory_peak = max(parent.memory_peak, current.memory_peak)
+
+    def finish(self) -> Dict[str, Any]:
+        """Close any open phases and the run itself; returns the profile document."""
+        while len(self._stack) > 1:
+            self._stack.pop().finish()
+        self.root.finish()
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        return {
+            "profile_format_version": PROFILE_FORMAT_VERSION,
+            "argv": sys.argv[1:],
+            "python": platform.python_version(),
+            "platform": sys.platform,
+            "cpu_count": os.cpu_count(),
+            "io_counters": process_io_bytes() is not None,
+            **self.root.to_dict(),
+        }
+
+    def write(self, destination: Path) -> Path:
+        destination.write_text(json.dumps(self.finish(), indent=2) + "\n", encoding="utf-8")
+        return destination
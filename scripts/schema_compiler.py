@@ -0,0 +1,623 @@
+"""Compile JSON Schema documents into specialised Python validators.
+
+generate_source() turns a schema's root and every $defs entry into plain
+Python functions: each keyword becomes an inline type, length, regular
+expression or key-set test, $ref is inlined (recursive references become
+calls), simple if conditions become inline expressions and oneOf/anyOf/not
+become boolean predicates. Tests already implied by earlier ones are left
+out, so a valid document is checked in one flat pass that builds no error
+paths. load_compiled_schema()
+generates and compiles that source once per schema digest per process.
+Nothing is cached on disk: generation costs less than the compile() every
+process would still need.
+
+Only the Draft 2020-12 subset used by this repository's schemas is
+supported: type, const, enum, properties, required, additionalProperties,
+items, minItems, maxItems, uniqueItems, pattern, minLength, maxLength,
+minimum, maximum, exclusiveMinimum, exclusiveMaximum, $ref to #/$defs,
+allOf, anyOf, oneOf, not and if/then/else. "format" and annotations are
+ignored. Anything else raises SchemaCompileError and callers fall back to
+their own validators.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+# Bump when generated code changes without this file changing (the cache key
+# also covers this file's own bytes).
+SCHEMA_COMPILER_VERSION = 1
+
+_ANNOTATIONS = {
+    "$schema", "$id", "$comment", "title", "description", "default", "examples", "format",
+    "deprecated", "readOnly", "writeOnly",
+}
+_KEYWORDS = _ANNOTATIONS | {
+    "type", "const", "enum", "properties", "required", "additionalProperties", "items",
+    "minItems", "maxItems", "uniqueItems", "pattern", "minLength", "maxLength", "minimum",
+    "maximum", "exclusiveMinimum", "exclusiveMaximum", "$ref", "$defs", "allOf", "anyOf",
+    "oneOf", "not", "if", "then", "else",
+}
+_TYPE_TESTS = {
+    "object": "type({0}) is dict",
+    "array": "type({0}) is list",
+    "string": "type({0}) is str",
+    "integer": "(type({0}) is int or (type({0}) is float and {0}.is_integer()))",
+    "number": "type({0}) in (int, float)",
+    "boolean": "type({0}) is bool",
+    "null": "{0} is None",
+}
+
+# Strings remembered per pattern as already matching.
+_PATTERN_MEMO_LIMIT = 4096
+
+_COMPILED: Dict[str, "CompiledSchema"] = {}
+_COMPILER_DIGEST: Optional[str] = None
+
+
+class SchemaError(ValueError):
+    """A document does not match its schema; path is a JSON Pointer."""
+
+    def __init__(self, path: str, message: str) -> None:
+        super().__init__(f"{path or '/'}: {message}")
+        self.path = path or "/"
+        self.message = message
+
+    def within(self, prefix: str) -> "SchemaError":
+        """The same error with its path moved under the JSON Pointer prefix."""
+        return SchemaError(prefix + ("" if self.path == "/" else self.path), self.message)
+
+
+class SchemaCompileError(ValueError):
+    """The schema uses something this compiler does not support."""
+
+
+def _json_key(value: Any) -> Any:
+    """Hashable form of a JSON value under JSON equality (1 == 1.0, True != 1)."""
+    if isinstance(value, bool) or value is None:
+        return ("literal", value)
+    if isinstance(value, (int, float)):
+        return ("number", value)
+    if isinstance(value, str):
+        return ("string", value)
+    if isinstance(value, list):
+        return ("array", tuple(_json_key(item) for item in value))
+    if isinstance(value, dict):
+        return ("object", frozenset((key, _json_key(item)) for key, item in value.items()))
+    raise TypeError(f"not a JSON value: {type(value).__name__}")
+
+
+def _json_equal(left: Any, right: Any) -> bool:
+    return _json_key(left) == _json_key(right)
+
+
+def _all_unique(items: List[Any]) -> bool:
+    if all(type(item) is str for item in items):
+        return len(set(items)) == len(items)
+    return len({_json_key(item) for item in items}) == len(items)
+
+
+def _python_pattern(pattern: str) -> str:
+    """Make an ECMA-262 pattern's `$` mean end of input, as it does in JSON Schema."""
+    translated = []
+    escaped = in_class = False
+    for character in pattern:
+        if escaped:
+            escaped = False
+        elif character == "\\":
+            escaped = True
+        elif in_class:
+            in_class = character != "]"
+        elif character == "[":
+            in_class = True
+        elif character == "$":
+            translated.append(r"\Z")
+            continue
+        translated.append(character)
+    return "".join(translated)
+
+
+class _Generator:
+    def __init__(self, schema: Any) -> None:
+        if not isinstance(schema, (dict, bool)):
+            raise SchemaCompileError("schema must be an object or a boolean")
+        self.root = schema
+        definitions = schema.get("$defs", {}) if isinstance(schema, dict) else {}
+        if not isinstance(definitions, dict):
+            raise SchemaCompileError("$defs must be an object")
+        self.definitions: Dict[str, Any] = definitions
+        self.constants: List[str] = []
+        self.functions: Dict[Tuple[str, bool], str] = {}
+        self.pending: List[Tuple[str, Optional[str], bool]] = []
+        self.anonymous: Dict[str, Any] = {}
+        self.patterns: Dict[str, Tuple[str, str]] = {}
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, prefix: str, expression: str) -> str:
+        name = self.name(prefix)
+        self.constants.append(f"{name} = {expression}")
+        return name
+
+    def key(self, reference: str) -> str:
+        """"" for the root schema, else the $defs name reference points to."""
+        if reference == "#":
+            return ""
+        if reference.startswith("#/$defs/") and reference[len("#/$defs/"):] in self.definitions:
+            return reference[len("#/$defs/"):]
+        raise SchemaCompileError(f"unsupported $ref: {reference}")
+
+    def target(self, key: str) -> Any:
+        return self.root if key == "" else self.definitions[key]
+
+    def pattern(self, source: str) -> Tuple[str, str]:
+        """Names of the compiled pattern and of its set of strings known to match."""
+        if source not in self.patterns:
+            self.patterns[source] = (
+                self.constant("RE", f"re.compile({source!r})"),
+                self.constant("M", "set()"),
+            )
+        return self.patterns[source]
+
+    def definition(self, reference: str, predicate: bool) -> str:
+        key = self.key(reference)
+        if (key, predicate) not in self.functions:
+            label = re.sub(r"\W", "_", key) or "root"
+            name = self.name("p_" if predicate else "v_") + "_" + label
+            self.functions[(key, predicate)] = name
+            self.pending.append((name, key, predicate))
+        return self.functions[(key, predicate)]
+
+    def predicate(self, schema: Any) -> str:
+        name = self.name("p_")
+        self.anonymous[name] = schema
+        self.pending.append((name, None, True))
+        return name
+
+    def resolve(self, schema: Any) -> Any:
+        seen = set()
+        while isinstance(schema, dict) and set(schema) - _ANNOTATIONS == {"$ref"}:
+            reference = schema["$ref"]
+            if reference in seen or not reference.startswith("#/$defs/"):
+                return schema
+            seen.add(reference)
+            schema = self.definitions.get(reference[len("#/$defs/"):], schema)
+        return schema
+
+    def generate(self, header: str) -> str:
+        self.definition("#", False)
+        for key in self.definitions:
+            self.definition(f"#/$defs/{key}", False)
+        functions: List[str] = []
+        while self.pending:
+            name, key, predicate = self.pending.pop(0)
+            emitter = _Emitter(self, predicate, [] if key is None else [key])
+            schema = self.anonymous.pop(name) if key is None else self.target(key)
+            body = emitter.emit(schema, "value", "''", 1)
+            functions.append(f"def {name}(value):")
+            functions.extend(body or ["    pass"])
+            if predicate:
+                functions.append("    return True")
+            functions.append("")
+            functions.append("")
+        validators = ", ".join(
+            f"{key!r}: {name}" for (key, predicate), name in self.functions.items() if not predicate
+        )
+        return "\n".join(
+            [header, "", *self.constants, "", "", *functions, f"VALIDATORS = {{{validators}}}", ""]
+        )
+
+
+def _join(path: str, suffix: str) -> str:
+    """Python expression appending suffix to the JSON Pointer expression path."""
+    return suffix if path == "''" else f"{path} + {suffix}"
+
+
+class _Emitter:
+    def __init__(self, generator: _Generator, predicate: bool, expanding: List[str]) -> None:
+        self.generator = generator
+        self.predicate = predicate
+        # $defs being inlined into the current function; a reference back
+        # into one of them (recursion) becomes a call instead.
+        self.expanding = expanding
+        # What earlier checks in the current block have established, so later
+        # keywords skip repeated type and key tests and reuse loaded values:
+        # variable -> JSON type, variable -> (keys present, keys exact), and
+        # (variable, property) -> variable already holding it.
+        self.types: Dict[str, str] = {}
+        self.keys: Dict[str, Tuple[FrozenSet[str], bool]] = {}
+        self.fields: Dict[Tuple[str, str], str] = {}
+
+    def fail(self, path: str, message: str) -> str:
+        return "return False" if self.predicate else f"raise SchemaError({path}, {message})"
+
+    def check(self, condition: str, path: str, message: str, indent: int) -> List[str]:
+        pad = "    " * indent
+        return [f"{pad}if {condition}:", f"{pad}    {self.fail(path, message)}"]
+
+    def call(self, function: str, variable: str, path: str, indent: int) -> List[str]:
+        pad = "    " * indent
+        if self.predicate:
+            return [f"{pad}if not {function}({variable}):", f"{pad}    return False"]
+        if path == "''":
+            return [f"{pad}{function}({variable})"]
+        # Validators check relative to their own root and the pointer is only
+        # built on failure, so valid documents never concatenate strings.
+        return [
+            f"{pad}try:",
+            f"{pad}    {function}({variable})",
+            f"{pad}except SchemaError as error:",
+            f"{pad}    raise error.within({path}) from None",
+        ]
+
+    def emit(self, schema: Any, variable: str, path: str, indent: int) -> List[str]:
+        if schema is True:
+            return []
+        if schema is False:
+            return ["    " * indent + self.fail(path, repr("is not allowed"))]
+        if not isinstance(schema, dict):
+            raise SchemaCompileError("subschema must be an object or a boolean")
+        unknown = set(schema) - _KEYWORDS
+        if unknown:
+            raise SchemaCompileError(f"unsupported keywords: {sorted(unknown)}")
+        lines: List[str] = []
+
+        types = schema.get("type")
+        if types is not None:
+            names = [types] if isinstance(types, str) else list(types)
+            if not names or any(name not in _TYPE_TESTS for name in names):
+                raise SchemaCompileError(f"unsupported type: {types}")
+            known = self.types.get(variable)
+            if known not in names and not (known == "integer" and "number" in names):
+                test = " or ".join(_TYPE_TESTS[name].format(variable) for name in names)
+                lines += self.check(f"not ({test})", path, repr(f"must be {' or '.join(names)}"), indent)
+                if len(names) == 1:
+                    self.types[variable] = names[0]
+
+        if "const" in schema:
+            lines += self.check(self.not_equal(variable, schema["const"]), path, repr(f"must be {json.dumps(schema['const'])}"), indent)
+            if isinstance(schema["const"], str):
+                self.types[variable] = "string"
+        if "enum" in schema:
+            lines += self.enum(variable, schema["enum"], path, indent)
+
+        lines += self.guarded("string", variable, indent, lambda inner: self.string(schema, variable, path, inner))
+        lines += self.guarded("number", variable, indent, lambda inner: self.number(schema, variable, path, inner))
+        lines += self.guarded("array", variable, indent, lambda inner: self.array(schema, variable, path, inner))
+        lines += self.guarded("object", variable, indent, lambda inner: self.object(schema, variable, path, inner))
+
+        if "$ref" in schema:
+            lines += self.reference(schema["$ref"], variable, path, indent)
+        for subschema in schema.get("allOf", []):
+            lines += self.emit(subschema, variable, path, indent)
+        if "anyOf" in schema:
+            tests = " or ".join(f"{self.generator.predicate(item)}({variable})" for item in schema["anyOf"])
+            lines += self.check(f"not ({tests})", path, repr("must match at least one anyOf schema"), indent)
+        if "oneOf" in schema:
+            lines += self.one_of(schema["oneOf"], variable, path, indent)
+        if "not" in schema:
+            lines += self.check(f"{self.generator.predicate(schema['not'])}({variable})", path, repr("must not match the not schema"), indent)
+        if "if" in schema and ("then" in schema or "else" in schema):
+            pad = "    " * indent
+            then_lines = self.nested(lambda: self.emit(schema.get("then", True), variable, path, indent + 1))
+            else_lines = self.nested(lambda: self.emit(schema.get("else", True), variable, path, indent + 1))
+            test = self.test(schema["if"], variable)
+            if test is None:
+                test = f"{self.generator.predicate(schema['if'])}({variable})"
+            lines.append(f"{pad}if {test}:")
+            lines += then_lines or [f"{pad}    pass"]
+            if else_lines:
+                lines += [f"{pad}else:", *else_lines]
+        return lines
+
+    def reference(self, reference: str, variable: str, path: str, indent: int) -> List[str]:
+        key = self.generator.key(reference)
+        if key in self.expanding:
+            return self.call(self.generator.definition(reference, self.predicate), variable, path, indent)
+        # Inline the definition so a whole document is one flat function per
+        # recursion level, without per-$ref call overhead.
+        self.expanding.append(key)
+        try:
+            return self.emit(self.generator.target(key), variable, path, indent)
+        finally:
+            self.expanding.pop()
+
+    def nested(self, emit: Callable[[], List[str]]) -> List[str]:
+        """Emit a conditional block; what it establishes does not hold after it."""
+        saved = dict(self.types), dict(self.keys), dict(self.fields)
+        try:
+            return emit()
+        finally:
+            self.types, self.keys, self.fields = saved
+
+    def test(self, schema: Any, variable: str) -> Optional[str]:
+        """An inline boolean expression for a simple if schema, or None.
+
+        Covers string const/enum tests on (nested) properties, the usual
+        discriminator form, so they cost no predicate call.
+        """
+        if not isinstance(schema, dict):
+            return None
+        if set(schema) == {"const"} and isinstance(schema["const"], str):
+            return f"{variable} == {schema['const']!r}"
+        if set(schema) == {"enum"} and self.string_enum(schema["enum"]):
+            members = self.generator.constant("E", f"frozenset({sorted(schema['enum'])!r})")
+            return f"(type({variable}) is str and {variable} in {members})"
+        if set(schema) != {"properties"} or not isinstance(schema["properties"], dict):
+            return None
+        known_keys = self.keys.get(variable, (frozenset(), False))[0]
+        parts = []
+        for name, subschema in schema["properties"].items():
+            field = self.fields.get((variable, name), f"{variable}[{name!r}]")
+            part = self.test(subschema, field)
+            if part is None:
+                return None
+            parts.append(part if name in known_keys else f"({name!r} not in {variable} or {part})")
+        test = " and ".join(parts) or "True"
+        if self.types.get(variable) == "object":
+            return test
+        return f"(type({variable}) is not dict or ({test}))"
+
+    @staticmethod
+    def string_enum(values: Any) -> bool:
+        return isinstance(values, list) and bool(values) and all(isinstance(value, str) for value in values)
+
+    def guarded(self, kind: str, variable: str, indent: int, body: Callable[[int], List[str]]) -> List[str]:
+        known = self.types.get(variable)
+        if known == kind or (kind == "number" and known == "integer"):
+            return body(indent)
+        inner = self.nested(lambda: body(indent + 1))
+        if not inner:
+            return []
+        test = _TYPE_TESTS["number" if kind == "number" else kind].format(variable)
+        return ["    " * indent + f"if {test}:", *inner]
+
+    def not_equal(self, variable: str, value: Any) -> str:
+        if value is None or isinstance(value, bool):
+            return f"{variable} is not {value!r}"
+        if isinstance(value, str):
+            return f"{variable} != {value!r}"
+        if isinstance(value, (int, float)):
+            return f"(type({variable}) not in (int, float) or {variable} != {value!r})"
+        constant = self.generator.constant("C", repr(value))
+        return f"not _json_equal({variable}, {constant})"
+
+    def enum(self, variable: str, values: Any, path: str, indent: int) -> List[str]:
+        if not isinstance(values, list) or not values:
+            raise SchemaCompileError("enum must be a non-empty array")
+        message = repr(f"must be one of {json.dumps(values)}")
+        if self.string_enum(values):
+            members = self.generator.constant("E", f"frozenset({sorted(values)!r})")
+            if self.types.get(variable) == "string":
+                return self.check(f"{variable} not in {members}", path, message, indent)
+            self.types[variable] = "string"
+            return self.check(f"type({variable}) is not str or {variable} not in {members}", path, message, indent)
+        members = self.generator.constant("E", repr(values))
+        return self.check(f"not any(_json_equal({variable}, item) for item in {members})", path, message, indent)
+
+    def string(self, schema: Dict[str, Any], variable: str, path: str, indent: int) -> List[str]:
+        lines: List[str] = []
+        if "minLength" in schema:
+            lines += self.check(f"len({variable}) < {int(schema['minLength'])}", path, repr(f"must be at least {schema['minLength']} characters"), indent)
+        if "maxLength" in schema:
+            lines += self.check(f"len({variable}) > {int(schema['maxLength'])}", path, repr(f"must be at most {schema['maxLength']} characters"), indent)
+        if "pattern" in schema:
+            try:
+                re.compile(_python_pattern(schema["pattern"]))
+            except (re.error, TypeError) as error:
+                raise SchemaCompileError(f"unsupported pattern: {schema['pattern']!r}") from error
+            expression, matched = self.generator.pattern(_python_pattern(schema["pattern"]))
+            # Timestamps, digests and IDs repeat across a document, so strings
+            # that already matched skip the regular expression.
+            pad = "    " * indent
+            lines += [
+                f"{pad}if {variable} not in {matched}:",
+                *self.check(f"not {expression}.search({variable})", path, repr(f"must match {schema['pattern']}"), indent + 1),
+                f"{pad}    if len({matched}) < {_PATTERN_MEMO_LIMIT}:",
+                f"{pad}        {matched}.add({variable})",
+            ]
+        return lines
+
+    def number(self, schema: Dict[str, Any], variable: str, path: str, indent: int) -> List[str]:
+        lines: List[str] = []
+        for keyword, operator in (
+            ("minimum", "<"), ("maximum", ">"), ("exclusiveMinimum", "<="), ("exclusiveMaximum", ">="),
+        ):
+            if keyword in schema:
+                lines += self.check(f"{variable} {operator} {schema[keyword]!r}", path, repr(f"violates {keyword} {schema[keyword]}"), indent)
+        return lines
+
+    def array(self, schema: Dict[str, Any], variable: str, path: str, indent: int) -> List[str]:
+        lines: List[str] = []
+        if "minItems" in schema:
+            lines += self.check(f"len({variable}) < {int(schema['minItems'])}", path, repr(f"must have at least {schema['minItems']} items"), indent)
+        if "maxItems" in schema:
+            lines += self.check(f"len({variable}) > {int(schema['maxItems'])}", path, repr(f"must have at most {schema['maxItems']} items"), indent)
+        if schema.get("uniqueItems") is True:
+            lines += self.check(f"not _all_unique({variable})", path, repr("must not contain duplicate items"), indent)
+        if "items" in schema:
+            index = self.generator.name("i")
+            item = self.generator.name("x")
+            body = self.nested(lambda: self.emit(schema["items"], item, _join(path, f'"/" + str({index})'), indent + 1))
+            if body:
+                lines += ["    " * indent + f"for {index}, {item} in enumerate({variable}):", *body]
+        return lines
+
+    def object(self, schema: Dict[str, Any], variable: str, path: str, indent: int) -> List[str]:
+        lines: List[str] = []
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+        additional = schema.get("additionalProperties", True)
+        if not isinstance(properties, dict) or not isinstance(required, list):
+            raise SchemaCompileError("properties must be an object and required an array")
+        known, exact = self.keys.get(variable, (frozenset(), False))
+        if additional is False and required and set(required) == set(properties):
+            if not (exact and known == set(properties)):
+                keys = self.generator.constant("K", f"frozenset({sorted(properties)!r})")
+                lines += self.check(
+                    f"{variable}.keys() != {keys}",
+                    path,
+                    f'"has invalid properties; missing=" + repr(sorted({keys} - {variable}.keys())) + ", unknown=" + repr(sorted({variable}.keys() - {keys}))',
+                    indent,
+                )
+                known, exact = frozenset(properties), True
+        else:
+            if required and not known >= set(required):
+                keys = self.generator.constant("K", f"frozenset({sorted(required)!r})")
+                lines += self.check(
+                    f"not ({variable}.keys() >= {keys})",
+                    path,
+                    f'"is missing required properties " + repr(sorted({keys} - {variable}.keys()))',
+                    indent,
+                )
+                known = known | frozenset(required)
+            if additional is False and not (exact and known <= set(properties)):
+                keys = self.generator.constant("K", f"frozenset({sorted(properties)!r})")
+                lines += self.check(
+                    f"not ({variable}.keys() <= {keys})",
+                    path,
+                    f'"has unknown properties " + repr(sorted({variable}.keys() - {keys}))',
+                    indent,
+                )
+            elif additional is not True and additional is not False:
+                keys = self.generator.constant("K", f"frozenset({sorted(properties)!r})")
+                key, item = self.generator.name("k"), self.generator.name("x")
+                body = self.nested(lambda: self.emit(additional, item, _join(path, f'"/" + {key}'), indent + 2))
+                if body:
+                    pad = "    " * indent
+                    lines += [f"{pad}for {key}, {item} in {variable}.items():", f"{pad}    if {key} not in {keys}:", *body]
+        self.keys[variable] = (known, exact)
+        for name, subschema in properties.items():
+            pointer = _join(path, repr("/" + name.replace("~", "~0").replace("/", "~1")))
+            item = self.fields.get((variable, name))
+            if item is not None:
+                lines += self.emit(subschema, item, pointer, indent)
+            elif name in known:
+                item = self.generator.name("x")
+                self.fields[(variable, name)] = item
+                body = self.emit(subschema, item, pointer, indent)
+                if body:
+                    lines += ["    " * indent + f"{item} = {variable}[{name!r}]", *body]
+                else:
+                    del self.fields[(variable, name)]
+            else:
+                item = self.generator.name("x")
+                body = self.nested(lambda: self.emit(subschema, item, pointer, indent + 1))
+                if body:
+                    pad = "    " * indent
+                    lines += [f"{pad}if {name!r} in {variable}:", f"{pad}    {item} = {variable}[{name!r}]", *body]
+        return lines
+
+    def one_of(self, alternatives: Any, variable: str, path: str, indent: int) -> List[str]:
+        if not isinstance(alternatives, list) or not alternatives:
+            raise SchemaCompileError("oneOf must be a non-empty array")
+        nulls = [item for item in alternatives if item == {"type": "null"}]
+        others = [item for item in alternatives if item != {"type": "null"}]
+        if len(alternatives) == 2 and len(nulls) == 1:
+            # The common nullable form: check the other branch in place for
+            # precise error paths, provided it cannot accept null itself.
+            resolved = self.generator.resolve(others[0])
+            types = resolved.get("type") if isinstance(resolved, dict) else None
+            if types is not None and "null" not in ([types] if isinstance(types, str) else types):
+                body = self.nested(lambda: self.emit(others[0], variable, path, indent + 1))
+                return ["    " * indent + f"if {variable} is not None:", *body] if body else []
+        tests = " + ".join(f"{self.generator.predicate(item)}({variable})" for item in alternatives)
+        return self.check(f"({tests}) != 1", path, repr("must match exactly one oneOf schema"), indent)
+
+
+def generate_source(schema: Any, header: str = "# Generated by scripts/schema_compiler.py.") -> str:
+    """Python source defining VALIDATORS: {"" or $defs name: function(value)}."""
+    return _Generator(schema).generate(header)
+
+
+class CompiledSchema:
+    """Validators generated from one schema's bytes; see the module docstring."""
+
+    def __init__(self, key: str, validators: Dict[str, Callable[[Any], None]]) -> None:
+        self.key = key
+        self.validators = validators
+
+    def validate(self, value: Any, definition: str = "", path: str = "") -> None:
+        """Raise SchemaError unless value matches the root schema or the named $defs entry.
+
+        Error paths are JSON Pointers below path.
+        """
+        try:
+            self.validators[definition](value)
+        except SchemaError as error:
+            if not path:
+                raise
+            raise error.within(path) from None
+
+    def first_error(self, value: Any, definition: str = "") -> Optional[SchemaError]:
+        """The first SchemaError validate() would raise, or None when value matches."""
+        try:
+            self.validate(value, definition)
+        except SchemaError as error:
+            return error
+        return None
+
+
+def _compiler_digest() -> str:
+    global _COMPILER_DIGEST
+    if _COMPILER_DIGEST is None:
+        _COMPILER_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+    return _COMPILER_DIGEST
+
+
+def compiled_schema_key(schema_bytes: bytes) -> str:
+    """Memo key: schema bytes and this compiler."""
+    digest = hashlib.sha256(f"{SCHEMA_COMPILER_VERSION}:{_compiler_digest()}".encode("ascii"))
+    digest.update(hashlib.sha256(schema_bytes).digest())
+    return digest.hexdigest()
+
+
+def _instantiate(key: str, source: str) -> CompiledSchema:
+    code = compile(source, f"<schema validators {key[:12]}>", "exec")
+    namespace: Dict[str, Any] = {
+        "__name__": f"schema_validators_{key[:12]}",
+        "re": re,
+        "SchemaError": SchemaError,
+        "_json_equal": _json_equal,
+        "_all_unique": _all_unique,
+    }
+    exec(code, namespace)
+    validators = namespace.get("VALIDATORS")
+    if not isinstance(validators, dict) or "" not in validators:
+        raise SchemaCompileError("generated code does not define VALIDATORS")
+    return CompiledSchema(key, validators)
+
+
+def load_compiled_schema(
+    schema_bytes: bytes,
+    check: Optional[Callable[[Any], Any]] = None,
+) -> CompiledSchema:
+    """Return the validators for schema_bytes, generating them once per process.
+
+    `check` runs on the parsed schema before generation and may raise to
+    refuse it. Raises SchemaCompileError for unsupported or invalid schemas.
+    """
+    key = compiled_schema_key(schema_bytes)
+    compiled = _COMPILED.get(key)
+    if compiled is not None:
+        return compiled
+    try:
+        schema = json.loads(schema_bytes.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise SchemaCompileError("schema is not valid UTF-8 JSON") from error
+    if check is not None:
+        check(schema)
+    header = (
+        f"# Generated by scripts/schema_compiler.py (compiler version {SCHEMA_COMPILER_VERSION}) "
+        f"from schema sha256:{hashlib.sha256(schema_bytes).hexdigest()}. Do not edit."
+    )
+    compiled = _instantiate(key, generate_source(schema, header))
+    _COMPILED[key] = compiled
+    return compiled
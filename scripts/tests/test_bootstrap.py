@@ -1,5 +1,7 @@
+import errno
 import hashlib
 import json
+import multiprocessing
 import os
 import shutil
 import subprocess
@@ -12,6 +14,7 @@ import pytest
 
 from scripts import bootstrap
 from scripts import manifest_reconciliation
+from scripts import portable_runtime
 
 
 PHASE0B_REPO_ROOT = Path(bootstrap.__file__).resolve().parent.parent
@@ -32,6 +35,12 @@ PHASE4A_SIMPLE_MANIFEST_NAMES = {
 }
 
 
+@pytest.fixture(autouse=True)
+def _isolated_user_cache(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    # Probe and validation caches must not leak between tests or into the real user cache.
+    monkeypatch.setenv("AI_WORKFLOW_CACHE_HOME", str(tmp_path_factory.mktemp("user-cache")))
+
+
 def _find_phase0b_bash() -> str:
     candidates = []
     explicit = os.environ.get("PHASE0B_BASH")
@@ -871,7 +880,7 @@ def test_phase4b_same_run_timestamp_mutation_blocks_no_write_proof(monkeypatch:
 
     state = {"target_calls": 0, "source_calls": 0}
 
-    def fake_tree_snapshot(root: Path) -> dict:
+    def fake_tree_snapshot(root: Path, known_digests: Optional[Dict[str, str]] = None) -> dict:
         resolved = root.resolve()
         if resolved == target.resolve():
             state["target_calls"] += 1
@@ -879,7 +888,7 @@ def test_phase4b_same_run_timestamp_mutation_blocks_no_write_proof(monkeypatch:
         if resolved == source.resolve():
             state["source_calls"] += 1
             return deepcopy(base_source)
-        return original_tree_snapshot(root)
+        return original_tree_snapshot(root, known_digests)
 
     monkeypatch.setattr(manifest_reconciliation, "_tree_snapshot", fake_tree_snapshot)
     report = manifest_reconciliation.build_report(source, target, "conversion-plan")
@@ -2104,6 +2113,35 @@ def test_check_git_uncommitted_changes_returns_false_when_git_not_available(tmp_
     assert not has_changes
 
 
+def test_git_dirty_paths_maps_one_status_call_onto_managed_paths(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    subprocess.run(["git", "init"], cwd=tmp_path, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=tmp_path, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.name", "Test User"], cwd=tmp_path, check=True, capture_output=True)
+    project = tmp_path / "services" / "api"
+    for relative in (".github/a.md", "skills/demo/SKILL.md", "agents/coder.agent.md", "AGENTS.md"):
+        (project / relative).parent.mkdir(parents=True, exist_ok=True)
+        (project / relative).write_text("committed\n", encoding="utf-8")
+    subprocess.run(["git", "add", "."], cwd=tmp_path, check=True, capture_output=True)
+    subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=tmp_path, check=True, capture_output=True)
+    subprocess.run(
+        ["git", "mv", "skills/demo/SKILL.md", "skills/demo/MOVED.md"], cwd=project, check=True, capture_output=True
+    )
+    (project / ".claude" / "agents").mkdir(parents=True)
+    (project / ".claude" / "agents" / "new file.md").write_text("untracked\n", encoding="utf-8")
+    (project / "AGENTS.md").write_text("edited\n", encoding="utf-8")
+
+    calls = []
+    original_run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda *args, **kwargs: calls.append(args) or original_run(*args, **kwargs))
+
+    dirty = bootstrap.git_dirty_paths(project, [".github", "skills", "agents", ".claude", "AGENTS.md"])
+
+    assert dirty == {".github": False, "skills": True, "agents": False, ".claude": True, "AGENTS.md": True}
+    assert len(calls) == 1
+
+
 def test_sync_without_force_skips_identical_files(tmp_path: Path) -> None:
     """Test that sync skips files with identical content when force=False."""
     source = tmp_path / ".github"
@@ -2874,3 +2912,1516 @@ def test_phase3_preserves_customized_or_unproven_lifecycle_content(tmp_path: Pat
             in case_result.files_skipped
         ), case_name
         assert case_manifest["WORKFLOW.md"] == original_component, case_name
+
+
+def _settle_hash_cache(cache: bootstrap.HashCache) -> None:
+    for entry in cache.entries.values():
+        entry["checked_at_ns"] += 10 * bootstrap.HASH_CACHE_RACY_WINDOW_NS
+
+
+def test_hash_cache_reuses_digest_for_unchanged_fingerprint(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    target = tmp_path / "skills" / "demo" / "SKILL.md"
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"# Demo\n")
+    cache = bootstrap.HashCache(tmp_path)
+    expected = bootstrap.hash_bytes(b"# Demo\n")
+
+    assert cache.file_hash(target) == expected
+    _settle_hash_cache(cache)
+    cache.save()
+
+    reloaded = bootstrap.HashCache.load(tmp_path)
+    monkeypatch.setattr(
+        bootstrap, "calculate_file_hash", lambda path: pytest.fail(f"rehashed {path}")
+    )
+    assert reloaded.file_hash(target) == expected
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+    assert (tmp_path / ".ai-workflow-cache" / ".gitignore").read_text(encoding="utf-8").endswith("*\n")
+
+
+def test_hash_cache_rehashes_changed_or_racy_fingerprints(tmp_path: Path) -> None:
+    target = tmp_path / "agents" / "coder.agent.md"
+    target.parent.mkdir(parents=True)
+    target.write_bytes(b"v1\n")
+    cache = bootstrap.HashCache(tmp_path)
+    cache.file_hash(target)
+
+    # Freshly hashed files are racy until the mtime granularity window passes.
+    assert cache.file_hash(target) == bootstrap.hash_bytes(b"v1\n")
+    assert cache.hits == 0
+
+    _settle_hash_cache(cache)
+    target.write_bytes(b"v2\n")
+    os.utime(target, ns=(1, 1))
+    assert cache.file_hash(target) == bootstrap.hash_bytes(b"v2\n")
+    assert cache.hits == 0
+
+
+def test_hash_cache_ignores_corrupt_or_foreign_cache_files(tmp_path: Path) -> None:
+    cache_file = tmp_path / ".ai-workflow-cache" / "file-hashes.json"
+    cache_file.parent.mkdir()
+    cache_file.write_text("{not json", encoding="utf-8")
+    assert bootstrap.HashCache.load(tmp_path).entries == {}
+
+    cache_file.write_text(json.dumps({"version": 999, "entries": {}}), encoding="utf-8")
+    assert bootstrap.HashCache.load(tmp_path).entries == {}
+
+    cache_file.write_text(
+        json.dumps(
+            {
+                "version": bootstrap.HASH_CACHE_VERSION,
+                "entries": {"a.md": {"fingerprint": [1, 2, 3, 4], "checked_at_ns": 9, "sha256": "bad"}},
+            }
+        ),
+        encoding="utf-8",
+    )
+    assert bootstrap.HashCache.load(tmp_path).entries == {}
+
+
+def test_sync_managed_bytes_records_written_digest_in_hash_cache(tmp_path: Path) -> None:
+    cache = bootstrap.HashCache(tmp_path)
+    manifest_entries: Dict[str, dict] = {}
+    result = bootstrap.SyncResult([], [], [], [])
+
+    bootstrap.sync_managed_bytes(
+        tmp_path / "skills" / "demo.md",
+        Path("skills/demo.md"),
+        b"demo\n",
+        result,
+        manifest_entries,
+        ownership="template-managed",
+        source_label="template:skills/demo.md",
+        hash_cache=cache,
+    )
+
+    assert result.files_added == ["skills/demo.md"]
+    assert cache.entries["skills/demo.md"]["sha256"] == bootstrap.hash_bytes(b"demo\n")
+
+
+def test_sync_managed_bytes_streams_a_source_file_without_loading_it(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "template" / "library.excalidrawlib"
+    source.parent.mkdir()
+    payload = os.urandom(3 * bootstrap.COPY_CHUNK_SIZE + 17)
+    source.write_bytes(payload)
+    target = tmp_path / "project" / "skills" / "library.excalidrawlib"
+    manifest_entries: Dict[str, dict] = {}
+    result = bootstrap.SyncResult([], [], [], [])
+
+    def refuse_read_bytes(self: Path) -> bytes:
+        raise AssertionError(f"{self} was loaded into memory")
+
+    monkeypatch.setattr(Path, "read_bytes", refuse_read_bytes)
+    for _ in range(2):
+        bootstrap.sync_managed_bytes(
+            target,
+            Path("skills/library.excalidrawlib"),
+            source,
+            result,
+            manifest_entries,
+            ownership="template-managed",
+            source_label="template:skills/library.excalidrawlib",
+        )
+    monkeypatch.undo()
+
+    assert result.files_added == ["skills/library.excalidrawlib"]
+    assert result.files_skipped == ["skills/library.excalidrawlib"]
+    assert target.read_bytes() == payload
+    expected = f"sha256:{hashlib.sha256(payload).hexdigest()}"
+    assert manifest_entries["skills/library.excalidrawlib"]["managed_hash"] == expected
+
+
+def test_files_are_identical_compares_sizes_before_hashing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    file1 = tmp_path / "a.bin"
+    file2 = tmp_path / "b.bin"
+    file1.write_bytes(b"short")
+    file2.write_bytes(b"longer content")
+    monkeypatch.setattr(bootstrap, "calculate_file_hash", lambda path: pytest.fail(f"hashed {path}"))
+
+    assert not bootstrap.files_are_identical(file1, file2)
+
+@pytest.mark.parametrize(
+    ("size", "change_at", "expected"),
+    [
+        (0, None, True),
+        (100, None, True),
+        (100, 50, False),
+        (3 * 1024 * 1024 + 5, None, True),
+        (3 * 1024 * 1024 + 5, 0, False),
+        (3 * 1024 * 1024 + 5, 2 * 1024 * 1024, False),
+        (3 * 1024 * 1024 + 5, -1, False),
+    ],
+)
+def test_compare_files_matches_byte_equality(
+    tmp_path: Path, size: int, change_at: Optional[int], expected: bool
+) -> None:
+    payload = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    other = bytearray(payload)
+    if change_at is not None:
+        other[change_at] ^= 0xFF
+    (tmp_path / "a.bin").write_bytes(payload)
+    (tmp_path / "b.bin").write_bytes(bytes(other))
+
+    assert bootstrap.compare_files(tmp_path / "a.bin", tmp_path / "b.bin") is expected
+
+
+def test_compare_files_decides_same_inode_and_size_without_reading(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    original = tmp_path / "original.md"
+    original.write_text("content\n", encoding="utf-8")
+    linked = tmp_path / "linked.md"
+    os.link(original, linked)
+    longer = tmp_path / "longer.md"
+    longer.write_text("content plus more\n", encoding="utf-8")
+    monkeypatch.setattr("builtins.open", lambda *args, **kwargs: pytest.fail("file contents were read"))
+
+    assert bootstrap.compare_files(original, linked)
+    assert not bootstrap.compare_files(original, longer)
+    assert not bootstrap.compare_files(original, tmp_path)
+
+
+def test_sync_tree_compares_existing_files_without_hashing(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "source"
+    destination = tmp_path / "destination"
+    for root in (source, destination):
+        (root / "nested").mkdir(parents=True)
+        (root / "same.md").write_text("same\n", encoding="utf-8")
+    (source / "nested" / "changed.md").write_text("template\n", encoding="utf-8")
+    (destination / "nested" / "changed.md").write_text("project!\n", encoding="utf-8")
+    (source / "new.md").write_text("new\n", encoding="utf-8")
+    monkeypatch.setattr(bootstrap, "calculate_file_hash", lambda path: pytest.fail(f"hashed {path}"))
+
+    result = bootstrap.sync_tree(source, destination, force=False)
+
+    assert result.files_skipped == ["same.md"]
+    assert result.files_conflicted == ["nested/changed.md"]
+    assert result.files_added == ["new.md"]
+
+def test_sync_result_records_carry_action_and_reason_per_path(tmp_path: Path) -> None:
+    source = tmp_path / "template" / ".github"
+    target_root = tmp_path / "project"
+    source.mkdir(parents=True)
+    for name in ("kept.md", "refreshed.md", "customized.md", "untracked.md", "same.md"):
+        (source / name).write_text(f"{name} v1\n", encoding="utf-8")
+    manifest_entries: Dict[str, dict] = {}
+    bootstrap.sync_tree_with_policy(
+        source,
+        target_root,
+        Path(".github"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:.github",
+    )
+    for name in ("refreshed.md", "customized.md", "untracked.md"):
+        (source / name).write_text(f"{name} v2\n", encoding="utf-8")
+    (target_root / ".github" / "customized.md").write_text("project edit\n", encoding="utf-8")
+    del manifest_entries[".github/untracked.md"]
+    (source / "new.md").write_text("new\n", encoding="utf-8")
+    (target_root / ".github" / "kept.md").unlink()
+
+    result = bootstrap.sync_tree_with_policy(
+        source,
+        target_root,
+        Path(".github"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:.github",
+    )
+
+    reasons = {record.path: (record.action, record.reason) for record in result.records}
+    assert reasons == {
+        ".github/customized.md": ("skipped", "preserved-customization"),
+        ".github/kept.md": ("added", "target-missing"),
+        ".github/new.md": ("added", "target-missing"),
+        ".github/refreshed.md": ("updated", "unmodified-since-install"),
+        ".github/same.md": ("skipped", "in-sync"),
+        ".github/untracked.md": ("skipped", "preserved-existing"),
+    }
+    assert result.files_skipped == [
+        record.label for record in result.records if record.action == "skipped"
+    ]
+    assert ".github/customized.md [preserved customization]" in result.files_skipped
+
+def test_sync_tree_with_policy_parallel_jobs_match_serial_run(tmp_path: Path) -> None:
+    source = tmp_path / "template" / "skills"
+    for index in range(40):
+        skill = source / f"skill-{index:02d}"
+        (skill / "references").mkdir(parents=True)
+        (skill / "SKILL.md").write_text(f"# Skill {index}\n", encoding="utf-8")
+        (skill / "references" / "notes.md").write_text(f"notes {index}\n", encoding="utf-8")
+    (source / "workflows").mkdir()
+    (source / "workflows" / "ci.yml").write_text("ci\n", encoding="utf-8")
+
+    outcomes = []
+    for jobs in (1, 4):
+        target_root = tmp_path / f"project-{jobs}"
+        (target_root / "skills" / "skill-03").mkdir(parents=True)
+        (target_root / "skills" / "skill-03" / "SKILL.md").write_text("custom\n", encoding="utf-8")
+        (target_root / "skills" / "skill-04").mkdir(parents=True)
+        (target_root / "skills" / "skill-04" / "SKILL.md").write_text("# Skill 4\n", encoding="utf-8")
+        manifest_entries: Dict[str, dict] = {}
+        result = bootstrap.sync_tree_with_policy(
+            source,
+            target_root,
+            Path("skills"),
+            manifest_entries,
+            ownership="template-managed",
+            source_label_prefix="template:skills",
+            excludes=("workflows",),
+            jobs=jobs,
+        )
+        stable_entries = {
+            name: {key: value for key, value in entry.items() if key not in {"installed_at", "updated_at"}}
+            for name, entry in manifest_entries.items()
+        }
+        outcomes.append((result, list(manifest_entries), stable_entries))
+
+    assert outcomes[0] == outcomes[1]
+    assert "skills/skill-03/SKILL.md [preserved existing]" in outcomes[1][0].files_skipped
+    assert "skills/workflows [excluded directory]" in outcomes[1][0].files_skipped
+    assert len(outcomes[1][0].files_added) == 78
+
+
+def _write_portable_runtime_fixture(source_root: Path) -> None:
+    (source_root / "skills" / "demo-skill").mkdir(parents=True)
+    (source_root / "skills" / "demo-skill" / "SKILL.md").write_text(
+        "---\nname: demo-skill\ndescription: demo\n---\n",
+        encoding="utf-8",
+    )
+    (source_root / "agents").mkdir(parents=True)
+    (source_root / "agents" / "coder.agent.md").write_text(
+        "---\nname: coder\ndescription: Demo coder\n---\n\n# Demo Coder\n",
+        encoding="utf-8",
+    )
+    (source_root / "docs").mkdir(parents=True)
+    (source_root / "docs" / "AGENTS.template.md").write_text("# Shared guide\n", encoding="utf-8")
+    _write_phase3_lifecycle_fixture_assets(source_root, "# Adopter lifecycle\n")
+
+
+def test_sync_plan_writes_nothing_until_applied(tmp_path: Path) -> None:
+    source_root = tmp_path / "template"
+    _write_portable_runtime_fixture(source_root)
+    planned_root = tmp_path / "planned"
+    direct_root = tmp_path / "direct"
+    planned_root.mkdir()
+    direct_root.mkdir()
+
+    planned_entries: Dict[str, dict] = {}
+    plan = bootstrap.SyncPlan()
+    bootstrap.plan_portable_runtime(plan, source_root, planned_root, False, planned_entries)
+
+    assert list(planned_root.iterdir()) == []
+    assert plan.has_changes
+    assert ".github/skills/demo-skill/SKILL.md" in plan.result().files_added
+
+    applied = bootstrap.apply_sync_plan(plan)
+    direct_entries: Dict[str, dict] = {}
+    direct = bootstrap.install_portable_runtime(source_root, direct_root, False, direct_entries)
+
+    def stable(entries: Dict[str, dict]) -> Dict[str, dict]:
+        return {
+            name: {key: value for key, value in entry.items() if key not in {"installed_at", "updated_at"}}
+            for name, entry in entries.items()
+        }
+
+    assert applied == direct
+    assert stable(planned_entries) == stable(direct_entries)
+    assert _snapshot_tree(planned_root) == _snapshot_tree(direct_root)
+    assert (planned_root / ".codex" / "agents" / "coder.toml").is_file()
+
+
+def test_apply_sync_plan_rejects_source_changed_after_planning(tmp_path: Path) -> None:
+    source = tmp_path / "template" / "agents"
+    source.mkdir(parents=True)
+    (source / "demo.agent.md").write_text("planned\n", encoding="utf-8")
+    target_root = tmp_path / "project"
+
+    plan = bootstrap.SyncPlan()
+    bootstrap.plan_tree_with_policy(
+        plan,
+        source,
+        target_root,
+        Path("agents"),
+        {},
+        ownership="template-managed",
+        source_label_prefix="template:agents",
+    )
+    (source / "demo.agent.md").write_text("changed\n", encoding="utf-8")
+
+    with pytest.raises(RuntimeError, match="Source changed after planning"):
+        bootstrap.apply_sync_plan(plan)
+    assert not (target_root / "agents" / "demo.agent.md").exists()
+
+
+def test_plan_flag_reports_pending_changes_without_writing(tmp_path: Path) -> None:
+    target_root = tmp_path / "project"
+    target_root.mkdir()
+
+    pending = _run_phase0c_python(target_root, "--plan")
+
+    assert pending.returncode == 2, _phase0c_output(pending)
+    assert "Install plan (no files written)" in _phase0c_output(pending)
+    assert list(target_root.iterdir()) == []
+
+    installed = _run_phase0c_python(target_root)
+    assert installed.returncode == 0, _phase0c_output(installed)
+
+    settled = _run_phase0c_python(target_root, "--plan")
+    assert settled.returncode == 0, _phase0c_output(settled)
+
+
+def _disable_reflink(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(bootstrap, "fcntl", None)
+
+
+@pytest.mark.parametrize(
+    "disabled, expected",
+    [
+        ((), None),
+        (("reflink",), "copy_file_range"),
+        (("reflink", "copy_file_range"), "sendfile"),
+        (("reflink", "copy_file_range", "sendfile"), "buffered"),
+    ],
+)
+def test_copy_file_contents_falls_back_through_transfer_primitives(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, disabled: Tuple[str, ...], expected: Optional[str]
+) -> None:
+    if expected in {"copy_file_range", "sendfile"} and not (
+        hasattr(os, expected) and sys.platform.startswith("linux")
+    ):
+        pytest.skip(f"{expected} is not available on this platform")
+    source = tmp_path / "asset.bin"
+    payload = os.urandom(bootstrap.COPY_CHUNK_SIZE * 2 + 123)
+    source.write_bytes(payload)
+    if "reflink" in disabled:
+        _disable_reflink(monkeypatch)
+    for name in ("copy_file_range", "sendfile"):
+        if name in disabled:
+            monkeypatch.delattr(os, name, raising=False)
+
+    method = bootstrap.copy_file_contents(source, tmp_path / "copy.bin")
+
+    assert (tmp_path / "copy.bin").read_bytes() == payload
+    if expected is None:
+        assert method in {"reflink", "copy_file_range", "sendfile", "buffered"}
+    else:
+        assert method == expected
+
+
+def test_copy_file_contents_recovers_from_cross_device_copy_range(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source = tmp_path / "asset.bin"
+    source.write_bytes(b"payload" * 1000)
+    destination = tmp_path / "copy.bin"
+    destination.write_bytes(b"stale and much longer content" * 1000)
+    _disable_reflink(monkeypatch)
+
+    def cross_device(*_args: object) -> int:
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "copy_file_range", cross_device, raising=False)
+    monkeypatch.setattr(os, "sendfile", cross_device, raising=False)
+
+    assert bootstrap.copy_file_contents(source, destination) == "buffered"
+    assert destination.read_bytes() == b"payload" * 1000
+
+
+def test_backup_directory_preserves_bytes_and_mtime_through_transfer_layer(tmp_path: Path) -> None:
+    source = tmp_path / ".github"
+    (source / "skills" / "demo").mkdir(parents=True)
+    asset = source / "skills" / "demo" / "asset.bin"
+    asset.write_bytes(os.urandom(4096))
+    os.utime(asset, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+
+    result = bootstrap.backup_directory(source, "backup")
+
+    copied = tmp_path / "backup" / "skills" / "demo" / "asset.bin"
+    assert result.success
+    assert copied.read_bytes() == asset.read_bytes()
+    assert copied.stat().st_mtime_ns == asset.stat().st_mtime_ns
+
+
+def test_backup_store_deduplicates_unchanged_files_across_snapshots(tmp_path: Path) -> None:
+    (tmp_path / ".github" / "prompts").mkdir(parents=True)
+    (tmp_path / ".github" / "prompts" / "a.md").write_text("alpha\n", encoding="utf-8")
+    (tmp_path / ".github" / "prompts" / "copy.md").write_text("alpha\n", encoding="utf-8")
+    (tmp_path / "skills").mkdir()
+    (tmp_path / "skills" / "b.md").write_text("beta\n", encoding="utf-8")
+    store = bootstrap.BackupStore(tmp_path)
+
+    first = store.snapshot([".github", "skills", "missing"], name="first")
+    (tmp_path / "skills" / "b.md").write_text("beta v2\n", encoding="utf-8")
+    second = store.snapshot([".github", "skills"], name="second")
+    duplicate = store.snapshot([".github"], name="second")
+
+    assert first.success and first.message.endswith("(3 files, 2 new blobs)")
+    assert second.success and second.message.endswith("(3 files, 1 new blobs)")
+    assert not duplicate.success
+    assert store.snapshot_names() == ["first", "second"]
+    assert len([blob for blob in (store.path / "objects").rglob("*") if blob.is_file()]) == 3
+    assert not list(tmp_path.glob("*.backup-*"))
+
+
+def test_backup_store_restore_materialises_files_links_and_metadata(tmp_path: Path) -> None:
+    (tmp_path / "skills" / "demo").mkdir(parents=True)
+    skill = tmp_path / "skills" / "demo" / "SKILL.md"
+    skill.write_text("original\n", encoding="utf-8")
+    os.utime(skill, ns=(1_600_000_000_000_000_000, 1_600_000_000_000_000_000))
+    (tmp_path / ".claude").mkdir()
+    try:
+        os.symlink(os.path.join("..", "skills"), tmp_path / ".claude" / "skills", target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks are not available")
+    store = bootstrap.BackupStore(tmp_path)
+    assert store.snapshot(["skills", ".claude"], name="before").success
+
+    skill.write_text("customized\n", encoding="utf-8")
+    (tmp_path / ".claude" / "skills").unlink()
+    (tmp_path / ".claude" / "skills").mkdir()
+    (tmp_path / "skills" / "demo" / "extra.md").write_text("new\n", encoding="utf-8")
+
+    result = store.restore("before")
+
+    assert result.success, result.message
+    assert skill.read_text(encoding="utf-8") == "original\n"
+    assert skill.stat().st_mtime_ns == 1_600_000_000_000_000_000
+    assert (tmp_path / ".claude" / "skills").is_symlink()
+    assert (tmp_path / "skills" / "demo" / "extra.md").exists()
+
+
+def test_backup_store_restore_refuses_missing_blob_before_writing(tmp_path: Path) -> None:
+    (tmp_path / "agents").mkdir()
+    (tmp_path / "agents" / "a.agent.md").write_text("a\n", encoding="utf-8")
+    (tmp_path / "agents" / "b.agent.md").write_bytes(b"b\n")
+    store = bootstrap.BackupStore(tmp_path)
+    assert store.snapshot(["agents"], name="snap").success
+    (tmp_path / "agents" / "a.agent.md").write_text("changed a\n", encoding="utf-8")
+    store.object_path(bootstrap.hash_bytes(b"b\n")).unlink()
+
+    result = store.restore("snap")
+
+    assert not result.success
+    assert "agents/b.agent.md" in result.message
+    assert (tmp_path / "agents" / "a.agent.md").read_text(encoding="utf-8") == "changed a\n"
+    assert not store.restore("unknown").success
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda entry: entry.pop("mode"),
+        lambda entry: entry.update(mtime_ns="1600000000"),
+        lambda entry: entry.update(mode=True),
+        lambda entry: entry.update(kind="symlink", target=None),
+    ],
+)
+def test_backup_store_restore_rejects_malformed_entries_before_writing(tmp_path: Path, corrupt) -> None:
+    (tmp_path / "agents").mkdir()
+    (tmp_path / "agents" / "a.agent.md").write_text("a\n", encoding="utf-8")
+    (tmp_path / "agents" / "b.agent.md").write_text("b\n", encoding="utf-8")
+    store = bootstrap.BackupStore(tmp_path)
+    assert store.snapshot(["agents"], name="snap").success
+    index = json.loads(store.index_path("snap").read_text(encoding="utf-8"))
+    corrupt(index["entries"][-1])
+    store.index_path("snap").write_text(json.dumps(index), encoding="utf-8")
+    (tmp_path / "agents" / "a.agent.md").write_text("changed a\n", encoding="utf-8")
+
+    result = store.restore("snap")
+
+    assert not result.success and "agents/b.agent.md" in result.message
+    assert (tmp_path / "agents" / "a.agent.md").read_text(encoding="utf-8") == "changed a\n"
+
+
+def test_install_aborts_before_applying_when_backup_fails(tmp_path: Path) -> None:
+    target_root = tmp_path / "adopter"
+    (target_root / ".github" / "prompts").mkdir(parents=True)
+    (target_root / ".github" / "prompts" / "local.md").write_text("mine\n", encoding="utf-8")
+    # A file where the backup store directory belongs makes the snapshot fail.
+    (target_root / bootstrap.BACKUP_STORE_DIRNAME).write_text("", encoding="utf-8")
+    before_files, _ = _snapshot_tree(target_root)
+
+    result = _run_phase0c_python(target_root, "--backup")
+
+    assert result.returncode != 0, _phase0c_output(result)
+    assert "Backup failed" in _phase0c_output(result)
+    assert _snapshot_tree(target_root)[0] == before_files
+
+
+def test_backup_store_names_same_instant_snapshots_uniquely(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "skills").mkdir()
+    (tmp_path / "skills" / "a.md").write_text("a\n", encoding="utf-8")
+    store = bootstrap.BackupStore(tmp_path)
+    instant = bootstrap.datetime(2026, 1, 1, 12, 0, 0)
+    monkeypatch.setattr(bootstrap, "datetime", type("FrozenDatetime", (bootstrap.datetime,), {"now": staticmethod(lambda *args: instant)}))
+
+    results = [store.snapshot(["skills"]) for _ in range(3)]
+
+    assert all(result.success for result in results)
+    assert store.snapshot_names() == ["20260101-120000-000000", "20260101-120000-000000-2", "20260101-120000-000000-3"]
+
+
+def test_shipped_source_index_matches_template_tree() -> None:
+    shipped = json.loads((PHASE0B_REPO_ROOT / bootstrap.SOURCE_INDEX_PATH).read_text(encoding="utf-8"))
+
+    assert shipped == bootstrap.SourceIndex.build(PHASE0B_REPO_ROOT).payload(), (
+        "Run `python scripts/bootstrap.py --write-source-index` after changing template files"
+    )
+    assert shipped["files"]["agents/architect.agent.md"]["role"] == "canonical"
+
+
+def _write_source_index_fixture(source_root: Path) -> Path:
+    skills = source_root / "skills" / "demo"
+    skills.mkdir(parents=True)
+    (skills / "SKILL.md").write_bytes(b"indexed\n")
+    (skills / "notes.md").write_bytes(b"notes\n")
+    bootstrap.SourceIndex.build(source_root).write()
+    subprocess.run(["git", "init"], cwd=source_root, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=source_root, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.name", "Test User"], cwd=source_root, check=True, capture_output=True)
+    _commit_source_index_fixture(source_root, "Initial commit")
+    return skills
+
+
+def _commit_source_index_fixture(source_root: Path, message: str) -> None:
+    subprocess.run(["git", "add", "."], cwd=source_root, check=True, capture_output=True)
+    subprocess.run(["git", "commit", "-m", message], cwd=source_root, check=True, capture_output=True)
+
+
+def _plan_source_index_fixture(source_root: Path, project_root: Path, index) -> "bootstrap.SyncPlan":
+    plan = bootstrap.SyncPlan(source_index=index)
+    bootstrap.plan_tree_with_policy(
+        plan,
+        source_root / "skills",
+        project_root,
+        Path("skills"),
+        {},
+        ownership="template-managed",
+        source_label_prefix="template:skills",
+    )
+    return plan
+
+
+def test_source_index_replaces_source_hashing_and_rehashes_stale_entries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source_root = tmp_path / "template"
+    skills = _write_source_index_fixture(source_root)
+    (skills / "notes.md").write_bytes(b"notes, edited after indexing\n")
+    index = bootstrap.SourceIndex.load(source_root)
+    assert index is not None
+    hashed = []
+    original = bootstrap.calculate_file_hash
+    monkeypatch.setattr(bootstrap, "calculate_file_hash", lambda path: hashed.append(Path(path).name) or original(path))
+
+    plan = bootstrap.SyncPlan(source_index=index)
+    bootstrap.plan_tree_with_policy(
+        plan,
+        source_root / "skills",
+        tmp_path / "project",
+        Path("skills"),
+        {},
+        ownership="template-managed",
+        source_label_prefix="template:skills",
+    )
+
+    assert hashed == ["notes.md"]
+    assert (index.hits, index.stale) == (1, 1)
+    bootstrap.apply_sync_plan(plan)
+    assert (tmp_path / "project" / "skills" / "demo" / "notes.md").read_bytes() == b"notes, edited after indexing\n"
+
+
+def test_source_index_is_ignored_when_tampered_and_verified_on_apply(tmp_path: Path) -> None:
+    source_root = tmp_path / "template"
+    skills = _write_source_index_fixture(source_root)
+    index_path = source_root / bootstrap.SOURCE_INDEX_PATH
+    payload = json.loads(index_path.read_text(encoding="utf-8"))
+    payload["files"]["skills/demo/SKILL.md"]["sha256"] = "sha256:" + "0" * 64
+    index_path.write_text(json.dumps(payload), encoding="utf-8")
+    assert bootstrap.SourceIndex.load(source_root) is None
+
+    bootstrap.SourceIndex.build(source_root).write()
+    plan = _plan_source_index_fixture(source_root, tmp_path / "project", bootstrap.SourceIndex.load(source_root))
+    (skills / "SKILL.md").write_bytes(b"changed\n")
+
+    with pytest.raises(RuntimeError, match="source-index.json is stale"):
+        bootstrap.apply_sync_plan(plan)
+
+
+def test_source_index_hashes_same_size_edits_committed_without_reindexing(tmp_path: Path) -> None:
+    source_root = tmp_path / "template"
+    skills = _write_source_index_fixture(source_root)
+    (skills / "SKILL.md").write_bytes(b"changed\n")
+    _commit_source_index_fixture(source_root, "Edit skill without reindexing")
+    index = bootstrap.SourceIndex.load(source_root)
+    assert index is not None
+
+    plan = _plan_source_index_fixture(source_root, tmp_path / "project", index)
+    bootstrap.apply_sync_plan(plan)
+
+    assert (index.hits, index.stale) == (1, 1)
+    assert (tmp_path / "project" / "skills" / "demo" / "SKILL.md").read_bytes() == b"changed\n"
+    expected = hashlib.sha256(b"changed\n").hexdigest()
+    assert index.fresh_files()["skills/demo/SKILL.md"]["sha256"] == f"sha256:{expected}"
+
+
+def test_source_index_trusts_nothing_outside_git(tmp_path: Path) -> None:
+    source_root = tmp_path / "template"
+    skills = source_root / "skills" / "demo"
+    skills.mkdir(parents=True)
+    (skills / "SKILL.md").write_bytes(b"indexed\n")
+    bootstrap.SourceIndex.build(source_root).write()
+    (skills / "SKILL.md").write_bytes(b"changed\n")
+    index = bootstrap.SourceIndex.load(source_root)
+    assert index is not None
+
+    bootstrap.apply_sync_plan(_plan_source_index_fixture(source_root, tmp_path / "project", index))
+
+    assert (index.hits, index.stale) == (0, 1)
+    assert (tmp_path / "project" / "skills" / "demo" / "SKILL.md").read_bytes() == b"changed\n"
+
+
+def test_walk_tree_prunes_excluded_directories_without_scanning_them(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "workflows" / "nested").mkdir(parents=True)
+    (tmp_path / "workflows" / "nested" / "ci.yml").write_text("ci\n", encoding="utf-8")
+    (tmp_path / "prompts").mkdir()
+    (tmp_path / "prompts" / "b.md").write_text("b\n", encoding="utf-8")
+    (tmp_path / "prompts" / "CODEOWNERS").write_text("* @team\n", encoding="utf-8")
+    (tmp_path / "a.md").write_text("a\n", encoding="utf-8")
+    scanned = []
+    original_scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: scanned.append(Path(path).name) or original_scandir(path))
+
+    entries = list(bootstrap.walk_tree(tmp_path, ("workflows", "CODEOWNERS")))
+
+    assert [(entry.relative, entry.is_dir, entry.excluded) for entry in entries] == [
+        ("a.md", False, False),
+        ("prompts/CODEOWNERS", False, True),
+        ("prompts/b.md", False, False),
+        ("workflows", True, True),
+    ]
+    assert "workflows" not in scanned and "nested" not in scanned
+    assert bootstrap.directory_excluded("github/workflows", ("github/workflows/",))
+    assert not bootstrap.directory_excluded("github", ("github/workflows",))
+
+
+@pytest.mark.parametrize(
+    "relative",
+    [
+        "workflows/ci.yml",
+        "prompts/Workflows/x.md",
+        "CODEOWNERS",
+        "docs/codeowners",
+        "codeowners/readme.md",
+        "github/workflows-extra/a.yml",
+        "./github/Workflows/ci.yml",
+        "skills\\demo\\SKILL.md",
+        "agents",
+        "dependabot.yml.bak",
+        "plain.md",
+    ],
+)
+def test_exclude_matcher_matches_per_pattern_semantics(relative: str) -> None:
+    excludes = sorted(bootstrap.LEGACY_RUNTIME_EXCLUDES | {"github/workflows/", "./Docs/Archive"})
+    normalized = relative.replace("\\", "/").lstrip("./").lower()
+    parts = normalized.split("/")
+    expected = False
+    for pattern in excludes:
+        candidate = bootstrap.normalize_relative_path(pattern).lower().strip("/")
+        if "/" in candidate:
+            expected = expected or normalized.startswith(candidate)
+        elif candidate in {"codeowners", "dependabot.yml"}:
+            expected = expected or parts[-1] == candidate
+        else:
+            expected = expected or candidate in parts
+
+    matcher = bootstrap.ExcludeMatcher(excludes)
+
+    assert matcher.matches(relative) is expected
+    assert bootstrap.should_exclude_relative(Path(relative), excludes) is expected
+    assert bootstrap.ExcludeMatcher.compile(matcher) is matcher
+    assert not bootstrap.ExcludeMatcher(())
+
+
+def test_walk_tree_yields_but_does_not_descend_symlinked_directories(tmp_path: Path) -> None:
+    (tmp_path / "skills" / "demo").mkdir(parents=True)
+    (tmp_path / "skills" / "demo" / "SKILL.md").write_text("demo\n", encoding="utf-8")
+    try:
+        os.symlink("skills", tmp_path / "mount", target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks are not available")
+
+    entries = {entry.relative: entry for entry in bootstrap.walk_tree(tmp_path, include_directories=True)}
+
+    assert sorted(entries) == ["mount", "skills", "skills/demo", "skills/demo/SKILL.md"]
+    assert entries["mount"].is_symlink and entries["mount"].is_dir
+
+
+def test_sync_tree_records_pruned_directory_once(tmp_path: Path) -> None:
+    source = tmp_path / "source"
+    for index in range(3):
+        (source / "workflows" / f"job-{index}").mkdir(parents=True)
+        (source / "workflows" / f"job-{index}" / "ci.yml").write_text("ci\n", encoding="utf-8")
+    (source / "keep.md").write_text("keep\n", encoding="utf-8")
+
+    result = bootstrap.sync_tree(source, tmp_path / "destination", force=False, excludes=("workflows",))
+
+    assert result.files_added == ["keep.md"]
+    assert result.files_skipped == ["workflows [excluded directory]"]
+    assert not (tmp_path / "destination" / "workflows").exists()
+
+
+def test_mirror_runtime_hardlinks_derived_trees_and_converts_back(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source_root = tmp_path / "template"
+    _write_portable_runtime_fixture(source_root)
+    target_root = tmp_path / "project"
+    target_root.mkdir()
+    entries: Dict[str, dict] = {}
+
+    bootstrap.install_portable_runtime(source_root, target_root, False, entries, mirror=True)
+
+    derived = target_root / ".github" / "agents" / "coder.agent.md"
+    assert os.path.samefile(derived, target_root / "agents" / "coder.agent.md")
+    assert entries[".github/agents/coder.agent.md"]["mirror"] == "hardlink"
+    assert entries[".github/skills/demo-skill/SKILL.md"]["mirror"] == "hardlink"
+
+    original_hash = bootstrap.calculate_file_hash
+
+    def refuse_derived(path: Path) -> str:
+        assert ".github" not in Path(path).parts, f"mirror rehashed {path}"
+        return original_hash(path)
+
+    monkeypatch.setattr(bootstrap, "calculate_file_hash", refuse_derived)
+    rerun = bootstrap.install_portable_runtime(source_root, target_root, False, entries, mirror=True)
+    assert ".github/agents/coder.agent.md" in rerun.files_skipped
+    assert entries[".github/agents/coder.agent.md"]["status"] == "in-sync"
+    monkeypatch.undo()
+
+    copied = bootstrap.install_portable_runtime(source_root, target_root, False, entries)
+
+    assert ".github/agents/coder.agent.md" in copied.files_updated
+    assert not os.path.samefile(derived, target_root / "agents" / "coder.agent.md")
+    assert derived.read_bytes() == (target_root / "agents" / "coder.agent.md").read_bytes()
+    assert "mirror" not in entries[".github/agents/coder.agent.md"]
+
+
+def test_mirror_runtime_falls_back_to_symlinks_without_hardlinks(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source_root = tmp_path / "template"
+    _write_portable_runtime_fixture(source_root)
+    target_root = tmp_path / "project"
+    target_root.mkdir()
+    probe = tmp_path / "probe"
+    try:
+        os.symlink("missing", probe)
+    except OSError:
+        pytest.skip("symlinks are not available")
+
+    def no_hardlinks(source: Path, target: Path) -> None:
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", no_hardlinks)
+    entries: Dict[str, dict] = {}
+    result = bootstrap.install_portable_runtime(source_root, target_root, False, entries, mirror=True)
+
+    derived = target_root / ".github" / "agents" / "coder.agent.md"
+    assert derived.is_symlink()
+    assert ".github/agents/coder.agent.md [symlink]" in result.files_added
+    assert entries[".github/agents/coder.agent.md"]["mirror"] == "symlink"
+
+
+def test_agent_render_cache_skips_unchanged_agents(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source_root = tmp_path / "template"
+    _write_portable_runtime_fixture(source_root)
+    target_root = tmp_path / "project"
+    target_root.mkdir()
+
+    def install(entries: Dict[str, dict]) -> bootstrap.SyncResult:
+        plan = bootstrap.SyncPlan(render_cache=bootstrap.AgentRenderCache.load(target_root))
+        bootstrap.plan_portable_runtime(plan, source_root, target_root, False, entries)
+        result = bootstrap.apply_sync_plan(plan)
+        plan.render_cache.save()
+        return result
+
+    entries: Dict[str, dict] = {}
+    first = install(entries)
+    assert ".claude/agents/coder.md" in first.files_added
+    rendered = (target_root / ".claude" / "agents" / "coder.md").read_bytes()
+
+    def refuse_parse(agent_file: Path, raw: Optional[str] = None) -> Tuple[str, str, str]:
+        raise AssertionError(f"cached agent re-parsed: {agent_file}")
+
+    monkeypatch.setattr(portable_runtime, "parse_agent_definition", refuse_parse)
+    cached = install(entries)
+    assert {".claude/agents/coder.md", ".codex/agents/coder.toml"} <= set(cached.files_skipped)
+    assert entries[".claude/agents/coder.md"]["status"] == "in-sync"
+    monkeypatch.undo()
+
+    (target_root / ".claude" / "agents" / "coder.md").write_text("drifted\n", encoding="utf-8")
+    repaired = install(entries)
+    assert repaired.files_updated == [".claude/agents/coder.md"]
+    assert (target_root / ".claude" / "agents" / "coder.md").read_bytes() == rendered
+
+    monkeypatch.setattr(bootstrap, "AGENT_RENDER_VERSION", bootstrap.AGENT_RENDER_VERSION + 1)
+    cache = bootstrap.AgentRenderCache.load(target_root)
+    assert cache.entries == {}
+
+
+def test_agent_render_cache_is_invalidated_when_the_renderer_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    source_root = tmp_path / "template"
+    _write_portable_runtime_fixture(source_root)
+    target_root = tmp_path / "project"
+    target_root.mkdir()
+    renderer = tmp_path / "portable_runtime.py"
+    renderer.write_bytes(Path(portable_runtime.__file__).read_bytes())
+    monkeypatch.setattr(bootstrap, "_agent_renderer_files", lambda: [renderer])
+    monkeypatch.setattr(bootstrap, "_AGENT_RENDERER_DIGEST", None)
+
+    def install(entries: Dict[str, dict]) -> bootstrap.SyncResult:
+        plan = bootstrap.SyncPlan(render_cache=bootstrap.AgentRenderCache.load(target_root))
+        bootstrap.plan_portable_runtime(plan, source_root, target_root, False, entries)
+        result = bootstrap.apply_sync_plan(plan)
+        plan.render_cache.save()
+        return result
+
+    entries: Dict[str, dict] = {}
+    install(entries)
+    assert bootstrap.AgentRenderCache.load(target_root).entries
+
+    # A renderer edit without an AGENT_RENDER_VERSION bump still re-renders every agent.
+    original = portable_runtime.build_claude_agent_content
+    monkeypatch.setattr(
+        portable_runtime,
+        "build_claude_agent_content",
+        lambda *args: original(*args) + "<!-- new renderer -->\n",
+    )
+    renderer.write_bytes(renderer.read_bytes() + b"# new renderer\n")
+    monkeypatch.setattr(bootstrap, "_AGENT_RENDERER_DIGEST", None)
+    assert bootstrap.AgentRenderCache.load(target_root).entries == {}
+
+    rerendered = install(entries)
+    assert ".claude/agents/coder.md" in rerendered.files_updated
+    assert (target_root / ".claude" / "agents" / "coder.md").read_text(encoding="utf-8").endswith(
+        "<!-- new renderer -->\n"
+    )
+
+
+@pytest.mark.skipif(os.name == "nt", reason="uses a POSIX shell script as the probed tool")
+def test_tool_probe_cache_reuses_output_until_the_binary_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "calls.log"
+    tool = bin_dir / "demo-tool"
+    tool.write_text(f"#!/bin/sh\necho call >> '{calls}'\necho 'demo-tool 1.2.3'\n", encoding="utf-8")
+    tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("AI_WORKFLOW_CACHE_HOME", str(tmp_path / "cache"))
+
+    first = bootstrap.ToolProbeCache.load()
+    result = bootstrap.check_tool(["demo-tool", "--version"], r"(\d+\.\d+\.\d+)", "1.0.0", first)
+    first.save()
+    assert result == bootstrap.CheckResult(True, "1.2.3", True)
+    assert (tmp_path / "cache" / bootstrap.TOOL_PROBE_CACHE_FILENAME).is_file()
+
+    second = bootstrap.ToolProbeCache.load()
+    assert bootstrap.check_tool(["demo-tool", "--version"], r"(\d+\.\d+\.\d+)", "1.0.0", second) == result
+    assert (second.hits, second.misses) == (1, 0)
+    assert calls.read_text(encoding="utf-8").count("call") == 1
+
+    tool.write_text(tool.read_text(encoding="utf-8").replace("1.2.3", "2.0.0"), encoding="utf-8")
+    os.utime(tool, ns=(tool.stat().st_atime_ns, tool.stat().st_mtime_ns + 1_000_000_000))
+    upgraded = bootstrap.check_tool(["demo-tool", "--version"], r"(\d+\.\d+\.\d+)", "1.0.0", second)
+    assert upgraded.version == "2.0.0"
+    assert calls.read_text(encoding="utf-8").count("call") == 2
+
+
+def test_bootstrap_import_defers_validators_and_portable_runtime() -> None:
+    probe = (
+        "import sys\n"
+        "from scripts import bootstrap\n"
+        "lazy = ('scripts.manifest_v3', 'scripts.portable_runtime', 'concurrent.futures')\n"
+        "print(sorted(name for name in lazy if name in sys.modules))\n"
+        "assert bootstrap.plan_portable_runtime.__module__ == 'scripts.portable_runtime'\n"
+        "assert bootstrap._validate_manifest_v3.__module__ == 'scripts.manifest_v3'\n"
+        "print(sorted(name for name in lazy if name in sys.modules))\n"
+        "try:\n"
+        "    bootstrap.no_such_attribute\n"
+        "except AttributeError:\n"
+        "    print('missing')\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=PHASE0B_REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.splitlines() == [
+        "[]",
+        "['scripts.manifest_v3', 'scripts.portable_runtime']",
+        "missing",
+    ]
+
+
+def test_fleet_installs_every_listed_target_and_reports_each(tmp_path: Path) -> None:
+    fresh = tmp_path / "fresh"
+    second = tmp_path / "second"
+    corrupt = tmp_path / "corrupt"
+    for target in (fresh, second, corrupt):
+        target.mkdir()
+    (corrupt / bootstrap.MANIFEST_FILENAME).write_text("{not json", encoding="utf-8")
+    fleet_list = tmp_path / "fleet.txt"
+    fleet_list.write_text("# adopters\nfresh\n\nsecond\nfresh\ncorrupt\nmissing\n", encoding="utf-8")
+
+    result = _run_phase0c_python(tmp_path, "--fleet", str(fleet_list), "--fleet-workers", "2")
+    output = _phase0c_output(result)
+
+    assert result.returncode == 1, output
+    assert f"{fresh}: +" in output and f"{second}: +" in output
+    assert f"{corrupt}: corrupt install manifest" in output
+    assert f"{tmp_path / 'missing'}: target directory not found" in output
+    assert "Fleet: 4 targets — 2 synced, 0 unchanged, 0 skipped, 2 failed" in output
+    assert output.count("Constitution source") == 2
+    for target in (fresh, second):
+        manifest = json.loads((target / bootstrap.MANIFEST_FILENAME).read_text(encoding="utf-8"))
+        assert manifest["schema_version"] == 2
+        assert (target / "AGENTS.md").is_file()
+        assert (target / ".claude" / "agents").is_dir()
+    installed = [
+        {
+            path: digest
+            for path, digest in _snapshot_tree(target)[0].items()
+            if not path.startswith((".git/", ".ai-workflow-cache/")) and path != bootstrap.MANIFEST_FILENAME
+        }
+        for target in (fresh, second)
+    ]
+    assert installed[0] == installed[1]
+    assert (corrupt / bootstrap.MANIFEST_FILENAME).read_text(encoding="utf-8") == "{not json"
+    assert sorted(path.name for path in corrupt.iterdir()) == [bootstrap.MANIFEST_FILENAME]
+
+    rerun = _run_phase0c_python(tmp_path, "--fleet", str(fleet_list), "--update", "--force")
+    assert "2 unchanged" in _phase0c_output(rerun)
+
+
+def test_fleet_records_unexpected_target_errors_and_keeps_going(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from scripts import fleet
+
+    def install_target(target_root: Path, source: object, options: object) -> "fleet.FleetTargetResult":
+        if target_root.name == "broken":
+            raise KeyError("mode")
+        return fleet.FleetTargetResult(str(target_root), "unchanged")
+
+    monkeypatch.setattr(fleet, "install_target", install_target)
+    targets = [tmp_path / "first", tmp_path / "broken", tmp_path / "last"]
+    source = fleet.FleetSource(tmp_path, {}, "unknown", None)
+
+    results = fleet.run_fleet(targets, source, fleet.FleetOptions(), workers=1)
+
+    assert [(item.target, item.status) for item in results] == [
+        (str(targets[0]), "unchanged"),
+        (str(targets[1]), "failed"),
+        (str(targets[2]), "unchanged"),
+    ]
+    assert results[1].message == "KeyError: 'mode'"
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched install_target"
+)
+def test_fleet_records_targets_of_a_killed_worker_as_failed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from scripts import fleet
+
+    def install_target(target_root: Path, source: object, options: object) -> "fleet.FleetTargetResult":
+        if target_root.name == "crash":
+            os._exit(9)
+        return fleet.FleetTargetResult(str(target_root), "unchanged")
+
+    monkeypatch.setattr(fleet, "install_target", install_target)
+    targets = [tmp_path / "crash", tmp_path / "second", tmp_path / "third"]
+    reported = []
+
+    results = fleet.run_fleet(
+        targets, fleet.FleetSource(tmp_path, {}, "unknown", None), fleet.FleetOptions(), 2, reported.append
+    )
+
+    assert [item.target for item in results] == [str(target) for target in targets]
+    assert len(reported) == len(targets)
+    assert results[0].status == "failed"
+    assert results[0].message.startswith("BrokenProcessPool: ")
+    assert {item.status for item in results} <= {"unchanged", "failed"}
+
+
+def test_fleet_source_validates_catalog_once_for_v3_checks(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from scripts import fleet, manifest_v3
+
+    source = fleet.FleetSource.load(PHASE0B_REPO_ROOT)
+    assert source.catalog is not None and source.source_files
+
+    def unexpected(*_args: object) -> None:
+        raise AssertionError("catalog re-read after preload")
+
+    monkeypatch.setattr(manifest_v3, "_PRELOADED_CATALOGS", {})
+    monkeypatch.setattr(manifest_v3, "_load_and_validate_component_catalog", unexpected)
+    monkeypatch.setattr(manifest_v3, "_load_and_validate_production_schema", unexpected)
+    source.activate()
+    assert manifest_v3._PRELOADED_CATALOGS[str(PHASE0B_REPO_ROOT)] is source.catalog
+
+
+def test_source_delta_skips_hashing_template_files_unchanged_since_source_ref(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template = tmp_path / "template"
+    target = tmp_path / "target"
+    (template / ".github").mkdir(parents=True)
+    (template / ".github" / "same.md").write_text("same\n", encoding="utf-8")
+    (template / ".github" / "edited.md").write_text("old\n", encoding="utf-8")
+    subprocess.run(["git", "init"], cwd=template, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=template, check=True, capture_output=True)
+    subprocess.run(["git", "config", "user.name", "Test User"], cwd=template, check=True, capture_output=True)
+    subprocess.run(["git", "add", "."], cwd=template, check=True, capture_output=True)
+    subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=template, check=True, capture_output=True)
+    source_ref = bootstrap.template_source_ref(template)
+    manifest_entries: Dict[str, dict] = {}
+    bootstrap.sync_tree_with_policy(
+        template / ".github",
+        target,
+        Path(".github"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:.github",
+    )
+
+    (template / ".github" / "edited.md").write_text("new\n", encoding="utf-8")
+    (template / ".github" / "added.md").write_text("added\n", encoding="utf-8")
+    assert bootstrap.template_source_ref(template) == f"{source_ref}-dirty"
+    subprocess.run(["git", "add", "."], cwd=template, check=True, capture_output=True)
+    subprocess.run(["git", "commit", "-m", "Edit"], cwd=template, check=True, capture_output=True)
+    (template / "notes.txt").write_text("untracked\n", encoding="utf-8")
+
+    delta = bootstrap.SourceDelta.load(template, source_ref)
+    assert delta is not None
+    assert delta.changed == {".github/edited.md", ".github/added.md", "notes.txt"}
+    assert bootstrap.SourceDelta.load(template, f"{source_ref}-dirty") is None
+    assert bootstrap.SourceDelta.load(template, "0000000") is None
+
+    hashed = []
+    original_hash = bootstrap.calculate_file_hash
+    monkeypatch.setattr(
+        bootstrap, "calculate_file_hash", lambda path: hashed.append(path) or original_hash(path)
+    )
+    plan = bootstrap.SyncPlan()
+    plan.use_source_delta(delta, target, manifest_entries)
+    bootstrap.plan_tree_with_policy(
+        plan,
+        template / ".github",
+        target,
+        Path(".github"),
+        manifest_entries,
+        ownership="template-managed",
+        source_label_prefix="template:.github",
+    )
+    result = bootstrap.apply_sync_plan(plan)
+
+    assert plan.delta_hits == 1
+    assert template / ".github" / "same.md" not in hashed
+    assert template / ".github" / "edited.md" in hashed
+    assert result.files_skipped == [".github/same.md"]
+    assert sorted(result.files_added + result.files_updated) == [".github/added.md", ".github/edited.md"]
+    assert (target / ".github" / "edited.md").read_text(encoding="utf-8") == "new\n"
+
+    (template / "scripts").mkdir()
+    (template / "scripts" / "bootstrap.py").write_text("# installer change\n", encoding="utf-8")
+    assert bootstrap.SourceDelta.load(template, source_ref) is None
+
+
+def test_source_ref_is_only_trusted_from_manifests_written_by_dirty_aware_installers(tmp_path: Path) -> None:
+    bootstrap.write_install_manifest(tmp_path, tmp_path, {}, source_ref="abc1234")
+    manifest_path = tmp_path / bootstrap.MANIFEST_FILENAME
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    assert manifest["source_ref_version"] == bootstrap.SOURCE_REF_VERSION
+    assert bootstrap.load_install_manifest(tmp_path).source_ref == "abc1234"
+
+    # Older installers wrote a dirty checkout's HEAD as a plain ref.
+    del manifest["source_ref_version"]
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    result = bootstrap.load_install_manifest(tmp_path)
+    assert result.state == "valid-v2"
+    assert result.source_ref is None
+
+
+def test_events_stream_one_json_line_per_path_decision(tmp_path: Path) -> None:
+    target = tmp_path / "adopter"
+    target.mkdir()
+    events_path = tmp_path / "events.jsonl"
+
+    install = _run_phase0c_python(target, "--events", str(events_path))
+    assert install.returncode == 0, _phase0c_output(install)
+    events = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines()]
+    paths = [event for event in events if event["event"] == "path"]
+    summary = events[-1]
+
+    assert summary["event"] == "summary"
+    assert summary["added"] == sum(event["action"] == "added" for event in paths) > 0
+    assert len(paths) == summary["added"] + summary["updated"] + summary["skipped"] + summary["conflicted"]
+    agents = next(event for event in paths if event["path"] == "AGENTS.md")
+    assert agents["ownership"] == "project-owned"
+    assert agents["reason"] == "target-missing"
+    assert agents["bytes"] == (target / "AGENTS.md").stat().st_size
+    assert all(event["applied"] for event in paths)
+    assert [event["elapsed_ms"] for event in events] == sorted(event["elapsed_ms"] for event in events)
+
+    plan = _run_phase0c_python(target, "--plan", "--events", "-")
+    planned = [json.loads(line) for line in plan.stdout.splitlines()]
+    assert planned[-1]["event"] == "summary" and planned[-1]["applied"] is False
+    assert {event["hash_cache"] for event in planned if event.get("ownership") == "template-managed"} <= {
+        "hit",
+        "miss",
+    }
+    assert "Install plan" in plan.stderr
+
+
+def test_profile_records_each_install_phase(tmp_path: Path) -> None:
+    target = tmp_path / "adopter"
+    target.mkdir()
+    profile_path = tmp_path / "profile.json"
+
+    result = _run_phase0c_python(target, "--profile", str(profile_path))
+
+    assert result.returncode == 0, _phase0c_output(result)
+    profile = json.loads(profile_path.read_text(encoding="utf-8"))
+    assert profile["name"] == "bootstrap"
+    phases = {phase["name"]: phase for phase in profile["phases"]}
+    assert list(phases) == [
+        "manifest-load",
+        "environment-checks",
+        "plan",
+        "apply",
+        "manifest-write",
+        "cache-save",
+        "git-init",
+    ]
+    assert [phase["name"] for phase in phases["plan"]["phases"]] == ["workflow-files", "portable-runtime"]
+    for phase in [profile, *phases.values()]:
+        assert phase["wall_ms"] >= 0 and phase["cpu_ms"] >= 0
+        assert phase["memory_peak_bytes"] > 0
+    assert profile["files_hashed"] == sum(phase["files_hashed"] for phase in phases.values())
+    assert profile["memory_peak_bytes"] == max(phase["memory_peak_bytes"] for phase in [profile, *phases.values()])
+    if profile["io_counters"]:
+        assert phases["apply"]["bytes_written"] >= sum(
+            path.stat().st_size for path in (target / ".github" / "skills").rglob("*") if path.is_file()
+        )
+
+
+def test_build_report_times_its_phases_with_a_profiler(tmp_path: Path) -> None:
+    from scripts.profiling import Profiler
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    profiler = Profiler("report-only", trace_memory=False)
+
+    report = manifest_reconciliation.build_report(source, target, "conversion-plan", profiler)
+    profile = profiler.finish()
+
+    assert report == {
+        **manifest_reconciliation.build_report(source, target, "conversion-plan"),
+        "volatile_display_envelope": report["volatile_display_envelope"],
+    }
+    assert [phase["name"] for phase in profile["phases"]] == [
+        "source-evidence",
+        "snapshot-before",
+        "manifest-state",
+        "decisions",
+        "snapshot-after",
+    ]
+    assert all(phase["memory_peak_bytes"] is None for phase in profile["phases"])
+
+
+def test_scaling_benchmark_v3_manifest_is_valid_at_the_component_limit(tmp_path: Path) -> None:
+    from scripts.benchmarks import scaling
+
+    paths = [scaling.synthetic_path(index) for index in range(10000)]
+    assert len(scaling.catalog_components(paths)) == scaling.CATALOG_LIMIT
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    paths = paths[:60]
+    for index, relative in enumerate(paths):
+        destinations = [source / relative, target / relative]
+        if relative.startswith("skills/"):
+            destinations.append(target / ".github" / relative)
+        for destination in destinations:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            destination.write_bytes(scaling.synthetic_content(index))
+    components = [component for component, _ in scaling.catalog_components(paths)]
+    catalog = json.loads((source / bootstrap.COMPONENT_CATALOG_PATH).read_text(encoding="utf-8"))
+    catalog["components"] = components
+    (source / bootstrap.COMPONENT_CATALOG_PATH).write_text(json.dumps(catalog), encoding="utf-8")
+    (target / paths[1]).write_bytes(b"customised\n")
+    (target / paths[5]).write_bytes(b"customised\n")
+
+    written = scaling.write_v3_manifest(source, target, paths, [paths[1], paths[5]])
+    result = bootstrap.load_install_manifest(target, source_root=source)
+
+    assert written == len(components) == 72
+    assert result.state == "valid-v3" and result.catalog_validated, result.detail
+
+
+def test_v3_validation_cache_skips_revalidating_unchanged_inputs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from scripts import manifest_v3
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    _phase4a_write_manifest(target, _phase4a_valid_manifest())
+    validated = []
+    for name in ("_validate_v3_component", "_check_v3_component_semantics"):
+        original = getattr(manifest_v3, name)
+        monkeypatch.setattr(
+            manifest_v3,
+            name,
+            lambda value, index, original=original: validated.append(index) or original(value, index),
+        )
+
+    report_only = bootstrap.load_install_manifest(target, source_root=source, record_validation=False)
+    first = bootstrap.load_install_manifest(target, source_root=source)
+    second = bootstrap.load_install_manifest(target, source_root=source)
+
+    assert report_only.state == first.state == second.state == "valid-v3"
+    assert second.catalog_validated and second.entries == first.entries
+    assert validated == [0, 0]
+    cache_path = bootstrap.user_cache_dir() / manifest_v3.VALIDATION_CACHE_FILENAME
+    assert len(json.loads(cache_path.read_text(encoding="utf-8"))["entries"]) == 1
+
+    catalog_path = source / bootstrap.COMPONENT_CATALOG_PATH
+    catalog_path.write_bytes(catalog_path.read_bytes() + b"\n")
+    changed = bootstrap.load_install_manifest(target, source_root=source)
+    assert (changed.state, changed.diagnostic_category) == ("corrupt", "catalog-digest")
+    assert validated == [0, 0, 0]
+
+    cached = bootstrap.load_install_manifest(target, source_root=source)
+    assert (cached.state, cached.diagnostic_category, cached.detail) == (
+        changed.state,
+        changed.diagnostic_category,
+        changed.detail,
+    )
+    assert validated == [0, 0, 0]
+
+
+def test_v3_validation_cache_ignores_unreadable_or_stale_files(tmp_path: Path) -> None:
+    from scripts import manifest_v3
+
+    cache_path = tmp_path / manifest_v3.VALIDATION_CACHE_FILENAME
+    cache_path.write_text("{not json", encoding="utf-8")
+    assert manifest_v3.ValidationCache.load(cache_path).entries == {}
+    cache_path.write_text(json.dumps({"version": 0, "entries": {"key": {"category": None}}}), encoding="utf-8")
+    assert manifest_v3.ValidationCache.load(cache_path).entries == {}
+
+    cache = manifest_v3.ValidationCache(cache_path)
+    for index in range(manifest_v3.VALIDATION_CACHE_LIMIT + 1):
+        cache.put(str(index))
+    cache.save()
+    entries = manifest_v3.ValidationCache.load(cache_path).entries
+    assert len(entries) == manifest_v3.VALIDATION_CACHE_LIMIT and "0" not in entries
+    assert manifest_v3.ValidationCache.key(b"m", b"s", b"c") != manifest_v3.ValidationCache.key(b"m", b"s", b"c ")
+
+
+def test_compiled_schema_validators_are_generated_once_per_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    from scripts import schema_compiler
+
+    schema_bytes = (PHASE0B_REPO_ROOT / bootstrap.PRODUCTION_MANIFEST_SCHEMA).read_bytes()
+    monkeypatch.setattr(schema_compiler, "_COMPILED", {})
+    compiled = schema_compiler.load_compiled_schema(schema_bytes)
+    assert not bootstrap.user_cache_dir().exists() or not any(bootstrap.user_cache_dir().iterdir())
+    with pytest.raises(schema_compiler.SchemaCompileError):
+        schema_compiler.load_compiled_schema(b'{"type": "object", "patternProperties": {}}')
+
+    monkeypatch.setattr(schema_compiler, "generate_source", lambda *args: pytest.fail("validators were regenerated"))
+    assert schema_compiler.load_compiled_schema(schema_bytes) is compiled
+    manifest = _phase4a_valid_manifest()
+    assert compiled.first_error(manifest) is None
+    manifest["components"][0]["identity"]["kind"] = "socket"
+    assert compiled.first_error(manifest).path == "/components/0/identity/kind"
+    assert compiled.first_error(dict(manifest, schema_version=2)).path == "/schema_version"
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+@pytest.mark.parametrize(
+    "mutate,category",
+    [
+        (lambda component: None, None),
+        (lambda component: component["provenance"]["fork"].update(basis="hash-divergence"), "manifest-fork"),
+        (lambda component: component["identity"].update(kind="socket"), "manifest-schema"),
+        (lambda component: component.update(installed_at="2026-02-30T00:00:00Z"), "manifest-timestamp"),
+    ],
+)
+def test_v3_manifest_structure_is_checked_by_the_compiled_production_schema(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, compiled: bool, mutate, category: Optional[str]
+) -> None:
+    from scripts import manifest_v3
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    manifest = _phase4a_valid_manifest()
+    mutate(manifest["components"][0])
+    _phase4a_write_manifest(target, manifest)
+    if compiled:
+        if category is None:
+            # A schema-valid Manifest skips the hand-written structural checks.
+            monkeypatch.setattr(manifest_v3, "_validate_v3_component", lambda value, index: pytest.fail("walked twice"))
+    else:
+        monkeypatch.setattr(manifest_v3, "_compiled_production_schema", lambda *args: None)
+
+    loaded = bootstrap.load_install_manifest(target, source_root=source, record_validation=False)
+
+    if category is None:
+        assert loaded.state == "valid-v3" and loaded.catalog_validated
+    else:
+        # Either way the more specific hand-written category is reported.
+        assert (loaded.state, loaded.diagnostic_category) == ("corrupt", category)
+
+
+def test_compiled_report_schema_accepts_produced_reports_and_locates_errors(tmp_path: Path) -> None:
+    from scripts import schema_compiler
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    _phase4a_write_manifest(target, _phase4a_valid_manifest())
+    schema_path = PHASE0B_REPO_ROOT / "schemas/ai-workflow-manifest-reconciliation-report-v1.schema.json"
+    compiled = schema_compiler.load_compiled_schema(schema_path.read_bytes())
+    for operation in ("conversion-plan", "reconcile"):
+        report = manifest_reconciliation.build_report(source, target, operation)
+        assert compiled.first_error(report) is None
+
+    decision = report["mapped_component_decisions"][0]
+    compiled.validate(decision, "mappedDecision")
+    decision["classification"] = "renamed"
+    assert compiled.first_error(report).path == "/mapped_component_decisions/0/classification"
+    with pytest.raises(schema_compiler.SchemaError, match="^/classification: must be one of"):
+        compiled.validate(decision, "mappedDecision")
+
+
+def test_build_report_reads_and_validates_each_source_input_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from scripts import manifest_v3
+
+    source, target = _phase4b_report_fixture(tmp_path)
+    _phase4a_write_manifest(target, _phase4a_valid_manifest())
+    inputs = {
+        (source / bootstrap.PRODUCTION_MANIFEST_SCHEMA).resolve(): "schema",
+        (source / bootstrap.COMPONENT_CATALOG_PATH).resolve(): "catalog",
+    }
+    calls = []
+    original_read_bytes = Path.read_bytes
+    original_hash = bootstrap.calculate_file_hash
+    original_schema = manifest_v3._validate_production_schema
+    original_catalog = manifest_v3._validate_component_catalog
+
+    def read_bytes(path: Path) -> bytes:
+        if path.resolve() in inputs:
+            calls.append(("read", inputs[path.resolve()]))
+        return original_read_bytes(path)
+
+    def calculate_file_hash(path: Path) -> str:
+        if Path(path).resolve() in inputs:
+            calls.append(("hash", inputs[Path(path).resolve()]))
+        return original_hash(path)
+
+    monkeypatch.setattr(Path, "read_bytes", read_bytes)
+    monkeypatch.setattr(bootstrap, "calculate_file_hash", calculate_file_hash)
+    monkeypatch.setattr(
+        manifest_v3, "_validate_production_schema", lambda schema: calls.append(("parse", "schema")) or original_schema(schema)
+    )
+    monkeypatch.setattr(
+        manifest_v3,
+        "_validate_component_catalog",
+        lambda catalog, raw: calls.append(("parse", "catalog")) or original_catalog(catalog, raw),
+    )
+
+    report = manifest_reconciliation.build_report(source, target, "reconcile")
+
+    assert report["manifest_parse_state"]["state"] == "valid-v3"
+    assert report["mapped_component_decisions"] and report["blocking_findings"] == []
+    # One read and one parse per input; the only hash is the post-run
+    # snapshot that proves the report wrote nothing.
+    assert sorted(calls) == sorted(
+        [(kind, name) for kind in ("read", "parse", "hash") for name in ("schema", "catalog")]
+    )
+
+
+def _cycle_catalog_record(generated_from: list, successor: Optional[str] = None) -> dict:
+    return {"generated_from": generated_from, "successor_component_id": successor, "reintroduces_component_id": None}
+
+
+def test_relationship_cycles_handle_long_chains_and_name_the_cycle() -> None:
+    from scripts import manifest_v3
+
+    size = 10000
+    ids = [f"cmp:chain-{index:05d}" for index in range(size)]
+    records = {
+        component_id: _cycle_catalog_record(ids[index + 1 : index + 2])
+        for index, component_id in enumerate(ids)
+    }
+    manifest_v3._reject_relationship_cycles(records, "catalog-cycle", catalog=True)
+
+    records[ids[-1]] = _cycle_catalog_record([], successor=ids[size - 3])
+    with pytest.raises(bootstrap.ManifestValidationError) as error:
+        manifest_v3._reject_relationship_cycles(records, "catalog-cycle", catalog=True)
+    assert error.value.category == "catalog-cycle"
+    assert error.value.detail.endswith(": " + " -> ".join(ids[size - 3 :] + [ids[size - 3]]))
+
+
+def test_manifest_provenance_cycles_take_precedence_over_reintroduction_cycles() -> None:
+    from scripts import manifest_v3
+
+    def record(generated_from: list, reintroduces: Optional[str] = None, successor: Optional[str] = None) -> dict:
+        retirement = {"successor_component_id": successor} if successor is not None else None
+        return {
+            "provenance": {"generated_from": generated_from},
+            "lifecycle": {"reintroduces_component_id": reintroduces, "retirement": retirement},
+        }
+
+    records = {
+        "cmp:a": record([], reintroduces="cmp:b"),
+        "cmp:b": record([], successor="cmp:a"),
+        "cmp:c": record(["cmp:d"]),
+        "cmp:d": record(["cmp:c"]),
+    }
+    with pytest.raises(bootstrap.ManifestValidationError) as error:
+        manifest_v3._reject_relationship_cycles(
+            records, "manifest-reintroduction", catalog=False, provenance_category="manifest-provenance"
+        )
+    assert (error.value.category, error.value.detail.split(": ")[1]) == (
+        "manifest-provenance",
+        "cmp:c -> cmp:d -> cmp:c",
+    )
+
+    records["cmp:d"] = record([], successor="cmp:c")
+    with pytest.raises(bootstrap.ManifestValidationError) as error:
+        manifest_v3._reject_relationship_cycles(
+            records, "manifest-reintroduction", catalog=False, provenance_category="manifest-provenance"
+        )
+    assert (error.value.category, error.value.detail.split(": ")[1]) == (
+        "manifest-reintroduction",
+        "cmp:a -> cmp:b -> cmp:a",
+    )